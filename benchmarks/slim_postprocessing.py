@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Compares the time and peak memory usage of post-processing the tree sequence
+output by SLiM (rescaling, recapitation, simplification and mutation) with
+the table-level pipeline of the SLiM engine and with the previous
+implementation, which made a Python pass over the individuals and wrapped
+each intermediate tree sequence in a pyslim.SlimTreeSequence.
+"""
+import argparse
+import itertools
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import msprime
+import pyslim
+import tskit
+
+import stdpopsim
+import stdpopsim.slim_engine
+
+
+def previous_recap_and_rescale(engine, tables, seed, recap_epoch, contig,
+                               mutation_rate):
+    """
+    The post-processing as it was before the table-level pipeline. SLiM's
+    output was loaded as a pyslim.SlimTreeSequence, so this starts from one.
+    """
+    rng = random.Random(seed)
+    s1, s2 = rng.randrange(1, 2**32), rng.randrange(1, 2**32)
+    ts = pyslim.SlimTreeSequence.load_tables(tables)
+    tables = ts.dump_tables()
+    for table in (tables.nodes, tables.migrations):
+        table.time = stdpopsim.slim_engine._rescale_times(table.time, recap_epoch)
+    ts = pyslim.SlimTreeSequence.load_tables(tables)
+    ts.slim_generation = float(
+        stdpopsim.slim_engine._rescale_times(ts.slim_generation, recap_epoch))
+    population_configurations = [
+            msprime.PopulationConfiguration(
+                initial_size=pop.start_size, growth_rate=pop.growth_rate)
+            for pop in recap_epoch.populations]
+    ts = ts.recapitate(
+            recombination_rate=contig.recombination_map.mean_recombination_rate,
+            population_configurations=population_configurations,
+            migration_matrix=recap_epoch.migration_matrix,
+            random_seed=s1)
+    nodes = itertools.chain.from_iterable(
+                i.nodes for i in ts.individuals()
+                if i.flags & pyslim.INDIVIDUAL_REMEMBERED)
+    ts = ts.simplify(samples=list(nodes), filter_populations=False)
+    if mutation_rate > 0:
+        ts = pyslim.SlimTreeSequence(msprime.mutate(
+            ts, rate=mutation_rate, keep=True, random_seed=s2))
+    return ts
+
+
+def current_recap_and_rescale(engine, tables, seed, recap_epoch, contig,
+                              mutation_rate):
+    return engine._recap_and_rescale(
+        tables, seed, recap_epoch, contig, mutation_rate)
+
+
+def run(method, engine, trees_file, recap_epoch, contig, mutation_rate, queue):
+    """
+    Runs the specified post-processing method in a new process, and puts
+    the wall time and the increase in peak RSS in bytes on the queue.
+    """
+    tables = tskit.TableCollection.load(trees_file)
+    before_rss = stdpopsim.metrics._max_rss()
+    before = time.perf_counter()
+    method(engine, tables, 1234, recap_epoch, contig, mutation_rate)
+    elapsed = time.perf_counter() - before
+    after_rss = stdpopsim.metrics._max_rss()
+    queue.put((elapsed, after_rss - before_rss))
+
+
+def benchmark(method, engine, trees_file, recap_epoch, contig, mutation_rate,
+              num_replicates):
+    """
+    Returns the median (wall_time, max_rss_delta) of the specified method.
+    Each replicate runs in a new process, so that the peak RSS of one
+    doesn't hide that of the next.
+    """
+    context = multiprocessing.get_context("fork")
+    results = []
+    for _ in range(num_replicates):
+        queue = context.Queue()
+        proc = context.Process(target=run, args=(
+            method, engine, trees_file, recap_epoch, contig, mutation_rate, queue))
+        proc.start()
+        results.append(queue.get())
+        proc.join()
+    return tuple(statistics.median(x) for x in zip(*results))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+            "--species", default="HomSap",
+            help="The species [%(default)s].")
+    parser.add_argument(
+            "--model", default="OutOfAfrica_3G09",
+            help="The demographic model [%(default)s].")
+    parser.add_argument(
+            "--chromosome", default="chr22",
+            help="The chromosome [%(default)s].")
+    parser.add_argument(
+            "-l", "--length-multiplier", type=float, default=0.1,
+            help="The length multiplier of the chromosome [%(default)s].")
+    parser.add_argument(
+            "-Q", "--scaling-factor", type=float, default=10,
+            help="The SLiM scaling factor [%(default)s].")
+    parser.add_argument(
+            "-n", "--num-samples", type=int, default=100,
+            help="The number of samples from each population [%(default)s].")
+    parser.add_argument(
+            "--slim-path", default=None,
+            help="The path to the slim executable.")
+    parser.add_argument(
+            "-r", "--num-replicates", metavar="NREPS", type=int, default=3,
+            help="Number of timing replicates for each method [%(default)s].")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    if sys.platform.startswith("win"):
+        sys.exit("This benchmark requires fork()")
+    args = parse_args()
+    engine = stdpopsim.get_engine("slim")
+    species = stdpopsim.get_species(args.species)
+    model = species.get_demographic_model(args.model)
+    contig = species.get_contig(
+            args.chromosome, length_multiplier=args.length_multiplier)
+    samples = model.get_samples(
+        *([args.num_samples] * model.num_sampling_populations))
+
+    with tempfile.TemporaryDirectory(prefix="stdpopsim_") as tmpdir:
+        script_file = os.path.join(tmpdir, "script.slim")
+        recomb_file = os.path.join(tmpdir, "script.recomb")
+        trees_file = os.path.join(tmpdir, "out.trees")
+        # Mutations are added after recapitation, as in the SLiM engine.
+        slim_contig = stdpopsim.Contig(
+                recombination_map=contig.recombination_map, mutation_rate=0,
+                genetic_map=contig.genetic_map)
+        with open(script_file, "w") as f:
+            recap_epoch = stdpopsim.slim_engine.slim_makescript(
+                    f, trees_file, model, slim_contig, samples,
+                    args.scaling_factor, 10,
+                    recombination_map_file=recomb_file)
+        engine._run_slim(script_file, slim_path=args.slim_path, seed=1)
+        tables = tskit.TableCollection.load(trees_file)
+        print(
+            f"# SLiM output: {len(tables.nodes)} nodes, {len(tables.edges)} "
+            f"edges, {len(tables.individuals)} individuals")
+        del tables
+
+        print("method\twall (s)\tmax RSS increase (MiB)")
+        for name, method in (
+                ("previous", previous_recap_and_rescale),
+                ("table-level", current_recap_and_rescale)):
+            wall_time, max_rss = benchmark(
+                    method, engine, trees_file, recap_epoch, contig,
+                    contig.mutation_rate, args.num_replicates)
+            print(f"{name}\t{wall_time:.3f}\t{max_rss / 2**20:.1f}")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Compares the time taken to generate a SLiM script and start SLiM, when the
+recombination map is written into the script and when it is read from a
+separate file.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import stdpopsim
+import stdpopsim.slim_engine
+
+
+def time_it(func, num_replicates):
+    """
+    Returns the median wall clock time of the specified function, in seconds.
+    """
+    times = []
+    for _ in range(num_replicates):
+        before = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - before)
+    return statistics.median(times)
+
+
+def benchmark(engine, model, contig, samples, num_replicates, slim_path=None):
+    """
+    Returns a dictionary mapping each way of passing the recombination map
+    to the tuple (script_size, generation_time, startup_time).
+    """
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="stdpopsim_") as tmpdir:
+        script_file = os.path.join(tmpdir, "script.slim")
+        recomb_file = os.path.join(tmpdir, "script.recomb")
+        for method, map_file in (("inline", None), ("file", recomb_file)):
+
+            def generate():
+                with open(script_file, "w") as f:
+                    stdpopsim.slim_engine.slim_makescript(
+                            f, stdpopsim.slim_engine._DEFAULT_TREES_FILE,
+                            model, contig, samples, 1, 10,
+                            recombination_map_file=map_file)
+
+            def start():
+                engine._run_slim(
+                        script_file, slim_path=slim_path, dry_run=True,
+                        trees_file=os.path.join(tmpdir, "out.trees"),
+                        recombination_map_file=map_file)
+
+            generation_time = time_it(generate, num_replicates)
+            startup_time = time_it(start, num_replicates)
+            size = os.path.getsize(script_file)
+            if map_file is not None:
+                size += os.path.getsize(map_file)
+            results[method] = (size, generation_time, startup_time)
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+            "--species", default="HomSap",
+            help="The species [%(default)s].")
+    parser.add_argument(
+            "--genetic-map", default="HapMapII_GRCh37",
+            help="The genetic map [%(default)s].")
+    parser.add_argument(
+            "--slim-path", default=None,
+            help="The path to the slim executable.")
+    parser.add_argument(
+            "-r", "--num-replicates", metavar="NREPS", type=int, default=5,
+            help="Number of timing replicates for each method [%(default)s].")
+    parser.add_argument(
+            "chromosomes", nargs="*", default=["chr22", "chr1"],
+            help="The chromosomes to benchmark [%(default)s].")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    engine = stdpopsim.get_engine("slim")
+    species = stdpopsim.get_species(args.species)
+    model = stdpopsim.PiecewiseConstantSize(species.population_size)
+    samples = model.get_samples(10)
+
+    print("chromosome\tintervals\tmethod\tbytes\tgeneration (s)\tstartup (s)")
+    for chromosome in args.chromosomes:
+        contig = species.get_contig(chromosome, genetic_map=args.genetic_map)
+        num_intervals = len(contig.recombination_map.get_rates()) - 1
+        results = benchmark(
+                engine, model, contig, samples, args.num_replicates,
+                slim_path=args.slim_path)
+        for method, (size, generation_time, startup_time) in results.items():
+            print(
+                f"{chromosome}\t{num_intervals}\t{method}\t{size}\t"
+                f"{generation_time:.3f}\t{startup_time:.3f}")
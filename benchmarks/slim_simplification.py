@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Compares the run time and peak memory usage of SLiM simulations of catalog
+models for different intervals between simplifications of the tree sequence,
+including the default interval chosen by the SLiM engine.
+"""
+import argparse
+import statistics
+
+import stdpopsim
+import stdpopsim.slim_engine
+
+
+def benchmark(engine, model, contig, samples, interval, num_replicates,
+              scaling_factor, slim_path=None):
+    """
+    Returns the median (ancestry_time, cpu_time, max_rss) of the SLiM
+    processes simulating the specified model with the specified
+    simplification interval. The times are in seconds, and the peak
+    resident set size is in bytes.
+    """
+    results = []
+    for seed in range(1, num_replicates + 1):
+        with stdpopsim.record_metrics() as metrics:
+            engine.simulate(
+                    demographic_model=model, contig=contig, samples=samples,
+                    seed=seed, slim_path=slim_path,
+                    slim_scaling_factor=scaling_factor,
+                    slim_simplification_interval=interval)
+        results.append((
+            metrics.child_wall_time, metrics.child_cpu_time,
+            metrics.child_max_rss))
+    return tuple(
+        None if None in x else statistics.median(x) for x in zip(*results))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+            "--species", default="HomSap",
+            help="The species [%(default)s].")
+    parser.add_argument(
+            "--chromosome", default="chr22",
+            help="The chromosome [%(default)s].")
+    parser.add_argument(
+            "-l", "--length-multiplier", type=float, default=0.1,
+            help="The length multiplier of the chromosome [%(default)s].")
+    parser.add_argument(
+            "-Q", "--scaling-factor", type=float, default=10,
+            help="The SLiM scaling factor [%(default)s].")
+    parser.add_argument(
+            "-n", "--num-samples", type=int, default=20,
+            help="The number of samples from each population [%(default)s].")
+    parser.add_argument(
+            "-i", "--intervals", type=int, nargs="+", default=[1, 10, 100, 1000],
+            help="The simplification intervals to compare with the default "
+                 "[%(default)s].")
+    parser.add_argument(
+            "--slim-path", default=None,
+            help="The path to the slim executable.")
+    parser.add_argument(
+            "-r", "--num-replicates", metavar="NREPS", type=int, default=3,
+            help="Number of replicates for each interval [%(default)s].")
+    parser.add_argument(
+            "models", nargs="*",
+            default=["OutOfAfrica_3G09", "AncientEurasia_9K19"],
+            help="The demographic models to benchmark [%(default)s].")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    engine = stdpopsim.get_engine("slim")
+    species = stdpopsim.get_species(args.species)
+    contig = species.get_contig(
+            args.chromosome, length_multiplier=args.length_multiplier)
+
+    print("model\tinterval\twall (s)\tcpu (s)\tmax RSS (MiB)")
+    for model_id in args.models:
+        model = species.get_demographic_model(model_id)
+        samples = model.get_samples(
+            *([args.num_samples] * model.num_sampling_populations))
+        default = stdpopsim.slim_engine._simplification_interval(
+                model, contig, samples, args.scaling_factor)
+        for interval in sorted(set(args.intervals + [default])):
+            wall_time, cpu_time, max_rss = benchmark(
+                    engine, model, contig, samples, interval,
+                    args.num_replicates, args.scaling_factor,
+                    slim_path=args.slim_path)
+            label = f"{interval} (default)" if interval == default else interval
+            max_rss = "NA" if max_rss is None else f"{max_rss / 2**20:.1f}"
+            print(
+                f"{model_id}\t{label}\t{wall_time:.2f}\t{cpu_time:.2f}\t"
+                f"{max_rss}")
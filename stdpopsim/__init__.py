@@ -13,9 +13,12 @@ from . models import *  # NOQA
 from . species import *  # NOQA
 from . genomes import *  # NOQA
 from . cache import *  # NOQA
+from . metrics import *  # NOQA
 from . citations import *  # NOQA
 from . engines import *  # NOQA
+from . cost import *  # NOQA
 from . warning_categories import *  # NOQA
+from . exceptions import *  # NOQA
 
 # Add imports for all defined species here.
 # We import these here to build the catalog, but the internal functions
@@ -28,5 +31,3 @@ from .catalog import HomSap  # NOQA
 from .catalog import PonAbe  # NOQA
 
 from . import qc  # NOQA
-
-from . slim_engine import *  # NOQA
@@ -1,15 +1,31 @@
 """
-Cache handling for downloaded data.
+Cache handling for downloaded data, simulation results and generated scripts,
+and the location of temporary files.
 """
+import hashlib
+import json
 import pathlib
 import logging
 import os
+import shutil
+import tempfile
 
 import appdirs
+import tskit
+
+import stdpopsim
 
 logger = logging.getLogger(__name__)
 
 _cache_dir = None
+_scratch_dir = None
+_result_cache = None
+_script_cache = None
+_checkpoint_cache = None
+
+# Files in /dev/shm use memory, so we only use it for temporary files if at
+# least this fraction of its size would remain free.
+_SHM_RESERVE = 0.25
 
 
 def set_cache_dir(cache_dir=None):
@@ -43,3 +59,462 @@ def get_cache_dir():
 
 
 set_cache_dir()
+
+
+def set_scratch_dir(scratch_dir=None):
+    """
+    The scratch_dir is the directory in which stdpopsim writes temporary
+    files, such as SLiM scripts and the tree sequences output by SLiM. If the
+    specified scratch_dir is not None, this value is converted to a
+    pathlib.Path instance, which is used as the scratch directory. If
+    scratch_dir is None (the default), the scratch directory is set from the
+    environment variable `STDPOPSIM_SCRATCH` if it exists. Otherwise, the
+    scratch directory is chosen automatically for each temporary file (see
+    :func:`.get_scratch_dir`).
+
+    No checks for existance, writability, etc. are performed by this function.
+    """
+    if scratch_dir is None:
+        scratch_dir = os.environ.get("STDPOPSIM_SCRATCH", None)
+    global _scratch_dir
+    _scratch_dir = None if scratch_dir is None else pathlib.Path(scratch_dir)
+    logger.info(f"Set scratch_dir to {_scratch_dir}")
+
+
+def get_scratch_dir(required_space=0):
+    """
+    Returns the directory in which to write temporary files of about
+    ``required_space`` bytes in total, as a pathlib.Path instance. If no
+    scratch directory has been set (see :func:`.set_scratch_dir`), this is the
+    in-memory filesystem `/dev/shm` if it exists and has enough free space,
+    or None otherwise, meaning that the default temporary directory should
+    be used (see :func:`tempfile.gettempdir`).
+    """
+    if _scratch_dir is not None:
+        return _scratch_dir
+    shm = pathlib.Path("/dev/shm")
+    if not (shm.is_dir() and os.access(str(shm), os.W_OK | os.X_OK)):
+        return None
+    usage = shutil.disk_usage(str(shm))
+    if usage.free - required_space < _SHM_RESERVE * usage.total:
+        logger.debug(f"Not enough free space in {shm} for {required_space} bytes")
+        return None
+    # Files in /dev/shm are held in memory, so say when it is used.
+    logger.info(
+        f"Using the in-memory filesystem {shm} for about {required_space} "
+        "bytes of temporary files")
+    return shm
+
+
+set_scratch_dir()
+
+
+def _json_default(obj):
+    # numpy arrays and scalars, as found in migration matrices and
+    # recombination maps.
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    return str(obj)
+
+
+def _simulation_inputs(demographic_model, contig, samples):
+    """
+    Returns a JSON encodable dictionary describing the specified model,
+    contig and samples, for computing cache keys.
+    """
+    num_populations = len(demographic_model.population_configurations)
+    rm = contig.recombination_map
+    return {
+        "demographic_model": {
+            "id": demographic_model.id,
+            "population_configurations": [
+                pc.get_ll_representation()
+                for pc in demographic_model.population_configurations],
+            "migration_matrix": demographic_model.migration_matrix,
+            "demographic_events": [
+                de.get_ll_representation(num_populations)
+                for de in demographic_model.demographic_events],
+        },
+        "contig": {
+            "positions": rm.get_positions(),
+            "rates": rm.get_rates(),
+            "mutation_rate": contig.mutation_rate,
+        },
+        "samples": [[sample.population, sample.time] for sample in samples],
+    }
+
+
+def _atomic_write(path, data):
+    """
+    Writes the specified bytes to the specified path via a temporary file,
+    so that other processes never see a partially written file.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def _hash_inputs(inputs):
+    encoded = json.dumps(inputs, sort_keys=True, default=_json_default)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class ResultCache(object):
+    """
+    A content-addressed cache of simulated tree sequences, stored in the
+    ``results`` subdirectory of the cache directory (see
+    :func:`.get_cache_dir`). Results are keyed by a hash of the simulation
+    inputs, and are stored separately for each version of each engine, so
+    that results from another engine version are never returned. Several
+    versions of an engine may share the cache, so results from other
+    versions are left in place. When the total size of the cached results
+    exceeds ``max_size`` bytes, the least recently used results are removed,
+    whichever engine version they belong to.
+
+    The methods that depend on the engine version take an optional
+    ``version``, which defaults to :meth:`.Engine.get_version`. Callers
+    making several calls for one simulation should look the version up
+    once and pass it to each of them, as it may be slow to find.
+
+    The result cache is opt-in: see :func:`.set_result_cache`.
+
+    :ivar max_size: The maximum total size of the cached results, in bytes.
+    :vartype max_size: int
+    """
+
+    def __init__(self, max_size=2**30):
+        self.max_size = max_size
+
+    @property
+    def results_dir(self):
+        return pathlib.Path(get_cache_dir()) / "results"
+
+    def engine_dir(self, engine, version=None):
+        if version is None:
+            version = engine.get_version()
+        return self.results_dir / engine.id / version
+
+    def key(
+            self, engine, demographic_model, contig, samples, seed, params,
+            version=None):
+        """
+        Returns a hash of the specified simulation inputs.
+        """
+        if version is None:
+            version = engine.get_version()
+        inputs = _simulation_inputs(demographic_model, contig, samples)
+        inputs.update(engine=[engine.id, version], seed=seed, params=params)
+        return _hash_inputs(inputs)
+
+    def get(self, engine, key, version=None):
+        """
+        Returns the cached tree sequence for the specified engine and key,
+        or None if it is not in the cache.
+        """
+        if version is None:
+            version = engine.get_version()
+        path = self.engine_dir(engine, version) / f"{key}.trees"
+        if not path.exists():
+            return None
+        try:
+            ts = tskit.load(str(path))
+        except Exception as e:
+            # A result that can't be loaded is treated as a cache miss, and
+            # is removed so that it will be replaced.
+            logger.warning(f"Removing unreadable cached result {path}: {e}")
+            path.unlink()
+            return None
+        # Update the modification time, which we use to order the LRU eviction.
+        os.utime(path)
+        logger.info(f"Loaded cached simulation result {path}")
+        return ts
+
+    def put(self, engine, key, ts, version=None):
+        """
+        Stores the specified tree sequence under the specified engine and key,
+        and then evicts the least recently used results if the cache is full.
+        """
+        engine_dir = self.engine_dir(engine, version)
+        os.makedirs(engine_dir, exist_ok=True)
+        path = engine_dir / f"{key}.trees"
+        # Write to a temporary file first, so that other processes never
+        # see a partially written result.
+        fd, tmp_path = tempfile.mkstemp(dir=engine_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            ts.dump(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        logger.debug(f"Stored simulation result {path}")
+        self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used results until the total size of the
+        cache is at most ``max_size``.
+        """
+        entries = []
+        for path in self.results_dir.glob("*/*/*.trees"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            logger.debug(f"Evicting simulation result {path}")
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+    def clear(self):
+        """
+        Removes all cached results.
+        """
+        shutil.rmtree(self.results_dir, ignore_errors=True)
+
+
+def set_result_cache(enabled=True, max_size=2**30):
+    """
+    Enables or disables the cache of simulation results. When enabled,
+    simulations run with a specified seed are stored in a
+    :class:`.ResultCache` under the cache directory, and repeated calls to
+    :meth:`.Engine.simulate` with identical inputs return the stored result
+    rather than re-running the simulation. The result cache is disabled
+    by default.
+
+    :param bool enabled: Whether the result cache should be used.
+    :param int max_size: The maximum total size of the cached results, in bytes.
+    """
+    global _result_cache
+    _result_cache = ResultCache(max_size=max_size) if enabled else None
+
+
+def get_result_cache():
+    """
+    Returns the current :class:`.ResultCache`, or None if the result cache
+    is disabled. See :func:`.set_result_cache`.
+    """
+    return _result_cache
+
+
+class ScriptCache(object):
+    """
+    A cache of the scripts generated by simulation engines that run an
+    external program (such as SLiM), stored in the ``scripts`` subdirectory
+    of the cache directory (see :func:`.get_cache_dir`). Scripts are keyed
+    by a hash of the inputs used to generate them and the stdpopsim version,
+    so that simulations that differ only in their seed or output file reuse
+    the same script. Each script is stored with a dictionary of metadata
+    needed to process the simulation output. When the total size of the
+    cached scripts exceeds ``max_size`` bytes, the least recently used
+    scripts are removed.
+
+    The script cache is opt-in: see :func:`.set_script_cache`.
+
+    :ivar max_size: The maximum total size of the cached scripts, in bytes.
+    :vartype max_size: int
+    """
+
+    def __init__(self, max_size=2**27):
+        self.max_size = max_size
+
+    @property
+    def scripts_dir(self):
+        return pathlib.Path(get_cache_dir()) / "scripts"
+
+    def engine_dir(self, engine):
+        return self.scripts_dir / engine.id
+
+    def key(self, engine, demographic_model, contig, samples, params):
+        """
+        Returns a hash of the specified script generation inputs.
+        """
+        inputs = _simulation_inputs(demographic_model, contig, samples)
+        inputs.update(
+            engine=engine.id, version=stdpopsim.__version__, params=params)
+        return _hash_inputs(inputs)
+
+    def get(self, engine, key, suffixes):
+        """
+        Returns the tuple (paths, metadata) for the cached script with the
+        specified engine and key, or None if it is not in the cache.
+        The script may consist of several files, which are distinguished by
+        their suffixes: ``paths`` is a dictionary mapping each of the
+        specified file suffixes to the path of the cached file.
+        """
+        engine_dir = self.engine_dir(engine)
+        paths = {suffix: engine_dir / f"{key}{suffix}" for suffix in suffixes}
+        metadata_path = engine_dir / f"{key}.json"
+        try:
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+            # Update the modification times, which we use to order the
+            # LRU eviction.
+            for path in paths.values():
+                os.utime(path)
+        except (OSError, ValueError):
+            return None
+        logger.debug(f"Using cached script {engine_dir / key}")
+        return paths, metadata
+
+    def put(self, engine, key, files, metadata):
+        """
+        Stores copies of the files of a script, with the specified metadata,
+        under the specified engine and key, and then evicts the least recently
+        used scripts if the cache is full. The ``files`` are a dictionary
+        mapping each file suffix to the path of the file to store.
+
+        If the files are larger than ``max_size`` in total, or can't be
+        written, a warning is logged and nothing is stored.
+
+        :return: True if the script was stored, and False otherwise.
+        :rtype: bool
+        """
+        engine_dir = self.engine_dir(engine)
+        size = sum(os.path.getsize(path) for path in files.values())
+        if size > self.max_size:
+            logger.warning(
+                f"Not storing {engine_dir / key} in the cache, as its size "
+                f"({size} bytes) exceeds the maximum cache size "
+                f"({self.max_size} bytes)")
+            return False
+        try:
+            os.makedirs(engine_dir, exist_ok=True)
+            # The metadata is written after the files, so that an entry is
+            # only found once the metadata and all of its files are complete.
+            for suffix, path in files.items():
+                with open(path, "rb") as f:
+                    _atomic_write(engine_dir / f"{key}{suffix}", f.read())
+            _atomic_write(
+                engine_dir / f"{key}.json", json.dumps(metadata).encode())
+        except OSError as e:
+            logger.warning(f"Failed to store {engine_dir / key} in the cache: {e}")
+            return False
+        logger.debug(f"Stored script {engine_dir / key}")
+        self.evict(keep=engine_dir / key)
+        return True
+
+    def evict(self, keep=None):
+        """
+        Removes the least recently used scripts until the total size of the
+        cache is at most ``max_size``. The entry whose path without a suffix
+        is ``keep``, if any, is not removed.
+        """
+        entries = []
+        for path in self.scripts_dir.glob("*/*.json"):
+            if path.with_suffix("") == keep:
+                continue
+            files = [path] + [
+                p for p in path.parent.glob(f"{path.stem}.*") if p != path]
+            try:
+                stats = [p.stat() for p in files]
+            except FileNotFoundError:
+                continue
+            mtime = max(stat.st_mtime for stat in stats)
+            entries.append((mtime, sum(stat.st_size for stat in stats), files))
+        total_size = sum(size for _, size, _ in entries)
+        if keep is not None:
+            total_size += sum(
+                p.stat().st_size for p in keep.parent.glob(f"{keep.name}.*"))
+        for _, size, files in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            for path in files:
+                logger.debug(f"Evicting script {path}")
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+            total_size -= size
+
+    def clear(self):
+        """
+        Removes all cached scripts.
+        """
+        shutil.rmtree(self.scripts_dir, ignore_errors=True)
+
+
+def set_script_cache(enabled=True, max_size=2**27):
+    """
+    Enables or disables the cache of generated simulation scripts. When
+    enabled, engines that generate a script for an external program store
+    the script in a :class:`.ScriptCache` under the cache directory, and
+    reuse it for later simulations with the same inputs.
+    The script cache is disabled by default.
+
+    :param bool enabled: Whether the script cache should be used.
+    :param int max_size: The maximum total size of the cached scripts, in bytes.
+    """
+    global _script_cache
+    _script_cache = ScriptCache(max_size=max_size) if enabled else None
+
+
+def get_script_cache():
+    """
+    Returns the current :class:`.ScriptCache`, or None if the script cache
+    is disabled. See :func:`.set_script_cache`.
+    """
+    return _script_cache
+
+
+class CheckpointCache(ScriptCache):
+    """
+    A cache of simulation checkpoints, such as the population at the end of
+    a SLiM burn-in, stored in the ``checkpoints`` subdirectory of the cache
+    directory (see :func:`.get_cache_dir`). This works in the same way as
+    the :class:`.ScriptCache`, but is kept separate from it, with its own
+    ``max_size``, as checkpoints are typically much larger than scripts.
+
+    The checkpoint cache is enabled by default, but is only used by
+    simulations that ask for a checkpoint: see :func:`.set_checkpoint_cache`.
+
+    :ivar max_size: The maximum total size of the cached checkpoints, in bytes.
+    :vartype max_size: int
+    """
+
+    def __init__(self, max_size=2**33):
+        self.max_size = max_size
+
+    @property
+    def scripts_dir(self):
+        return pathlib.Path(get_cache_dir()) / "checkpoints"
+
+
+def set_checkpoint_cache(enabled=True, max_size=2**33):
+    """
+    Enables or disables the cache of simulation checkpoints. When enabled,
+    simulations that ask for a checkpoint (e.g., with the
+    ``slim_burn_in_checkpoint`` option of the SLiM engine) store it in a
+    :class:`.CheckpointCache` under the cache directory, and later
+    simulations with the same inputs start from the stored checkpoint.
+    The checkpoint cache is enabled by default.
+
+    :param bool enabled: Whether the checkpoint cache should be used.
+    :param int max_size: The maximum total size of the cached checkpoints,
+        in bytes.
+    """
+    global _checkpoint_cache
+    _checkpoint_cache = CheckpointCache(max_size=max_size) if enabled else None
+
+
+def get_checkpoint_cache():
+    """
+    Returns the current :class:`.CheckpointCache`, or None if the checkpoint
+    cache is disabled. See :func:`.set_checkpoint_cache`.
+    """
+    return _checkpoint_cache
+
+
+set_checkpoint_cache()
@@ -239,61 +239,96 @@ def get_provenance_dict():
     return document
 
 
-def write_output(ts, args):
+def write_output(ts, args, metrics=None):
     """
     Adds provenance information to the specified tree sequence (ensuring that the
     output is reproducible) and write the resulting tree sequence to output.
+    If metrics are provided and the ``--metrics-provenance`` option was given,
+    the metrics recorded so far are included in the provenance record.
     """
     tables = ts.dump_tables()
     logger.debug("Updating provenance")
     provenance = get_provenance_dict()
+    if metrics is not None and getattr(args, "metrics_provenance", False):
+        provenance["metrics"] = metrics.asdict()
     tables.provenances.add_row(json.dumps(provenance))
     ts = tables.tree_sequence()
-    if args.output is None:
-        # There's no way to get tskit to write directly to stdout, so we write
-        # to a tempfile first.
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmpfile = pathlib.Path(tmpdir) / "tmp.trees"
-            ts.dump(tmpfile)
-            with open(tmpfile, "rb") as f:
-                shutil.copyfileobj(f, sys.stdout.buffer)
-    else:
-        logger.debug(f"Writing to {args.output}")
-        ts.dump(args.output)
+    with stdpopsim.record_phase("output_writing"):
+        if args.output is None:
+            # There's no way to get tskit to write directly to stdout, so we write
+            # to a tempfile first.
+            with tempfile.TemporaryDirectory() as tmpdir:
+                tmpfile = pathlib.Path(tmpdir) / "tmp.trees"
+                ts.dump(tmpfile)
+                with open(tmpfile, "rb") as f:
+                    shutil.copyfileobj(f, sys.stdout.buffer)
+        else:
+            logger.debug(f"Writing to {args.output}")
+            ts.dump(args.output)
+
+
+def write_metrics(metrics, args):
+    """
+    Writes the per-phase simulation metrics to the file given by the
+    ``--metrics-file`` option, if specified.
+    """
+    for phase in metrics.phases:
+        child_usage = ""
+        if phase.child_cpu_time is not None:
+            child_usage = (
+                f"; child wall={phase.child_wall_time:.2f}s "
+                f"cpu={phase.child_cpu_time:.2f}s")
+            if phase.child_max_rss is not None:
+                max_rss = humanize.naturalsize(phase.child_max_rss, binary=True)
+                child_usage += f" max_rss={max_rss}"
+        logger.info(
+            f"phase {phase.name}: wall={phase.wall_time:.2f}s "
+            f"cpu={phase.cpu_time:.2f}s{child_usage}")
+    if args.metrics_file is not None:
+        logger.debug(f"Writing metrics to {args.metrics_file}")
+        with open(args.metrics_file, "w") as f:
+            metrics.dump(f)
 
 
-def get_citations(engine, model, contig, species):
+def get_citations(engine, model, contig, species, engine_params=None):
     """
-    Return a list of all the citations.
+    Return a list of all the citations. The engine_params are the engine
+    specific parameters passed to simulate(), which may require additional
+    citations for the engine. The contig may also be a list of the contigs
+    simulated, when simulating multiple chromosomes.
     """
+    if engine_params is None:
+        engine_params = {}
+    contigs = contig if isinstance(contig, list) else [contig]
     citations = [stdpopsim.citations._stdpopsim_citation]
-    citations.extend(engine.citations)
+    citations.extend(engine.get_citations(**engine_params))
     citations.extend(species.genome.assembly_citations)
     citations.extend(species.genome.mutation_rate_citations)
     citations.extend(species.genome.recombination_rate_citations)
-    if contig.genetic_map is not None:
-        citations.extend(contig.genetic_map.citations)
+    for contig in contigs:
+        if contig.genetic_map is not None:
+            citations.extend(contig.genetic_map.citations)
     citations.extend(model.citations)
     return stdpopsim.Citation.merge(citations)
 
 
-def write_bibtex(engine, model, contig, species, bibtex_file):
+def write_bibtex(engine, model, contig, species, bibtex_file, engine_params=None):
     """
     Write bibtex for available citations to a file."""
-    citations = get_citations(engine, model, contig, species)
+    citations = get_citations(engine, model, contig, species, engine_params)
     for citation in citations:
         bibtex_file.write(citation.fetch_bibtex())
     bibtex_file.close()
 
 
-def write_citations(engine, model, contig, species):
+def write_citations(engine, model, contig, species, engine_params=None):
     """
     Write out citation information so that the user knows what papers to cite
     for the simulation engine, the model and the mutation/recombination rate
     information.
     """
     cite_str = ["If you use this simulation in published work, please cite:"]
-    for citation in get_citations(engine, model, contig, species):
+    for citation in get_citations(engine, model, contig, species, engine_params):
         cite_str.append("\n")
         cite_str.append(citation.displaystr())
     logger.warning("".join(cite_str))
@@ -312,6 +347,49 @@ def summarise_usage():
         max_mem_str = humanize.naturalsize(max_mem, binary=True)
         logger.info("rusage: user={}; sys={:.2f}s; max_rss={}".format(
             user_time, sys_time, max_mem_str))
+        # Child processes, such as SLiM, that have been waited for.
+        rusage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        if rusage.ru_utime + rusage.ru_stime > 0:
+            user_time = humanize.naturaldelta(rusage.ru_utime)
+            max_mem = stdpopsim.metrics._rusage_max_rss(rusage)
+            max_mem_str = humanize.naturalsize(max_mem, binary=True)
+            logger.info("child rusage: user={}; sys={:.2f}s; max_rss={}".format(
+                user_time, rusage.ru_stime, max_mem_str))
+
+
+def write_slim_progress(progress, out=None):
+    """
+    Write a compact, single line summary of a SLiM simulation's progress,
+    which is overwritten by the next report.
+    """
+    if out is None:
+        out = sys.stderr
+    if progress.epoch < 0:
+        epoch = "burn-in"
+    else:
+        epoch = f"epoch {progress.epoch}"
+    sizes = ",".join(str(n) for n in progress.population_sizes)
+    eta = "?" if progress.eta is None else humanize.naturaldelta(progress.eta)
+    line = (
+        f"SLiM generation {progress.generation}/{progress.end_generation} "
+        f"({progress.fraction:.0%}); {epoch}; sizes={sizes}; ETA {eta}")
+    end = "\n" if progress.generation >= progress.end_generation else ""
+    # Pad with spaces to clear any remnants of a longer previous line.
+    out.write(f"\r{line:<79}{end}")
+    out.flush()
+
+
+def warn_qc_missing(model):
+    warnings.warn(stdpopsim.QCMissingWarning(
+            f"{model.id} has not been QCed. Use at your own risk! "
+            "Demographic models that have not undergone stdpopsim's "
+            "Quality Control procedure may contain implementation "
+            "errors, leading to differences between simulations "
+            "and the model described in the original publication. "
+            "More information about the QC process can be found in "
+            "the developer documentation. "
+            "https://stdpopsim.readthedocs.io/en/latest/development.html"
+            "#demographic-model-review-process"))
 
 
 def add_simulate_species_parser(parser, species):
@@ -372,7 +450,7 @@ def add_simulate_species_parser(parser, species):
                 f"{', '.join(choices)}. "))
 
     if len(species.genome.chromosomes) == 1:
-        species_parser.set_defaults(chromosome=species.genome.chromosomes[0].id)
+        species_parser.set_defaults(chromosome=None)
     else:
         # To avoid listing too much stuff out in the help, we only list
         # the actual IDs. We make all synonyms available as choices though.
@@ -382,11 +460,32 @@ def add_simulate_species_parser(parser, species):
             choices.append(chrom.id)
             all_choices.extend([chrom.id] + chrom.synonyms)
         species_parser.add_argument(
-            "-c", "--chromosome", choices=all_choices, metavar="", default=choices[0],
+            "-c", "--chromosome", choices=all_choices, metavar="", default=None,
             help=(
-                f"Simulate a specific chromosome. "
-                f"Options: {', '.join(choices)}. "
+                f"Simulate a specific chromosome. Cannot be used with "
+                f"--chromosomes. Options: {', '.join(choices)}. "
                 f"Default={choices[0]}."))
+    species_parser.add_argument(
+        "--chromosomes", default=None, metavar="CHROMS",
+        help=(
+            "Simulate several chromosomes in parallel, as a comma separated "
+            "list of chromosome IDs, or 'all' to simulate all autosomes. "
+            "Each chromosome is simulated independently, using a seed derived "
+            "from --seed. The --output option must be given, and specifies a "
+            "directory in which one tree sequence file is written for each "
+            "chromosome, along with a 'manifest.json' file describing the "
+            "simulations."))
+    species_parser.add_argument(
+        "-p", "--processes", default=None, type=int,
+        help=(
+            "The number of processes to use when simulating multiple "
+            "chromosomes with --chromosomes. Defaults to the number of CPUs."))
+    species_parser.add_argument(
+        "--single-run", action="store_true", default=False,
+        help=(
+            "Simulate the chromosomes given by --chromosomes in a single run "
+            "of the simulation engine, with free recombination between "
+            "chromosomes, rather than as independent simulations."))
     species_parser.add_argument(
         "-l", "--length-multiplier", default=1, type=float,
         help="Simulate a sequence of length l times the named chromosome's length, "
@@ -413,6 +512,28 @@ def add_simulate_species_parser(parser, species):
             "Where to write the output tree sequence file. Defaults to "
             "stdout if not specified"))
 
+    species_parser.add_argument(
+        "--cost-calibration", default=None, metavar="FILE",
+        help=(
+            "Calibrate the estimated cost of the simulation from the past runs "
+            "recorded in the JSON file FILE, and record this run in FILE "
+            "afterwards. The file is created if it does not exist."))
+    species_parser.add_argument(
+        "--max-memory", type=float, default=None, metavar="MB",
+        help=(
+            "Exit without simulating if the estimated peak memory of the "
+            "simulation exceeds MB mebibytes."))
+    species_parser.add_argument(
+        "--metrics-file", default=None, metavar="FILE",
+        help=(
+            "Write the wall time, CPU time and peak memory increase of each "
+            "phase of the simulation to FILE in JSON format."))
+    species_parser.add_argument(
+        "--metrics-provenance", action="store_true", default=False,
+        help=(
+            "Include the per-phase simulation metrics in the provenance "
+            "record of the output tree sequence."))
+
     species_parser.add_argument(
         "samples", type=int, nargs="+",
         help=(
@@ -439,48 +560,162 @@ def add_simulate_species_parser(parser, species):
                 f"Cannot sample from more than {model.num_sampling_populations} "
                 "populations")
         samples = model.get_samples(*args.samples)
-        contig = species.get_contig(
-            args.chromosome, genetic_map=args.genetic_map,
-            length_multiplier=args.length_multiplier)
+        if args.single_run and args.chromosomes is None:
+            exit("The --single-run option requires --chromosomes")
+        if args.chromosomes is not None:
+            if args.chromosome is not None:
+                exit("Cannot use --chromosome with --chromosomes")
+            run_genome_simulation(args, species, model, samples, qc_complete)
+            return
+        chromosome = args.chromosome
+        if chromosome is None:
+            chromosome = species.genome.chromosomes[0].id
+        with stdpopsim.record_metrics() as metrics:
+            contig = species.get_contig(
+                chromosome, genetic_map=args.genetic_map,
+                length_multiplier=args.length_multiplier)
+            engine = stdpopsim.get_engine(args.engine)
+            logger.info(
+                f"Running simulation model {model.id} for {species.id} on "
+                f"{contig} with {len(samples)} samples using {engine.id}.")
+
+            # extract simulate() parameters from CLI args
+            accepted_params = inspect.signature(engine.simulate).parameters.keys()
+            kwargs = {
+                k: v for k, v in vars(args).items() if k in accepted_params and
+                k not in ("demographic_model", "contig", "samples")}
+
+            cost_estimator = stdpopsim.CostEstimator()
+            if args.cost_calibration is not None:
+                cost_estimator = stdpopsim.CostEstimator.load(args.cost_calibration)
+            if kwargs.get("slim_scaling_factor") == "auto":
+                # Choose the scaling factor here, so that the calibrated cost
+                # estimator is used, and the chosen value is reported.
+                try:
+                    kwargs["slim_scaling_factor"] = engine.choose_scaling_factor(
+                        model, contig, samples, kwargs.get("slim_time_budget"),
+                        slim_burn_in=kwargs.get("slim_burn_in", 10),
+                        slim_recapitation_first=kwargs.get(
+                            "slim_recapitation_first", False),
+                        cost_estimator=cost_estimator)
+                except ValueError as e:
+                    exit(str(e))
+                logger.warning(
+                    f"Using a SLiM scaling factor of {kwargs['slim_scaling_factor']}")
+            estimate = cost_estimator.estimate(engine, model, contig, samples, **kwargs)
+            write_simulation_summary(engine=engine, model=model, contig=contig,
+                                     samples=samples, seed=args.seed,
+                                     estimate=estimate)
+            if not qc_complete:
+                warn_qc_missing(model)
+            if (args.max_memory is not None and
+                    estimate.memory > args.max_memory * 2**20):
+                exit(
+                    "Estimated peak memory of "
+                    f"{humanize.naturalsize(estimate.memory, binary=True)} "
+                    f"exceeds the limit of {args.max_memory} MiB")
+
+            # The progress callback isn't part of kwargs, which are also used
+            # for the cost estimates and citations.
+            progress_kwargs = {}
+            if getattr(args, "show_slim_progress", False) and engine.id == "slim":
+                progress_kwargs["slim_progress"] = write_slim_progress
+            ts = engine.simulate(
+                demographic_model=model, contig=contig, samples=samples,
+                **kwargs, **progress_kwargs)
+
+            summarise_usage()
+            if ts is not None:
+                write_output(ts, args, metrics=metrics)
+        write_metrics(metrics, args)
+        # Only calibrate from runs that simulated something, rather than
+        # dry runs or results loaded from the result cache.
+        if (args.cost_calibration is not None and ts is not None and
+                len(metrics.get_phase("ancestry")) > 0):
+            output_size = None
+            if args.output is not None:
+                output_size = os.path.getsize(args.output)
+            cost_estimator.add_run(
+                engine, model, contig, samples, metrics,
+                output_size=output_size, **kwargs)
+            cost_estimator.save(args.cost_calibration)
+        # Non-QCed models shouldn't be used in publications, so we skip the
+        # "If you use this simulation in published work..." citation request.
+        if qc_complete:
+            write_citations(engine, model, contig, species, kwargs)
+        if args.bibtex_file is not None:
+            write_bibtex(engine, model, contig, species, args.bibtex_file, kwargs)
+
+    def run_genome_simulation(args, species, model, samples, qc_complete):
+        if args.output is None:
+            exit("An output directory must be given with --output "
+                 "when simulating multiple chromosomes")
+        if args.length_multiplier != 1:
+            exit("Cannot use --length-multiplier with --chromosomes")
+        # The chromosomes are simulated in separate processes, so there are
+        # no metrics, cost estimates or progress reports for the whole run.
+        unsupported = [
+            ("--metrics-file", args.metrics_file is not None),
+            ("--metrics-provenance", args.metrics_provenance),
+            ("--cost-calibration", args.cost_calibration is not None),
+            ("--max-memory", args.max_memory is not None),
+            ("--slim-progress", getattr(args, "show_slim_progress", False)),
+        ]
+        for option, used in unsupported:
+            if used:
+                exit(f"Cannot use {option} with --chromosomes")
+        if args.chromosomes == "all":
+            chromosomes = [chrom.id for chrom in species.get_autosomes()]
+        else:
+            chromosomes = []
+            for chrom_id in args.chromosomes.split(","):
+                try:
+                    chromosomes.append(species.genome.get_chromosome(chrom_id).id)
+                except ValueError:
+                    exit(f"Chromosome '{chrom_id}' not found for {species.id}")
         engine = stdpopsim.get_engine(args.engine)
+        if args.genetic_map is not None:
+            get_genetic_map_wrapper(species, args.genetic_map)
         logger.info(
             f"Running simulation model {model.id} for {species.id} on "
-            f"{contig} with {len(samples)} samples using {engine.id}.")
-
-        write_simulation_summary(engine=engine, model=model, contig=contig,
-                                 samples=samples, seed=args.seed)
+            f"{len(chromosomes)} chromosomes with {len(samples)} samples "
+            f"using {engine.id}.")
+        write_simulation_summary(
+            engine=engine, model=model, contig=None, samples=samples,
+            seed=args.seed, chromosomes=chromosomes)
         if not qc_complete:
-            warnings.warn(stdpopsim.QCMissingWarning(
-                    f"{model.id} has not been QCed. Use at your own risk! "
-                    "Demographic models that have not undergone stdpopsim's "
-                    "Quality Control procedure may contain implementation "
-                    "errors, leading to differences between simulations "
-                    "and the model described in the original publication. "
-                    "More information about the QC process can be found in "
-                    "the developer documentation. "
-                    "https://stdpopsim.readthedocs.io/en/latest/development.html"
-                    "#demographic-model-review-process"))
-
-        # extract simulate() parameters from CLI args
+            warn_qc_missing(model)
+
         accepted_params = inspect.signature(engine.simulate).parameters.keys()
-        kwargs = {k: v for k, v in vars(args).items() if k in accepted_params}
-        kwargs.update(demographic_model=model, contig=contig, samples=samples)
-        ts = engine.simulate(**kwargs)
+        exclude = {"demographic_model", "contig", "samples", "seed"}
+        kwargs = {
+            k: v for k, v in vars(args).items()
+            if k in accepted_params and k not in exclude}
+        stdpopsim.simulate_genome(
+            engine, species, model, samples, args.output,
+            chromosomes=chromosomes, genetic_map=args.genetic_map,
+            seed=args.seed, num_processes=args.processes,
+            provenance=get_provenance_dict(), single_run=args.single_run,
+            **kwargs)
 
         summarise_usage()
-        if ts is not None:
-            write_output(ts, args)
-        # Non-QCed models shouldn't be used in publications, so we skip the
-        # "If you use this simulation in published work..." citation request.
+        if qc_complete or args.bibtex_file is not None:
+            # The genetic maps were downloaded for the simulations, so
+            # building the contigs again is cheap.
+            contigs = [
+                species.get_contig(chrom_id, genetic_map=args.genetic_map)
+                for chrom_id in chromosomes]
         if qc_complete:
-            write_citations(engine, model, contig, species)
+            write_citations(engine, model, contigs, species, kwargs)
         if args.bibtex_file is not None:
-            write_bibtex(engine, model, contig, species, args.bibtex_file)
+            write_bibtex(engine, model, contigs, species, args.bibtex_file, kwargs)
 
     species_parser.set_defaults(runner=run_simulation)
 
 
-def write_simulation_summary(engine, model, contig, samples, seed=None):
+def write_simulation_summary(
+        engine, model, contig, samples, seed=None, chromosomes=None,
+        estimate=None):
     indent = " " * 4
     # Header
     dry_run_text = "Simulation information:\n"
@@ -502,6 +737,11 @@ def write_simulation_summary(engine, model, contig, samples, seed=None):
         sample_time = model.populations[p].sampling_time
         dry_run_text += f"{indent * 2}{pop_name}: "
         dry_run_text += f"{sample_counts[p]} ({sample_time})\n"
+    if chromosomes is not None:
+        dry_run_text += f"Chromosomes: {', '.join(chromosomes)}\n"
+    if contig is None:
+        logger.warning(dry_run_text)
+        return
     # Get information about relevant contig
     gmap = "None" if contig.genetic_map is None else contig.genetic_map.id
     mean_recomb_rate = contig.recombination_map.mean_recombination_rate
@@ -512,6 +752,18 @@ def write_simulation_summary(engine, model, contig, samples, seed=None):
     dry_run_text += f"{indent}Mean recombination rate: {mean_recomb_rate}\n"
     dry_run_text += f"{indent}Mean mutation rate: {mut_rate}\n"
     dry_run_text += f"{indent}Genetic map: {gmap}\n"
+    if estimate is not None:
+        if estimate.num_calibration_runs == 0:
+            calibration = "uncalibrated"
+        else:
+            calibration = f"calibrated from {estimate.num_calibration_runs} runs"
+        wall_time = humanize.naturaldelta(estimate.wall_time)
+        memory = humanize.naturalsize(estimate.memory, binary=True)
+        output_size = humanize.naturalsize(estimate.output_size, binary=True)
+        dry_run_text += f"Estimated cost ({calibration}):\n"
+        dry_run_text += f"{indent}Wall time: {wall_time}\n"
+        dry_run_text += f"{indent}Peak memory: {memory}\n"
+        dry_run_text += f"{indent}Output size: {output_size}\n"
     logger.warning(dry_run_text)
 
 
@@ -560,10 +812,52 @@ def stdpopsim_cli_parser():
             "option are set, the option takes precedence. "
             f"Default: {stdpopsim.get_cache_dir()}"))
 
+    top_parser.add_argument(
+        "--scratch-dir", type=str, default=None,
+        help=(
+            "Write temporary files, such as the output of SLiM, to the "
+            "specified directory. Note that this can also be set using the "
+            "environment variable STDPOPSIM_SCRATCH. By default, /dev/shm "
+            "is used if it has enough free space, or else the system's "
+            "temporary directory."))
+
+    top_parser.add_argument(
+        "--result-cache", action="store_true", default=False,
+        help=(
+            "Store simulation results in the cache directory, and reuse "
+            "stored results when a simulation is run again with the same "
+            "inputs and seed, instead of re-running the simulation."))
+    top_parser.add_argument(
+        "--result-cache-size", metavar="MB", type=float, default=1024,
+        help=(
+            "The maximum size of the result cache in megabytes. When this "
+            "is exceeded, the least recently used results are removed "
+            "[default=%(default)s]."))
+    top_parser.add_argument(
+        "--script-cache", action="store_true", default=False,
+        help=(
+            "Store the scripts generated for engines that run an external "
+            "program, such as SLiM, in the cache directory, and reuse them "
+            "when a simulation is run again with the same inputs."))
+    top_parser.add_argument(
+        "--script-cache-size", metavar="MB", type=float, default=128,
+        help=(
+            "The maximum size of the script cache in megabytes. When this "
+            "is exceeded, the least recently used scripts are removed "
+            "[default=%(default)s]."))
+    top_parser.add_argument(
+        "--checkpoint-cache-size", metavar="MB", type=float, default=8192,
+        help=(
+            "The maximum size of the cache of simulation checkpoints, such "
+            "as those saved with --slim-burn-in-checkpoint, in megabytes. "
+            "When this is exceeded, the least recently used checkpoints are "
+            "removed, and checkpoints larger than this are not saved "
+            "[default=%(default)s]."))
+
     top_parser.add_argument(
         "-e", "--engine",
         default=stdpopsim.get_default_engine().id,
-        choices=[e.id for e in stdpopsim.all_engines()],
+        choices=stdpopsim.all_engine_ids(),
         help="Specify a simulation engine.")
 
     supported_models = stdpopsim.get_engine("msprime").supported_models
@@ -573,7 +867,10 @@ def stdpopsim_cli_parser():
             default=supported_models[0],
             choices=supported_models,
             help="Specify the simulation model used by msprime. "
-                 "See msprime API documentation for details.")
+                 "See msprime API documentation for details. The 'auto' "
+                 "model uses dtwf for the recent generations in which the "
+                 "sample size is large relative to the population size, and "
+                 "hudson thereafter.")
 
     def time_or_model(arg, _arg_is_time=[True, ], parser=top_parser):
         if _arg_is_time[0]:
@@ -582,7 +879,7 @@ def stdpopsim_cli_parser():
             except ValueError:
                 parser.error(f"`{arg}' is not a number")
         else:
-            if arg not in supported_models:
+            if arg not in supported_models or arg == "auto":
                 parser.error(f"`{arg}' is not a supported model")
         _arg_is_time[0] = not _arg_is_time[0]
         return arg
@@ -607,16 +904,62 @@ def stdpopsim_cli_parser():
         slim_parser.add_argument(
                 "--slim-script", action="store_true", default=False,
                 help="Write script to stdout and exit without running SLiM.")
+
+        def scaling_factor(arg):
+            if arg == "auto":
+                return arg
+            try:
+                if "," in arg:
+                    return [float(x) for x in arg.split(",")]
+                return float(arg)
+            except ValueError:
+                raise argparse.ArgumentTypeError(
+                    f"`{arg}' is not a number, a list of numbers or `auto'")
         slim_parser.add_argument(
-                "--slim-scaling-factor", metavar="Q", default=1, type=float,
+                "--slim-scaling-factor", metavar="Q", default=1,
+                type=scaling_factor,
                 help="Rescale model parameters by Q to speed up simulation. "
                      "See SLiM manual: `5.5 Rescaling population sizes to "
-                     "improve simulation performance`. "
-                     "[default=%(default)s].")
+                     "improve simulation performance`. A comma-separated "
+                     "list gives one factor per epoch, oldest first. "
+                     "If `auto', the "
+                     "smallest Q for which the estimated wall time is within "
+                     "--slim-time-budget is used. [default=%(default)s].")
+        slim_parser.add_argument(
+                "--slim-time-budget", metavar="SECONDS", default=None,
+                type=float,
+                help="The wall time budget used to choose the scaling factor "
+                     "with --slim-scaling-factor auto. The estimated wall "
+                     "time is calibrated with --cost-calibration, if given.")
+        slim_parser.add_argument(
+                "--slim-simplification-interval", metavar="GENERATIONS",
+                default=None, type=int,
+                help="The number of SLiM generations between simplifications "
+                     "of the tree sequence. Smaller intervals reduce memory "
+                     "usage at the cost of run time. By default, the interval "
+                     "is chosen from the population sizes of the model and "
+                     "the number of samples.")
         slim_parser.add_argument(
                 "--slim-burn-in", metavar="X", default=10, type=float,
                 help="Length of the burn-in phase, in units of N generations "
                      "[default=%(default)s].")
+        slim_parser.add_argument(
+                "--slim-burn-in-checkpoint", action="store_true", default=False,
+                help="Save the population at the end of the burn-in phase in "
+                     "the cache directory, and reuse it in later simulations "
+                     "of the same model, contig and scaling factor "
+                     "(see --checkpoint-cache-size). "
+                     "Simulations reusing the burn-in are not independent.")
+        slim_parser.add_argument(
+                "--slim-recapitation-first", action="store_true", default=False,
+                help="Skip the burn-in phase, and simulate the ancestry before "
+                     "the oldest epoch of the model by recapitation with "
+                     "msprime. This overrides --slim-burn-in.")
+        slim_parser.add_argument(
+                "--slim-progress", action="store_true", default=False,
+                dest="show_slim_progress",
+                help="Show the progress of the SLiM simulation, with an "
+                     "estimate of the time remaining, on stderr.")
 
     subparsers = top_parser.add_subparsers(dest="subcommand")
     subparsers.required = True
@@ -660,4 +1003,12 @@ def stdpopsim_main(arg_list=None):
     setup_logging(args)
     if args.cache_dir is not None:
         stdpopsim.set_cache_dir(args.cache_dir)
+    if args.scratch_dir is not None:
+        stdpopsim.set_scratch_dir(args.scratch_dir)
+    stdpopsim.set_result_cache(
+        enabled=args.result_cache, max_size=int(args.result_cache_size * 2**20))
+    stdpopsim.set_script_cache(
+        enabled=args.script_cache, max_size=int(args.script_cache_size * 2**20))
+    stdpopsim.set_checkpoint_cache(
+        max_size=int(args.checkpoint_cache_size * 2**20))
     run(args)
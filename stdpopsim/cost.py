@@ -0,0 +1,287 @@
+"""
+Estimation of the resources required by a simulation before it is run.
+"""
+import json
+import logging
+import math
+import os
+
+import attr
+import msprime
+
+import stdpopsim
+
+logger = logging.getLogger(__name__)
+
+# The quantities predicted by the cost estimator.
+_cost_quantities = ("wall_time", "memory", "output_size")
+
+# Approximate number of bytes used by each row of the tskit tables in a
+# stored tree sequence, and the fixed overhead of the file.
+_EDGE_BYTES = 24
+_NODE_BYTES = 28
+_MUTATION_BYTES = 50
+_FILE_OVERHEAD_BYTES = 10000
+
+# Bounds on the fitted scaling exponents, so that a handful of noisy
+# calibration runs can't produce wildly extrapolated estimates.
+_MIN_EXPONENT = 0.5
+_MAX_EXPONENT = 3
+
+
+def epoch_sizes(demographic_model, populations=None):
+    """
+    Returns a list of (start_time, end_time, total_size) tuples for the epochs
+    of the specified model, in units of generations, going backwards in time.
+    The end time of the last epoch is infinite.
+
+    If populations is None, the total size counts all populations that have
+    not yet been merged into another population by a mass migration event,
+    as they would be simulated forwards in time. Otherwise, it counts only
+    the populations that lineages sampled from the specified populations
+    can have reached by migration.
+    """
+    dd = msprime.DemographyDebugger(
+        population_configurations=demographic_model.population_configurations,
+        migration_matrix=demographic_model.migration_matrix,
+        demographic_events=demographic_model.demographic_events)
+    track_lineages = populations is not None
+    if populations is None:
+        populations = range(dd.num_populations)
+    active = set(populations)
+    sizes = []
+    for epoch in dd.epochs:
+        for de in epoch.demographic_events:
+            if isinstance(de, msprime.MassMigration) and de.source in active:
+                active.add(de.dest)
+                if de.proportion >= 1:
+                    active.discard(de.source)
+        if track_lineages:
+            reached = set()
+            while reached != active:
+                reached = set(active)
+                for j in reached:
+                    for k, rate in enumerate(epoch.migration_matrix[j]):
+                        if rate > 0:
+                            active.add(k)
+        total = 0
+        for j, pop in enumerate(epoch.populations):
+            if j not in active:
+                continue
+            if math.isinf(epoch.end_time):
+                total += pop.start_size
+            else:
+                total += math.sqrt(pop.start_size * pop.end_size)
+        sizes.append((epoch.start_time, epoch.end_time, total))
+    return sizes
+
+
+def effective_population_size(demographic_model, populations=None):
+    """
+    Returns a rough estimate of the effective (diploid) population size of the
+    specified model over the timescale of the coalescent process. This is the
+    harmonic mean of the total size of the populations containing lineages,
+    weighted by the duration of each epoch, up to ``4 N`` generations into
+    the final epoch.
+
+    :param demographic_model: The demographic model.
+    :type demographic_model: :class:`.DemographicModel`
+    :param populations: The IDs of the populations that lineages are sampled
+        from. If None, all of the model's sampling populations are used.
+    :type populations: list of int
+    :rtype: float
+    """
+    if populations is None:
+        populations = range(demographic_model.num_sampling_populations)
+    sizes = epoch_sizes(demographic_model, populations)
+    total_time = 0
+    inverse_size_time = 0
+    for start_time, end_time, size in sizes:
+        if size <= 0:
+            continue
+        if math.isinf(end_time):
+            end_time = start_time + 4 * size
+        duration = end_time - start_time
+        total_time += duration
+        inverse_size_time += duration / size
+    if inverse_size_time == 0:
+        return 0
+    return total_time / inverse_size_time
+
+
+def coalescent_cost_features(demographic_model, contig, samples):
+    """
+    Returns the features used to estimate the cost of a coalescent
+    simulation. See :meth:`.Engine.get_cost_features`.
+
+    The expected number of trees and mutations are the standard neutral
+    expectations ``1 + rho * a_n`` and ``theta * a_n``, where ``rho`` and
+    ``theta`` are the population-scaled recombination and mutation rates
+    and ``a_n`` is the harmonic number of the sample size minus one.
+    """
+    n = len(samples)
+    N = effective_population_size(
+        demographic_model, sorted({sample.population for sample in samples}))
+    length = contig.recombination_map.get_length()
+    rho = 4 * N * contig.recombination_map.mean_recombination_rate * length
+    theta = 4 * N * contig.mutation_rate * length
+    harmonic = sum(1 / k for k in range(1, n))
+    num_breakpoints = rho * harmonic
+    num_mutations = theta * harmonic
+    num_edges = 2 * n + 3 * num_breakpoints
+    num_nodes = 2 * n + num_breakpoints
+    output_size = (
+        _EDGE_BYTES * num_edges + _NODE_BYTES * num_nodes +
+        _MUTATION_BYTES * num_mutations + _FILE_OVERHEAD_BYTES)
+    return {
+        "wall_time": n + num_breakpoints,
+        "memory": output_size,
+        "output_size": output_size,
+    }
+
+
+@attr.s
+class CostEstimate(object):
+    """
+    The estimated resources required by a simulation.
+    See :class:`.CostEstimator`.
+
+    :ivar wall_time: The estimated wall clock time, in seconds.
+    :vartype wall_time: float
+    :ivar memory: The estimated peak resident set size, in bytes. This is the
+        current peak resident set size of the process making the estimate,
+        plus the estimated increase due to the simulation.
+    :vartype memory: float
+    :ivar output_size: The estimated size of the output tree sequence file,
+        in bytes.
+    :vartype output_size: float
+    :ivar num_calibration_runs: The number of recorded runs used to calibrate
+        the estimate. If zero, the engine's default scaling is used.
+    :vartype num_calibration_runs: int
+    """
+    wall_time = attr.ib(type=float)
+    memory = attr.ib(type=float)
+    output_size = attr.ib(type=float)
+    num_calibration_runs = attr.ib(type=int, default=0)
+
+
+def _fit_power_law(points, default):
+    """
+    Fits ``y = a * x ** b`` to the specified list of (x, y) points by least
+    squares on the log scale, and returns the tuple (a, b). If the points
+    don't determine the exponent, the default exponent is used. If there
+    are no usable points, returns the default.
+    """
+    logs = [
+        (math.log(x), math.log(y)) for x, y in points if x > 0 and y > 0]
+    if len(logs) == 0:
+        return default
+    mean_x = sum(lx for lx, _ in logs) / len(logs)
+    mean_y = sum(ly for _, ly in logs) / len(logs)
+    sxx = sum((lx - mean_x) ** 2 for lx, _ in logs)
+    b = default[1]
+    if sxx > 1e-9:
+        sxy = sum((lx - mean_x) * (ly - mean_y) for lx, ly in logs)
+        b = min(max(sxy / sxx, _MIN_EXPONENT), _MAX_EXPONENT)
+    a = math.exp(mean_y - b * mean_x)
+    return a, b
+
+
+class CostEstimator(object):
+    """
+    Predicts the wall time, peak memory and output size of a simulation
+    before it is run.
+
+    Each engine describes a simulation by a set of features that the
+    costs are expected to scale with (see :meth:`.Engine.get_cost_features`),
+    and each cost is modelled as a power law ``a * x ** b`` of its feature.
+    The coefficients default to the engine's ``cost_model`` and are refitted
+    from the runs recorded with :meth:`.add_run` for the same engine.
+
+    .. code-block:: python
+
+        estimator = stdpopsim.CostEstimator.load("calibration.json")
+        estimate = estimator.estimate(engine, model, contig, samples)
+        with stdpopsim.record_metrics() as metrics:
+            ts = engine.simulate(model, contig, samples)
+        estimator.add_run(engine, model, contig, samples, metrics)
+        estimator.save("calibration.json")
+
+    :param runs: A list of recorded runs, as stored by :meth:`.save`.
+    :type runs: list
+    """
+    def __init__(self, runs=None):
+        self.runs = [] if runs is None else list(runs)
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Returns a CostEstimator calibrated by the runs recorded in the
+        specified JSON file. If the file does not exist, the estimator has
+        no recorded runs.
+        """
+        if not os.path.exists(filename):
+            return cls()
+        with open(filename) as f:
+            data = json.load(f)
+        return cls(runs=data["runs"])
+
+    def save(self, filename):
+        """
+        Writes the recorded runs to the specified JSON file.
+        """
+        with open(filename, "w") as f:
+            json.dump({"runs": self.runs}, f, indent=4)
+
+    def add_run(
+            self, engine, demographic_model, contig, samples, metrics,
+            output_size=None, **kwargs):
+        """
+        Records the resources used by a completed simulation, to calibrate
+        later estimates. The additional keyword arguments are the engine
+        specific parameters passed to :meth:`.Engine.simulate`.
+
+        :param metrics: The metrics recorded for the simulation.
+        :type metrics: :class:`.SimulationMetrics`
+        :param output_size: The size of the output file in bytes, if known.
+        :type output_size: int
+        """
+        memory_deltas = [
+            phase.max_rss_delta for phase in metrics.phases
+            if phase.max_rss_delta is not None]
+        memory = sum(memory_deltas) if len(memory_deltas) > 0 else None
+        # Child processes, e.g. SLiM, run alongside this process.
+        if memory is not None and metrics.child_max_rss is not None:
+            memory += metrics.child_max_rss
+        self.runs.append({
+            "engine": engine.id,
+            "features": engine.get_cost_features(
+                demographic_model, contig, samples, **kwargs),
+            "wall_time": metrics.wall_time,
+            "memory": memory,
+            "output_size": output_size,
+        })
+
+    def estimate(self, engine, demographic_model, contig, samples, **kwargs):
+        """
+        Returns the estimated cost of simulating the specified model with the
+        specified engine. The additional keyword arguments are the engine
+        specific parameters that will be passed to :meth:`.Engine.simulate`.
+
+        :rtype: :class:`.CostEstimate`
+        """
+        features = engine.get_cost_features(
+            demographic_model, contig, samples, **kwargs)
+        runs = [run for run in self.runs if run["engine"] == engine.id]
+        estimate = {}
+        for quantity in _cost_quantities:
+            points = [
+                (run["features"][quantity], run[quantity]) for run in runs
+                if run[quantity] is not None]
+            a, b = _fit_power_law(points, engine.cost_model[quantity])
+            estimate[quantity] = a * features[quantity] ** b
+        max_rss = stdpopsim.metrics._max_rss()
+        if max_rss is not None:
+            estimate["memory"] += max_rss
+        logger.debug(f"Estimated cost from {len(runs)} runs: {estimate}")
+        return CostEstimate(num_calibration_runs=len(runs), **estimate)
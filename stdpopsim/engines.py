@@ -1,39 +1,239 @@
+import concurrent.futures
+import collections
+import functools
+import importlib
+import inspect
+import json
 import logging
+import math
+import os
+import pathlib
+import random
+import sys
+import threading
 
 import attr
 import msprime
+import numpy as np
 import stdpopsim
 
 logger = logging.getLogger(__name__)
 
 _registered_engines = {}
+# Reentrant, so that an engine's module can register engines when imported.
+_registered_engines_lock = threading.RLock()
+_plugins_discovered = False
+
+# Third-party packages can provide simulation engines by declaring an entry
+# point in this group. The entry point name is the engine ID, and its value
+# refers to an Engine subclass or instance, e.g.
+# ``myengine = mypackage.engine:MyEngine``.
+ENGINE_ENTRY_POINT_GROUP = "stdpopsim.engines"
+
+
+@attr.s(frozen=True)
+class EngineDescriptor(object):
+    """
+    A lightweight reference to a simulation engine, whose implementation is
+    only imported the first time the engine is requested with
+    :func:`.get_engine`. This avoids importing the dependencies of engines
+    that are not used.
+
+    :ivar ~.id: The unique identifier of the simulation engine.
+    :vartype ~.id: str
+    :ivar module: The fully qualified name of the module implementing the
+        engine.
+    :vartype module: str
+    :ivar attribute: The name of the :class:`.Engine` subclass, or engine
+        instance, within the module. A subclass is instantiated without
+        arguments.
+    :vartype attribute: str
+    """
+    id = attr.ib(type=str)
+    module = attr.ib(type=str)
+    attribute = attr.ib(type=str)
+
+    def load(self):
+        """
+        Imports and returns the simulation engine.
+
+        :rtype: :class:`.Engine`
+        """
+        logger.debug(f"Loading simulation engine '{self.id}' from {self.module}")
+        module = importlib.import_module(self.module)
+        engine = module
+        for name in self.attribute.split("."):
+            engine = getattr(engine, name)
+        if isinstance(engine, type):
+            engine = engine()
+        if not isinstance(engine, Engine):
+            raise ValueError(
+                f"{self.module}:{self.attribute} is not a simulation engine")
+        if engine.id != self.id:
+            raise ValueError(
+                f"Simulation engine '{engine.id}' was registered as '{self.id}'")
+        return engine
 
 
 def register_engine(engine):
     """
-    Registers the specified simulation engine.
+    Registers the specified simulation engine. This may be either an
+    :class:`.Engine` instance, or an :class:`.EngineDescriptor` to import
+    the engine when it is first used.
     """
-    if engine.id in _registered_engines:
-        raise ValueError(f"Simulation engine '{engine.id}' already registered.")
-    logger.debug(f"Registering simulation engine '{engine.id}'")
-    _registered_engines[engine.id] = engine
+    with _registered_engines_lock:
+        if engine.id in _registered_engines:
+            raise ValueError(f"Simulation engine '{engine.id}' already registered.")
+        logger.debug(f"Registering simulation engine '{engine.id}'")
+        _registered_engines[engine.id] = engine
+
+
+def _entry_points(group):
+    """
+    Returns a list of (name, module, attribute) tuples for the installed
+    package entry points in the specified group.
+    """
+    try:
+        import importlib.metadata as importlib_metadata
+    except ImportError:
+        # Python < 3.8. pkg_resources is slow to import, but we only get
+        # here when looking for engines that aren't already registered.
+        try:
+            import pkg_resources
+        except ImportError:
+            return []
+        return [
+            (ep.name, ep.module_name, ".".join(ep.attrs))
+            for ep in pkg_resources.iter_entry_points(group)]
+    entry_points = importlib_metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        entry_points = entry_points.select(group=group)
+    else:
+        entry_points = entry_points.get(group, [])
+    ret = []
+    for ep in entry_points:
+        module, _, attribute = ep.value.partition(":")
+        ret.append((ep.name, module.strip(), attribute.split("[")[0].strip()))
+    return ret
+
+
+def _discover_engine_plugins():
+    """
+    Registers descriptors for the simulation engines provided by installed
+    packages through the ``stdpopsim.engines`` entry point group. This is
+    only done once, the first time that an unregistered engine is requested
+    or the registered engines are listed.
+    """
+    global _plugins_discovered
+    with _registered_engines_lock:
+        if _plugins_discovered:
+            return
+        _plugins_discovered = True
+        for name, module, attribute in _entry_points(ENGINE_ENTRY_POINT_GROUP):
+            if name in _registered_engines:
+                logger.warning(
+                    f"Ignoring plugin engine '{name}' from {module}, as an "
+                    "engine with this ID is already registered.")
+                continue
+            register_engine(
+                EngineDescriptor(id=name, module=module, attribute=attribute))
 
 
 def get_engine(id):
     """
-    Returns the simulation engine with the specified id.
+    Returns the simulation engine with the specified id. If the engine
+    was registered with an :class:`.EngineDescriptor`, it is imported now.
     """
     if id not in _registered_engines:
-        raise ValueError(f"Simulation engine '{id}' not registered")
-    return _registered_engines[id]
+        _discover_engine_plugins()
+    with _registered_engines_lock:
+        if id not in _registered_engines:
+            raise ValueError(f"Simulation engine '{id}' not registered")
+        engine = _registered_engines[id]
+        if isinstance(engine, EngineDescriptor):
+            engine = engine.load()
+            _registered_engines[id] = engine
+    return engine
+
+
+def all_engine_ids():
+    """
+    Returns the list of IDs of all registered simulation engines, without
+    importing any engines that have not yet been used.
+    """
+    _discover_engine_plugins()
+    return list(_registered_engines.keys())
 
 
 def all_engines():
     """
-    Returns an iterator over all registered simulation engines.
+    Returns an iterator over all registered simulation engines. This imports
+    every engine that has not yet been used.
+    """
+    for id in all_engine_ids():
+        yield get_engine(id)
+
+
+def _cached_simulate(simulate):
+    """
+    Decorator for the :meth:`.Engine.simulate` method of an engine, which
+    looks up and stores simulation results in the result cache (see
+    :func:`.set_result_cache`). Simulations without a seed, dry runs, and
+    simulations that don't return a tree sequence are never cached.
+    Parameters listed in the engine's ``cache_ignored_params`` are left out
+    of the cache key.
     """
-    for sim_engine in _registered_engines.values():
-        yield sim_engine
+    signature = inspect.signature(simulate)
+
+    @functools.wraps(simulate)
+    def wrapper(self, *args, **kwargs):
+        cache = stdpopsim.get_result_cache()
+        if cache is None:
+            return simulate(self, *args, **kwargs)
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        params = dict(bound.arguments)
+        del params["self"]
+        if params["seed"] is None or params.get("dry_run", False):
+            return simulate(self, *args, **kwargs)
+        # Finding the version may be slow (e.g. running an external program),
+        # so this is done once for the lookup and the store.
+        version = self._result_cache_version(params)
+        # Callbacks, e.g. for progress reporting, don't affect the result.
+        params = {
+            k: v for k, v in params.items()
+            if not callable(v) and k not in self.cache_ignored_params and
+            k != "dry_run"}
+        key = cache.key(
+            self, params.pop("demographic_model"), params.pop("contig"),
+            params.pop("samples"), params.pop("seed"), params, version=version)
+        ts = cache.get(self, key, version=version)
+        if ts is not None:
+            return self._from_result_cache(ts)
+        ts = simulate(self, *args, **kwargs)
+        if ts is not None:
+            cache.put(self, key, ts, version=version)
+        return ts
+
+    return wrapper
+
+
+@attr.s
+class SimulationResult(object):
+    """
+    The result of a simulation run with :meth:`.Engine.run_simulation`.
+
+    :ivar ts: The simulated tree sequence, or None if no simulation was run.
+    :vartype ts: :class:`tskit.trees.TreeSequence`
+    :ivar metrics: The resources used by each phase of the simulation.
+    :vartype metrics: :class:`.SimulationMetrics`
+    :ivar citations: The citations for the simulation engine, and for any
+        engine features used by this simulation.
+    :vartype citations: list of :class:`.Citation`
+    """
+    ts = attr.ib(default=None)
+    metrics = attr.ib(factory=stdpopsim.SimulationMetrics)
+    citations = attr.ib(factory=list)
 
 
 @attr.s
@@ -53,7 +253,23 @@ class Engine(object):
     :vartype ~.description: str
     :ivar citations: A list of citations for the simulation engine.
     :vartype citations: list of :class:`.Citation`
+    :ivar cost_model: A dictionary mapping each of "wall_time", "memory"
+        and "output_size" to the default ``(a, b)`` coefficients of the power
+        law ``a * x ** b`` used by the :class:`.CostEstimator`, where ``x``
+        is the corresponding feature from :meth:`.get_cost_features`.
+    :vartype cost_model: dict
+    :ivar cache_ignored_params: The names of the parameters to
+        :meth:`.simulate` that don't affect the simulated tree sequence,
+        which are left out of the result cache key (see
+        :func:`.set_result_cache`).
+    :vartype cache_ignored_params: tuple of str
     """
+    cost_model = {
+        "wall_time": (2e-6, 1.3),
+        "memory": (4, 1),
+        "output_size": (1, 1),
+    }
+    cache_ignored_params = ()
 
     def simulate(
             self, demographic_model=None, contig=None, samples=None, seed=None,
@@ -78,6 +294,140 @@ class Engine(object):
         """
         raise NotImplementedError()
 
+    def run_simulation(self, **kwargs):
+        """
+        Runs :meth:`.simulate` with the specified parameters, recording the
+        resources used by each phase of the simulation. Engines don't keep any
+        state between simulations, so this may be called concurrently from
+        multiple threads using the same engine instance.
+
+        :return: The simulated tree sequence, the simulation metrics and the
+            citations for the simulation.
+        :rtype: :class:`.SimulationResult`
+        """
+        citations = self.get_citations(**kwargs)
+        with stdpopsim.record_metrics() as metrics:
+            ts = self.simulate(**kwargs)
+        return SimulationResult(ts=ts, metrics=metrics, citations=citations)
+
+    def simulate_ancestry(
+            self, demographic_model=None, contig=None, samples=None, seed=None,
+            dry_run=False, **kwargs):
+        """
+        Simulates the ancestry of the specified samples, without adding any
+        mutations. Mutations can then be added to the returned tree sequence
+        with :meth:`.add_mutations`, as many times as needed with different
+        mutation rates or seeds, without repeating the (typically much more
+        expensive) ancestry simulation.
+
+        By default, this calls :meth:`.simulate` with the mutation rate of
+        the contig set to zero.
+
+        :param kwargs: Further engine-specific parameters, which are passed
+            through to :meth:`.simulate`.
+        :return: A succinct tree sequence with no neutral mutations.
+        :rtype: :class:`tskit.trees.TreeSequence` or None
+
+        See :meth:`.simulate` for definitions of the other parameters.
+        """
+        contig = stdpopsim.Contig(
+            recombination_map=contig.recombination_map, mutation_rate=0,
+            genetic_map=contig.genetic_map)
+        return self.simulate(
+            demographic_model=demographic_model, contig=contig,
+            samples=samples, seed=seed, dry_run=dry_run, **kwargs)
+
+    def add_mutations(self, ts, mutation_rate, seed=None):
+        """
+        Returns a copy of the specified tree sequence with neutral mutations
+        added at the specified rate, keeping any existing mutations.
+        This is intended to be used on the output of :meth:`.simulate_ancestry`.
+
+        :param ts: The tree sequence to which mutations are added.
+        :type ts: :class:`tskit.trees.TreeSequence`
+        :param mutation_rate: The rate of mutation per base per generation.
+        :type mutation_rate: float
+        :param seed: The seed for the random number generator.
+        :type seed: int
+        :return: A succinct tree sequence.
+        :rtype: :class:`tskit.trees.TreeSequence`
+        """
+        with stdpopsim.record_phase("mutation"):
+            return msprime.mutate(
+                ts, rate=mutation_rate, keep=True, random_seed=seed)
+
+    def simulate_replicates(
+            self, demographic_model=None, contig=None, samples=None, seed=None,
+            num_replicates=1, dry_run=False, **kwargs):
+        """
+        Returns an iterator over independent replicate simulations of the
+        model for the specified contig and samples. Replicates are generated
+        lazily, so that only one tree sequence needs to be held in memory at
+        a time. The replicates are a deterministic function of ``seed``.
+        The parameters are checked when this method is called, rather than
+        when iteration starts.
+
+        By default, this calls :meth:`.simulate` for each replicate, with a
+        seed derived from ``seed``. Engines that can reuse the simulation
+        setup across replicates should override this method.
+
+        :param num_replicates: The number of replicates to simulate.
+        :type num_replicates: int
+        :param dry_run: If True, the simulation setup is run once, when this
+            method is called, and an empty iterator is returned.
+        :type dry_run: bool
+        :param kwargs: Further engine-specific parameters, which are passed
+            through to :meth:`.simulate`.
+        :return: An iterator over succinct tree sequences.
+        :rtype: iterator of :class:`tskit.trees.TreeSequence`
+
+        See :meth:`.simulate` for definitions of the other parameters.
+        """
+        if num_replicates < 1:
+            raise ValueError("num_replicates must be at least 1")
+        if dry_run:
+            self.simulate(
+                demographic_model=demographic_model, contig=contig,
+                samples=samples, seed=seed, dry_run=True, **kwargs)
+            return iter([])
+
+        def replicates():
+            rng = random.Random(seed)
+            for _ in range(num_replicates):
+                yield self.simulate(
+                    demographic_model=demographic_model, contig=contig,
+                    samples=samples, seed=rng.randrange(1, 2**32), **kwargs)
+
+        return replicates()
+
+    def simulate_chromosomes(
+            self, demographic_model=None, contigs=None, samples=None, seed=None,
+            dry_run=False):
+        """
+        Simulates the model for several unlinked contigs in a single run.
+        The contigs are joined into one genome, with free recombination
+        between adjacent contigs, and the result is split back into one tree
+        sequence per contig. All of the returned tree sequences share the
+        same sample nodes, and are in the coordinates of the individual
+        contigs.
+
+        :param demographic_model: The demographic model to simulate.
+        :type demographic_model: :class:`.DemographicModel`
+        :param contigs: The contigs to simulate, each defining the length,
+            recombination rate(s) and mutation rate of one chromosome.
+        :type contigs: list of :class:`.Contig`
+        :param samples: The samples to be obtained from the simulation.
+        :type samples: list of :class:`msprime.simulations.Sample`
+        :param seed: The seed for the random number generator.
+        :type seed: int
+        :param dry_run: If True, the simulation engine will return None without
+            running the simulation.
+        :type dry_run: bool
+        :return: A list of succinct tree sequences, one for each contig.
+        :rtype: list of :class:`tskit.trees.TreeSequence` or None
+        """
+        raise NotImplementedError()
+
     def get_version(self):
         """
         Returns the version of the engine.
@@ -86,6 +436,121 @@ class Engine(object):
         """
         raise NotImplementedError()
 
+    def _result_cache_version(self, params):
+        """
+        Returns the engine version under which the result of a simulation
+        with the specified parameters to :meth:`.simulate` is cached.
+        """
+        return self.get_version()
+
+    def _from_result_cache(self, ts):
+        """
+        Returns the tree sequence loaded from the result cache as the type
+        that :meth:`.simulate` returns.
+        """
+        return ts
+
+    def get_citations(self, **kwargs):
+        """
+        Returns the list of citations for a simulation run with the specified
+        parameters to :meth:`.simulate`. The default implementation returns
+        the engine's ``citations``; engines should override this to add
+        citations for optional features, rather than modifying ``citations``.
+
+        :rtype: list of :class:`.Citation`
+        """
+        return list(self.citations)
+
+    def get_cost_features(
+            self, demographic_model, contig, samples, **kwargs):
+        """
+        Returns a dictionary mapping each of "wall_time", "memory" and
+        "output_size" to a positive feature of the simulation that the
+        corresponding cost is expected to scale with, as used by the
+        :class:`.CostEstimator`. The additional keyword arguments are the
+        engine specific parameters to :meth:`.simulate`.
+
+        The default implementation uses the expected size of the ancestral
+        recombination graph under the coalescent, which is appropriate for
+        coalescent simulators.
+
+        :rtype: dict
+        """
+        return stdpopsim.coalescent_cost_features(
+            demographic_model, contig, samples)
+
+
+# The maximum expected number of coalescences per generation in any
+# population for which the Hudson coalescent is an adequate approximation
+# of the discrete-time Wright-Fisher model.
+_AUTO_MAX_COALESCENCES = 0.1
+# The maximum number of generations simulated with the DTWF model by the
+# auto model.
+_AUTO_MAX_DTWF_GENERATIONS = 10000
+
+
+def dtwf_switch_time(
+        demographic_model, samples, max_coalescences=_AUTO_MAX_COALESCENCES):
+    """
+    Returns the number of generations for which the discrete-time
+    Wright-Fisher model should be used, before switching to the Hudson
+    coalescent, when simulating the specified samples.
+
+    The Hudson coalescent assumes that there is at most one coalescence per
+    generation, which is violated when the number of lineages in a population
+    is large relative to its size. Going back in time, the expected number of
+    lineages in each population is projected by counting the expected number
+    of distinct parents in a Wright-Fisher population of the size given by
+    :meth:`.DemographicModel.get_demography_debugger`. Lineages are moved
+    by mass migrations, but not by continuous migration. The switch time is
+    the first generation at which the expected number of coalescences in
+    every population is at most ``max_coalescences``, and after which no
+    more samples are added.
+
+    :param demographic_model: The demographic model to simulate.
+    :type demographic_model: :class:`.DemographicModel`
+    :param samples: The samples to be simulated.
+    :type samples: list of :class:`msprime.simulations.Sample`
+    :param max_coalescences: The maximum expected number of coalescences
+        per generation in a population simulated with the Hudson model.
+    :type max_coalescences: float
+    :rtype: int
+    """
+    dd = demographic_model.get_demography_debugger()
+    lineages = [0] * dd.num_populations
+    pending = collections.Counter(
+        (math.floor(sample.time), sample.population) for sample in samples)
+    epoch_index = -1
+    for t in range(_AUTO_MAX_DTWF_GENERATIONS):
+        while epoch_index < len(dd.epochs) - 1 and (
+                dd.epochs[epoch_index + 1].start_time <= t):
+            epoch_index += 1
+            for de in dd.epochs[epoch_index].demographic_events:
+                if isinstance(de, msprime.MassMigration):
+                    moved = lineages[de.source] * de.proportion
+                    lineages[de.source] -= moved
+                    lineages[de.dest] += moved
+        epoch = dd.epochs[epoch_index]
+        for (time, population), count in list(pending.items()):
+            if time <= t:
+                lineages[population] += count
+                del pending[(time, population)]
+        coalescing = False
+        for j, pop in enumerate(epoch.populations):
+            size = pop.start_size * math.exp(
+                -pop.growth_rate * (t - epoch.start_time))
+            if lineages[j] == 0 or size <= 0:
+                continue
+            # The expected number of distinct parental genomes of the lineages.
+            num_genomes = max(2 * size, 1)
+            parents = num_genomes * (1 - (1 - 1 / num_genomes) ** lineages[j])
+            if lineages[j] - parents > max_coalescences:
+                coalescing = True
+            lineages[j] = parents
+        if not coalescing and len(pending) == 0:
+            return t
+    return _AUTO_MAX_DTWF_GENERATIONS
+
 
 class _MsprimeEngine(Engine):
     id = "msprime"  #:
@@ -98,7 +563,7 @@ class _MsprimeEngine(Engine):
                 reasons={stdpopsim.CiteReason.ENGINE}),
             ]
     # We default to the first model in the list.
-    supported_models = ["hudson", "dtwf", "smc", "smc_prime"]
+    supported_models = ["hudson", "dtwf", "smc", "smc_prime", "auto"]
     model_citations = {"dtwf": [
              stdpopsim.Citation(
                  doi="https://doi.org/10.1371/journal.pgen.1008619",
@@ -107,6 +572,7 @@ class _MsprimeEngine(Engine):
                  reasons={stdpopsim.CiteReason.ENGINE}),
              ]}
 
+    @_cached_simulate
     def simulate(
             self, demographic_model=None, contig=None, samples=None, seed=None,
             msprime_model=None, msprime_change_model=None, dry_run=False):
@@ -116,54 +582,283 @@ class _MsprimeEngine(Engine):
         for all engines.
 
         :param msprime_model: The msprime simulation model to be used.
-            One of ``hudson``, ``dtwf``, ``smc``, or ``smc_prime``.
-            See msprime API documentation for details.
+            One of ``hudson``, ``dtwf``, ``smc``, ``smc_prime`` or ``auto``.
+            See msprime API documentation for details. The ``auto`` model
+            uses ``dtwf`` for the recent generations in which the sample is
+            large relative to the population size, and ``hudson`` for
+            the remainder of the simulation (see :func:`.dtwf_switch_time`).
         :type msprime_model: str
         :param msprime_change_model: A list of (time, model) tuples, which
             changes the simulation model to the new model at the time specified.
+            This cannot be used with the ``auto`` model.
         :type msprime_change_model: list of (float, str) tuples
         :param dry_run: If True, ``end_time=0`` is passed to :meth:`msprime.simulate()`
             to initialise the simulation and then immediately return.
         :type dry_run: bool
         """
+        with stdpopsim.record_phase("model_preparation"):
+            msprime_model, demographic_events = self._get_model_and_events(
+                demographic_model, samples, msprime_model, msprime_change_model)
+
+        # msprime adds mutations as part of the same call, so the mutation
+        # phase is included in the ancestry phase.
+        with stdpopsim.record_phase("ancestry"):
+            ts = msprime.simulate(
+                samples=samples,
+                recombination_map=contig.recombination_map,
+                mutation_rate=contig.mutation_rate,
+                population_configurations=demographic_model.population_configurations,
+                migration_matrix=demographic_model.migration_matrix,
+                demographic_events=demographic_events,
+                random_seed=seed,
+                model=msprime_model,
+                end_time=0 if dry_run else None)
+        if dry_run:
+            ts = None
+        return ts
+
+    def simulate_replicates(
+            self, demographic_model=None, contig=None, samples=None, seed=None,
+            num_replicates=1, msprime_model=None, msprime_change_model=None,
+            dry_run=False):
+        """
+        Returns an iterator over replicate simulations of the demographic
+        model using msprime. See :meth:`.Engine.simulate_replicates()` and
+        :meth:`.simulate()` for definitions of the parameters.
+
+        This uses the ``num_replicates`` argument to :meth:`msprime.simulate()`,
+        so that the recombination map, population configurations and
+        demographic events are set up once and reused for every replicate.
+        """
+        if num_replicates < 1:
+            raise ValueError("num_replicates must be at least 1")
+        msprime_model, demographic_events = self._get_model_and_events(
+            demographic_model, samples, msprime_model, msprime_change_model)
+        if dry_run:
+            msprime.simulate(
+                samples=samples,
+                recombination_map=contig.recombination_map,
+                population_configurations=demographic_model.population_configurations,
+                migration_matrix=demographic_model.migration_matrix,
+                demographic_events=demographic_events,
+                random_seed=seed,
+                model=msprime_model,
+                end_time=0)
+            return iter([])
+        return msprime.simulate(
+            samples=samples,
+            recombination_map=contig.recombination_map,
+            mutation_rate=contig.mutation_rate,
+            population_configurations=demographic_model.population_configurations,
+            migration_matrix=demographic_model.migration_matrix,
+            demographic_events=demographic_events,
+            random_seed=seed,
+            model=msprime_model,
+            num_replicates=num_replicates)
+
+    def simulate_chromosomes(
+            self, demographic_model=None, contigs=None, samples=None, seed=None,
+            msprime_model=None, msprime_change_model=None, dry_run=False):
+        """
+        Simulate the demographic model for several unlinked contigs in a
+        single msprime run. See :meth:`.Engine.simulate_chromosomes()` for
+        definitions of parameters defined for all engines, and
+        :meth:`.simulate()` for the msprime specific parameters.
+
+        The recombination maps of the contigs are joined into a single
+        :class:`msprime.RecombinationMap` with a discrete genome, so that
+        breakpoints only occur at whole bases, with a unit-length interval
+        between adjacent contigs whose recombination rate gives a
+        probability of 1/2 that a recombination occurs between them.
+        This is exact under the ``dtwf`` model; with the ``hudson`` model
+        the unlinked boundaries are a continuous-time approximation,
+        so consider using ``dtwf`` for the recent past
+        (see the msprime documentation on simulating multiple chromosomes).
+        Mutations are added to each contig separately, using the contig's
+        own mutation rate.
+        """
+        with stdpopsim.record_phase("model_preparation"):
+            msprime_model, demographic_events = self._get_model_and_events(
+                demographic_model, samples, msprime_model, msprime_change_model)
+            recombination_map, starts = _join_recombination_maps(
+                contigs, _UNLINKED_RECOMBINATION_RATE)
+
+        rng = random.Random(seed)
+        ancestry_seed = rng.randrange(1, 2**32)
+        mutation_seeds = [rng.randrange(1, 2**32) for _ in contigs]
+
+        with stdpopsim.record_phase("ancestry"):
+            ts = msprime.simulate(
+                samples=samples,
+                recombination_map=recombination_map,
+                population_configurations=demographic_model.population_configurations,
+                migration_matrix=demographic_model.migration_matrix,
+                demographic_events=demographic_events,
+                random_seed=ancestry_seed,
+                model=msprime_model,
+                end_time=0 if dry_run else None)
+        if dry_run:
+            return None
+
+        with stdpopsim.record_phase("simplification"):
+            lengths = [contig.recombination_map.get_length() for contig in contigs]
+            ts_list = _split_tree_sequence(ts, starts, lengths)
+        with stdpopsim.record_phase("mutation"):
+            return [
+                msprime.mutate(
+                    chrom_ts, rate=contig.mutation_rate, keep=True,
+                    random_seed=mutation_seed)
+                for chrom_ts, contig, mutation_seed in zip(
+                    ts_list, contigs, mutation_seeds)]
+
+    def _get_model_and_events(
+            self, demographic_model, samples, msprime_model, msprime_change_model):
+        """
+        Returns the validated msprime model, and the demographic events
+        of the specified demographic model with any model changes added.
+        """
         if msprime_model is None:
             msprime_model = self.supported_models[0]
         else:
             if msprime_model not in self.supported_models:
                 raise ValueError(f"Unrecognised model '{msprime_model}'")
-            if msprime_model in self.model_citations:
-                self.citations.extend(self.model_citations[msprime_model])
 
         demographic_events = demographic_model.demographic_events.copy()
+        if msprime_model == "auto":
+            if msprime_change_model:
+                raise ValueError(
+                    "Cannot specify model changes with the 'auto' model")
+            switch_time = dtwf_switch_time(demographic_model, samples)
+            if switch_time == 0:
+                logger.info("Model 'auto': using hudson for all generations")
+                msprime_model = "hudson"
+            else:
+                logger.info(
+                    f"Model 'auto': using dtwf until generation {switch_time}, "
+                    "then hudson")
+                msprime_model = "dtwf"
+                msprime_change_model = [(switch_time, "hudson")]
         if msprime_change_model is not None:
             for t, model in msprime_change_model:
-                if model not in self.supported_models:
+                if model not in self.supported_models or model == "auto":
                     raise ValueError(f"Unrecognised model '{model}'")
                 model_change = msprime.SimulationModelChange(t, model)
                 demographic_events.append(model_change)
-                if model in self.model_citations:
-                    self.citations.extend(self.model_citations[model])
             demographic_events.sort(key=lambda x: x.time)
+        return msprime_model, demographic_events
 
-        ts = msprime.simulate(
-                samples=samples,
-                recombination_map=contig.recombination_map,
-                mutation_rate=contig.mutation_rate,
-                population_configurations=demographic_model.population_configurations,
-                migration_matrix=demographic_model.migration_matrix,
-                demographic_events=demographic_events,
-                random_seed=seed,
-                model=msprime_model,
-                end_time=0 if dry_run else None)
-        if dry_run:
-            ts = None
-        return ts
+    def get_citations(
+            self, demographic_model=None, samples=None, msprime_model=None,
+            msprime_change_model=None, **kwargs):
+        """
+        Returns the citations for a simulation with the specified parameters,
+        including those for any non-default simulation models used.
+        See :meth:`.Engine.get_citations`. If the ``auto`` model is used
+        without specifying the demographic model and samples, the ``dtwf``
+        model is assumed to be used.
+        """
+        models = [] if msprime_model is None else [msprime_model]
+        if msprime_model == "auto":
+            models = ["dtwf"]
+            if demographic_model is not None and samples is not None:
+                if dtwf_switch_time(demographic_model, samples) == 0:
+                    models = []
+        if msprime_change_model is not None:
+            models.extend(model for _, model in msprime_change_model)
+        citations = list(self.citations)
+        for model in models:
+            citations.extend(self.model_citations.get(model, []))
+        return stdpopsim.Citation.merge(citations)
 
     def get_version(self):
         return msprime.__version__
 
 
+# The joined recombination map has a discrete genome of whole bases, so at
+# most one recombination can occur in the unit-length interval between two
+# chromosomes. With a rate of log(2) over that interval, the probability of a
+# recombination between the chromosomes is then 1 - exp(-log(2)) = 1/2. On a
+# continuous genome, the chromosomes would only be separated by an odd number
+# of crossovers in the interval, which has a probability of 3/8.
+_UNLINKED_RECOMBINATION_RATE = math.log(2)
+
+
+def _join_recombination_maps(contigs, boundary_rate):
+    """
+    Joins the recombination maps of the specified contigs into a single
+    :class:`msprime.RecombinationMap` with a discrete genome, separating
+    adjacent contigs by a unit-length interval with the specified
+    recombination rate. Each contig starts at a whole base, after a
+    zero-rate interval if the previous contig doesn't end at a whole base.
+    Returns the joined map and the list of positions at which each contig
+    starts.
+    """
+    positions = []
+    rates = []
+    starts = []
+    offset = 0
+    for j, contig in enumerate(contigs):
+        recombination_map = contig.recombination_map
+        if j > 0:
+            if offset != math.ceil(offset):
+                positions.append(offset)
+                rates.append(0)
+                offset = math.ceil(offset)
+            positions.append(offset)
+            rates.append(boundary_rate)
+            offset += 1
+        starts.append(offset)
+        positions.extend(offset + x for x in recombination_map.get_positions()[:-1])
+        rates.extend(recombination_map.get_rates()[:-1])
+        offset += recombination_map.get_length()
+    if offset != math.ceil(offset):
+        positions.append(offset)
+        rates.append(0)
+        offset = math.ceil(offset)
+    positions.append(offset)
+    rates.append(0)
+    return (
+        msprime.RecombinationMap(positions, rates, num_loci=int(offset)),
+        starts)
+
+
+def _split_tree_sequence(ts, starts, lengths):
+    """
+    Splits the specified tree sequence into one tree sequence for each of
+    the intervals defined by ``starts`` and ``lengths``, with coordinates
+    shifted so that each interval starts at zero. The sample nodes are
+    the same in each of the returned tree sequences.
+    """
+    ts_list = []
+    for start, length in zip(starts, lengths):
+        tables = ts.dump_tables()
+        tables.keep_intervals([[start, start + length]], simplify=False)
+        tables.sequence_length = length
+        # The shifted right coordinates are clipped to the sequence length,
+        # as start + length - start may differ from length by rounding.
+        tables.edges.set_columns(
+            left=tables.edges.left - start,
+            right=np.minimum(tables.edges.right - start, length),
+            parent=tables.edges.parent,
+            child=tables.edges.child)
+        tables.migrations.set_columns(
+            left=tables.migrations.left - start,
+            right=np.minimum(tables.migrations.right - start, length),
+            node=tables.migrations.node,
+            source=tables.migrations.source,
+            dest=tables.migrations.dest,
+            time=tables.migrations.time)
+        tables.simplify(filter_populations=False, filter_individuals=False)
+        ts_list.append(tables.tree_sequence())
+    return ts_list
+
+
 register_engine(_MsprimeEngine())
+# Other engines are registered with descriptors, so that their dependencies
+# are only imported if they are used. SLiM does not currently work on Windows.
+if sys.platform != "win32":
+    register_engine(EngineDescriptor(
+        id="slim", module="stdpopsim.slim_engine", attribute="_SLiMEngine"))
 
 
 def get_default_engine():
@@ -171,3 +866,187 @@ def get_default_engine():
     Returns the default simulation engine (msprime).
     """
     return get_engine("msprime")
+
+
+def _simulate_chromosome(job):
+    """
+    Simulates a single chromosome described by ``job`` and writes the
+    resulting tree sequence to ``job["output_file"]``. This is the unit of
+    work run in each worker process by :func:`.simulate_genome`, and so
+    only picklable values are passed in: the contig is built in the worker
+    process rather than being sent from the parent.
+    """
+    engine = get_engine(job["engine"])
+    species = stdpopsim.get_species(job["species"])
+    contig = species.get_contig(job["chromosome"], genetic_map=job["genetic_map"])
+    logger.info(
+        f"Simulating chromosome {job['chromosome']} with seed {job['seed']}")
+    ts = engine.simulate(
+        demographic_model=job["demographic_model"], contig=contig,
+        samples=job["samples"], seed=job["seed"], **job["kwargs"])
+    if ts is None:
+        return None
+    _dump_with_provenance(ts, job["output_file"], job["provenance"])
+    return job["output_file"]
+
+
+def _simulate_chromosomes_single_run(engine, species, jobs):
+    """
+    Simulates all the chromosomes described by ``jobs`` in a single run of
+    the engine, using :meth:`.Engine.simulate_chromosomes`. The jobs must
+    share the same demographic model, samples, seed and parameters.
+    """
+    job = next(iter(jobs.values()))
+    contigs = [
+        species.get_contig(chrom_id, genetic_map=job["genetic_map"])
+        for chrom_id in jobs]
+    ts_list = engine.simulate_chromosomes(
+        demographic_model=job["demographic_model"], contigs=contigs,
+        samples=job["samples"], seed=job["seed"], **job["kwargs"])
+    results = collections.OrderedDict((chrom_id, None) for chrom_id in jobs)
+    if ts_list is not None:
+        for chrom_id, ts in zip(jobs, ts_list):
+            _dump_with_provenance(
+                ts, jobs[chrom_id]["output_file"], jobs[chrom_id]["provenance"])
+            results[chrom_id] = jobs[chrom_id]["output_file"]
+    return results
+
+
+def _dump_with_provenance(ts, output_file, provenance):
+    if provenance is not None:
+        tables = ts.dump_tables()
+        tables.provenances.add_row(json.dumps(provenance))
+        ts = tables.tree_sequence()
+    ts.dump(output_file)
+
+
+def simulate_genome(
+        engine, species, demographic_model, samples, output_dir,
+        chromosomes=None, genetic_map=None, seed=None, num_processes=None,
+        provenance=None, single_run=False, **kwargs):
+    """
+    Simulates each of the specified chromosomes independently, running the
+    simulations in parallel on a pool of worker processes. One contig is
+    built per chromosome (see :meth:`.Species.get_contig`) and simulated
+    with the specified engine. The longest chromosomes are scheduled first,
+    so that the total running time is close to that of the longest
+    chromosome when enough processes are available.
+
+    Each chromosome is simulated using a seed derived from ``seed``, so
+    that the results for a given chromosome do not depend on the order in
+    which the simulations are run. The tree sequence for each chromosome is
+    written to the file ``{chromosome_id}.trees`` in ``output_dir``, and a
+    manifest describing all the simulations is written to
+    ``manifest.json`` in the same directory.
+
+    :param engine: The simulation engine, or the ID of a registered engine.
+    :type engine: :class:`.Engine` or str
+    :param species: The species to simulate.
+    :type species: :class:`.Species`
+    :param demographic_model: The demographic model to simulate.
+    :type demographic_model: :class:`.DemographicModel`
+    :param samples: The samples to be obtained from each simulation.
+    :type samples: list of :class:`msprime.simulations.Sample`
+    :param output_dir: The directory in which to write the tree sequences.
+        This is created if it does not already exist.
+    :type output_dir: str or pathlib.Path
+    :param chromosomes: The IDs of the chromosomes to simulate. If None
+        (the default), all autosomes are simulated.
+    :type chromosomes: list of str
+    :param genetic_map: The ID of the genetic map to use for all chromosomes.
+        If None, the default uniform recombination rates are used.
+    :type genetic_map: str
+    :param seed: The seed from which the per-chromosome seeds are derived.
+    :type seed: int
+    :param num_processes: The number of worker processes to use. Defaults
+        to the number of CPUs available.
+    :type num_processes: int
+    :param provenance: If not None, a provenance record (as a dictionary) to
+        add to each output tree sequence.
+    :type provenance: dict
+    :param single_run: If True, simulate all of the chromosomes in a single
+        run of the engine using :meth:`.Engine.simulate_chromosomes`, rather
+        than in parallel. The chromosomes are then unlinked, but share a
+        single genealogical history for the sampled individuals, and the
+        same ``seed`` is recorded for every chromosome.
+    :type single_run: bool
+    :param kwargs: Further engine-specific parameters, which are passed
+        through to :meth:`.Engine.simulate`.
+    :return: A dictionary mapping chromosome IDs to the paths of the written
+        tree sequence files (or None, if no simulation was run), in the
+        order that the chromosomes are defined in the genome.
+    :rtype: dict
+    """
+    if isinstance(engine, str):
+        engine = get_engine(engine)
+    if chromosomes is None:
+        chroms = species.get_autosomes()
+    else:
+        chroms = [species.genome.get_chromosome(chrom_id) for chrom_id in chromosomes]
+    if len(set(chrom.id for chrom in chroms)) != len(chroms):
+        raise ValueError("Cannot simulate the same chromosome more than once")
+    if genetic_map is not None:
+        # Download the map once here, rather than in each of the workers.
+        gm = species.get_genetic_map(genetic_map)
+        if not gm.is_cached():
+            gm.download()
+
+    output_dir = pathlib.Path(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Seeds are drawn in genome order, so that they are independent of the
+    # order in which the simulations are scheduled.
+    rng = random.Random(seed)
+    jobs = collections.OrderedDict()
+    for chrom in chroms:
+        chrom_seed = seed if single_run else rng.randrange(1, 2**32)
+        jobs[chrom.id] = {
+            "engine": engine.id,
+            "species": species.id,
+            "chromosome": chrom.id,
+            "genetic_map": genetic_map,
+            "demographic_model": demographic_model,
+            "samples": samples,
+            "seed": chrom_seed,
+            "output_file": str(output_dir / f"{chrom.id}.trees"),
+            "provenance": provenance,
+            "kwargs": kwargs,
+        }
+
+    if single_run:
+        results = _simulate_chromosomes_single_run(engine, species, jobs)
+    else:
+        length_sorted = sorted(chroms, key=lambda chrom: -chrom.length)
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=num_processes) as executor:
+            futures = {
+                chrom.id: executor.submit(_simulate_chromosome, jobs[chrom.id])
+                for chrom in length_sorted}
+            results = collections.OrderedDict(
+                (chrom_id, futures[chrom_id].result()) for chrom_id in jobs)
+
+    manifest = {
+        "species": species.id,
+        "demographic_model": demographic_model.id,
+        "engine": engine.id,
+        "engine_version": engine.get_version(),
+        "genetic_map": genetic_map,
+        "seed": seed,
+        "single_run": single_run,
+        "chromosomes": [
+            {
+                "id": chrom.id,
+                "length": chrom.length,
+                "seed": jobs[chrom.id]["seed"],
+                "file": (
+                    None if results[chrom.id] is None
+                    else os.path.basename(results[chrom.id])),
+            }
+            for chrom in chroms],
+    }
+    with open(output_dir / "manifest.json", "w") as f:
+        json.dump(manifest, f, indent=4)
+
+    return collections.OrderedDict(
+        (chrom_id, None if path is None else pathlib.Path(path))
+        for chrom_id, path in results.items())
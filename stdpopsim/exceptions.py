@@ -0,0 +1,9 @@
+"""
+Exceptions raised by stdpopsim and its simulation engines. These are defined
+here, rather than in the engine modules, so that they are available without
+importing engines that are loaded lazily.
+"""
+
+
+class SLiMException(Exception):
+    pass
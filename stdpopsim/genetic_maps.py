@@ -8,11 +8,15 @@ import logging
 import contextlib
 import warnings
 import os
+import io
+import json
 import urllib.request
 
 import msprime
+import numpy as np
 
 from . import cache
+from . import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +35,55 @@ def cd(path):
         os.chdir(old_dir)
 
 
+def _binary_map_paths(map_file):
+    """
+    Returns the paths of the binary array and metadata files that cache the
+    parsed form of the specified HapMap format file.
+    """
+    return pathlib.Path(map_file + ".npy"), pathlib.Path(map_file + ".json")
+
+
+def _save_binary_map(map_file, recombination_map):
+    """
+    Stores the positions and rates of the specified recombination map, which
+    was read from the specified HapMap format file, as a (2, n) float64 array
+    that can later be memory-mapped by :func:`_load_binary_map`.
+    """
+    array_file, metadata_file = _binary_map_paths(map_file)
+    array = np.array(
+        [recombination_map.get_positions(), recombination_map.get_rates()],
+        dtype=np.float64)
+    metadata = {"num_loci": recombination_map.get_num_loci()}
+    map_start = getattr(recombination_map, "map_start", None)
+    if map_start is not None:
+        metadata["map_start"] = map_start
+    buff = io.BytesIO()
+    np.save(buff, array, allow_pickle=False)
+    # The array file is written last, as its presence marks the conversion
+    # as complete.
+    cache._atomic_write(metadata_file, json.dumps(metadata).encode())
+    cache._atomic_write(array_file, buff.getvalue())
+
+
+def _load_binary_map(map_file):
+    """
+    Returns the recombination map for the specified HapMap format file from
+    its binary form, or None if the file has not been converted or has
+    changed since it was converted.
+    """
+    array_file, metadata_file = _binary_map_paths(map_file)
+    try:
+        if os.path.getmtime(array_file) < os.path.getmtime(map_file):
+            return None
+        with open(metadata_file) as f:
+            metadata = json.load(f)
+        array = np.load(array_file, mmap_mode="r", allow_pickle=False)
+    except (OSError, ValueError) as e:
+        logger.debug(f"Binary genetic map {array_file} not loaded: {e}")
+        return None
+    return msprime.RecombinationMap(array[0], array[1], **metadata)
+
+
 # TODO change this to use attrs
 class GeneticMap(object):
     """
@@ -148,8 +201,21 @@ class GeneticMap(object):
         # this is propagated to the user, as this indicates a corrupted map which
         # needs to be redownloaded.
         map_file = os.path.join(self.map_cache_dir, self.file_pattern.format(id=id))
+        # Parsing the text file is slow for large maps, so on first use we
+        # store the parsed map in a binary format alongside it. Later loads
+        # memory-map these arrays, which lets concurrent processes share a
+        # single copy in the page cache.
         if os.path.exists(map_file):
-            ret = msprime.RecombinationMap.read_hapmap(map_file)
+            with metrics.record_phase("genetic_map_loading"):
+                ret = _load_binary_map(map_file)
+                if ret is None:
+                    ret = msprime.RecombinationMap.read_hapmap(map_file)
+                    try:
+                        _save_binary_map(map_file, ret)
+                    except OSError as e:
+                        # The cache may be read-only, in which case we just
+                        # parse the text file every time.
+                        logger.debug(f"Could not convert genetic map {map_file}: {e}")
         else:
             warnings.warn(
                 "Warning: recombination map not found for chromosome: '{}'"
@@ -0,0 +1,272 @@
+"""
+Instrumentation for measuring the resources used by each phase of a
+simulation.
+"""
+import contextlib
+import json
+import logging
+import sys
+import threading
+import time
+
+import attr
+
+# resource is from the standard library, but it's not available on
+# Windows. We break from the usual import grouping conventions here
+# to avoid lots of pep8 complaints about mixing imports and code.
+_resource_module_available = False
+try:
+    import resource
+    _resource_module_available = True
+except ImportError:
+    pass
+
+logger = logging.getLogger(__name__)
+
+# The stack of active recorders for each thread. Phases are recorded into
+# the innermost active recorder for the current thread, so that separate
+# simulations running in different threads don't interfere.
+_local = threading.local()
+
+
+def _rusage_max_rss(rusage):
+    """
+    Returns the peak resident set size from the specified resource usage
+    (as returned by ``resource.getrusage`` or ``os.wait4``) in bytes.
+    """
+    max_rss = rusage.ru_maxrss
+    if sys.platform != 'darwin':
+        max_rss *= 1024  # Linux and other OSs (e.g. freeBSD) report maxrss in kb
+    return max_rss
+
+
+def _max_rss():
+    """
+    Returns the peak resident set size of this process in bytes, or None if
+    this is not available.
+    """
+    if not _resource_module_available:
+        return None
+    return _rusage_max_rss(resource.getrusage(resource.RUSAGE_SELF))
+
+
+@attr.s
+class PhaseMetrics(object):
+    """
+    The resources used by one phase of a simulation.
+
+    :ivar name: The name of the phase, e.g., "ancestry".
+    :vartype name: str
+    :ivar wall_time: The elapsed wall clock time, in seconds.
+    :vartype wall_time: float
+    :ivar cpu_time: The CPU time used by this process, in seconds.
+    :vartype cpu_time: float
+    :ivar max_rss_delta: The increase in the peak resident set size of this
+        process during the phase, in bytes, or None if this is not available
+        on the current platform. This is zero if the phase did not exceed
+        the peak memory usage of an earlier phase.
+    :vartype max_rss_delta: int
+    :ivar child_wall_time: The total elapsed wall clock time of the child
+        processes run during the phase (e.g., SLiM), in seconds, or None if
+        no child processes were recorded. See :func:`.record_child_process`.
+    :vartype child_wall_time: float
+    :ivar child_cpu_time: The total CPU time used by the child processes run
+        during the phase, in seconds, or None if no child processes were
+        recorded. This is not included in ``cpu_time``.
+    :vartype child_cpu_time: float
+    :ivar child_max_rss: The largest peak resident set size of the child
+        processes run during the phase, in bytes, or None if this is not
+        available.
+    :vartype child_max_rss: int
+    """
+    name = attr.ib(type=str)
+    wall_time = attr.ib(type=float)
+    cpu_time = attr.ib(type=float)
+    max_rss_delta = attr.ib(default=None)
+    child_wall_time = attr.ib(default=None)
+    child_cpu_time = attr.ib(default=None)
+    child_max_rss = attr.ib(default=None)
+
+    def asdict(self):
+        return attr.asdict(self)
+
+
+@attr.s
+class SimulationMetrics(object):
+    """
+    The resources used by each phase of a simulation, in the order that the
+    phases were run. See :func:`.record_metrics`.
+
+    :ivar phases: The list of :class:`.PhaseMetrics` for each phase.
+    :vartype phases: list
+    """
+    phases = attr.ib(factory=list)
+
+    @property
+    def wall_time(self):
+        """
+        The total wall clock time of all phases, in seconds.
+        """
+        return sum(phase.wall_time for phase in self.phases)
+
+    @property
+    def cpu_time(self):
+        """
+        The total CPU time of all phases used by this process, in seconds.
+        """
+        return sum(phase.cpu_time for phase in self.phases)
+
+    @property
+    def child_wall_time(self):
+        """
+        The total wall clock time of the child processes run by all phases,
+        in seconds.
+        """
+        return sum(
+            phase.child_wall_time for phase in self.phases
+            if phase.child_wall_time is not None)
+
+    @property
+    def child_cpu_time(self):
+        """
+        The total CPU time used by the child processes run by all phases,
+        in seconds.
+        """
+        return sum(
+            phase.child_cpu_time for phase in self.phases
+            if phase.child_cpu_time is not None)
+
+    @property
+    def child_max_rss(self):
+        """
+        The largest peak resident set size of the child processes run by
+        all phases, in bytes, or None if this is not available.
+        """
+        max_rss = [
+            phase.child_max_rss for phase in self.phases
+            if phase.child_max_rss is not None]
+        return max(max_rss) if len(max_rss) > 0 else None
+
+    def get_phase(self, name):
+        """
+        Returns the list of :class:`.PhaseMetrics` with the specified name.
+        """
+        return [phase for phase in self.phases if phase.name == name]
+
+    def asdict(self):
+        """
+        Returns a JSON encodable dictionary describing the metrics.
+        """
+        return {
+            "wall_time": self.wall_time,
+            "cpu_time": self.cpu_time,
+            "child_wall_time": self.child_wall_time,
+            "child_cpu_time": self.child_cpu_time,
+            "child_max_rss": self.child_max_rss,
+            "phases": [phase.asdict() for phase in self.phases],
+        }
+
+    def dump(self, file):
+        """
+        Writes the metrics as JSON to the specified file object.
+        """
+        json.dump(self.asdict(), file, indent=4)
+
+
+def _recorders():
+    if not hasattr(_local, "recorders"):
+        _local.recorders = []
+    return _local.recorders
+
+
+def _active_phases():
+    # The child processes recorded in each active phase of the current thread.
+    if not hasattr(_local, "phases"):
+        _local.phases = []
+    return _local.phases
+
+
+@contextlib.contextmanager
+def record_metrics():
+    """
+    Context manager that records the resources used by each phase of the
+    simulations run within it, in the current thread. Yields the
+    :class:`.SimulationMetrics` instance into which the phases are recorded.
+
+    .. code-block:: python
+
+        with stdpopsim.record_metrics() as metrics:
+            ts = engine.simulate(model, contig, samples, seed=1)
+        print(metrics.asdict())
+    """
+    metrics = SimulationMetrics()
+    recorders = _recorders()
+    recorders.append(metrics)
+    try:
+        yield metrics
+    finally:
+        recorders.pop()
+
+
+@contextlib.contextmanager
+def record_phase(name):
+    """
+    Context manager that measures the resources used within it as the phase
+    with the specified name, if metrics are being recorded in the current
+    thread (see :func:`.record_metrics`). Otherwise, this does nothing.
+    """
+    recorders = _recorders()
+    if len(recorders) == 0:
+        yield
+        return
+    max_rss_before = _max_rss()
+    cpu_before = time.process_time()
+    wall_before = time.perf_counter()
+    children = []
+    _active_phases().append(children)
+    try:
+        yield
+    finally:
+        _active_phases().pop()
+        wall_time = time.perf_counter() - wall_before
+        cpu_time = time.process_time() - cpu_before
+        max_rss_delta = None
+        if max_rss_before is not None:
+            max_rss_delta = _max_rss() - max_rss_before
+        logger.debug(f"Phase {name}: wall={wall_time:.2f}s cpu={cpu_time:.2f}s")
+        phase = PhaseMetrics(
+            name=name, wall_time=wall_time, cpu_time=cpu_time,
+            max_rss_delta=max_rss_delta)
+        if len(children) > 0:
+            phase.child_wall_time = sum(child[0] for child in children)
+            phase.child_cpu_time = sum(child[1] for child in children)
+            max_rss = [child[2] for child in children if child[2] is not None]
+            if len(max_rss) > 0:
+                phase.child_max_rss = max(max_rss)
+        recorders[-1].phases.append(phase)
+
+
+def record_child_process(wall_time, cpu_time, max_rss=None):
+    """
+    Records the resources used by a child process, such as SLiM, that was
+    run within the current phase (see :func:`.record_phase`). The resources
+    used by child processes are not included in the process' own CPU time and
+    peak memory usage, so engines that run simulations in child processes
+    should measure them (e.g., with ``os.wait4``) and record them here.
+    If no phase is active in the current thread, this does nothing.
+
+    :param wall_time: The elapsed wall clock time of the process, in seconds.
+    :type wall_time: float
+    :param cpu_time: The user and system CPU time used by the process,
+        in seconds.
+    :type cpu_time: float
+    :param max_rss: The peak resident set size of the process in bytes,
+        if known.
+    :type max_rss: int
+    """
+    phases = _active_phases()
+    if len(phases) > 0:
+        logger.debug(
+            f"Child process: wall={wall_time:.2f}s cpu={cpu_time:.2f}s "
+            f"max_rss={max_rss}")
+        phases[-1].append((wall_time, cpu_time, max_rss))
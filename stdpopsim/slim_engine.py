@@ -40,22 +40,33 @@ How backwards-time demographic events are mapped to forwards-time SLiM code:
 
 import os
 import sys
+import shutil
+import copy
 import string
 import tempfile
 import subprocess
 import functools
-import itertools
 import collections
 import contextlib
+import concurrent.futures
 import random
+import threading
 import textwrap
 import logging
+import math
+import numbers
+import time
 import warnings
 
+import attr
 import stdpopsim
 import numpy as np
 import msprime
 import pyslim
+import tskit
+
+# Defined in stdpopsim.exceptions, and kept here for compatibility.
+from stdpopsim.exceptions import SLiMException  # NOQA
 
 logger = logging.getLogger(__name__)
 
@@ -65,29 +76,46 @@ initialize() {
         defineConstant("dry_run", F);
     if (!exists("verbosity"))
         defineConstant("verbosity", 2);
+    if (!exists("progress"))
+        defineConstant("progress", F);
 
-    // Scaling factor to speed up simulation.
+    // Scaling factor to speed up simulation, for each epoch (oldest first).
     // See SLiM manual:
     // `5.5 Rescaling population sizes to improve simulation performance`.
-    defineConstant("Q", $scaling_factor);
+    defineConstant("Q_epochs", $scaling_factors);
+    // The scaling factor of the oldest epoch, in which the simulation starts.
+    defineConstant("Q", Q_epochs[0]);
 
     defineConstant("burn_in", $burn_in);
     defineConstant("generation_time", $generation_time);
-    defineConstant("mutation_rate", Q * $mutation_rate);
+    defineConstant("unscaled_mutation_rate", $mutation_rate);
+    defineConstant("mutation_rate", Q * unscaled_mutation_rate);
     defineConstant("chromosome_length", $chromosome_length);
-    defineConstant("trees_file", "$trees_file");
+    if (!exists("trees_file"))
+        defineConstant("trees_file", "$trees_file");
+    if (!exists("burn_in_checkpoint"))
+        defineConstant("burn_in_checkpoint", "");
+    // Number of generations between simplifications of the tree sequence.
+    if (!exists("simplification_interval"))
+        defineConstant("simplification_interval", $simplification_interval);
+    if (!exists("load_burn_in_checkpoint"))
+        defineConstant("load_burn_in_checkpoint", F);
     defineConstant("pop_names", $pop_names);
 
-    _recombination_rates = $recombination_rates;
-    _recombination_ends = $recombination_ends;
+$recombination_map
+    defineConstant("unscaled_recombination_rates", _recombination_rates);
     defineConstant("recombination_rates", (1-(1-2*_recombination_rates)^Q)/2);
     defineConstant("recombination_ends", _recombination_ends);
 """
 
 _slim_lower = """
-    defineConstant("N", asInteger(_N/Q));
+    // Each epoch's population sizes are rescaled by its scaling factor.
+    defineConstant("N", asInteger(_N/matrix(rep(Q_epochs, num_populations),
+        nrow=num_epochs)));
 
-    initializeTreeSeq();
+    // SLiM's automatic simplification is replaced by simplifying every
+    // simplification_interval generations.
+    initializeTreeSeq(simplificationInterval=simplification_interval);
     initializeMutationRate(mutation_rate);
     initializeMutationType("m1", 0.5, "f", 0);
     initializeGenomicElementType("g1", m1, 1.0);
@@ -134,7 +162,7 @@ function (integer)epoch(integer G, integer $g) {
 function (integer)pop_size_at(integer G, integer$ pop, integer$ g) {
     e = epoch(G, g);
     N0 = N[e,pop];
-    r = Q * growth_rates[e,pop];
+    r = Q_epochs[e] * growth_rates[e,pop];
     if (r == 0) {
         N_g = N0;
     } else {
@@ -145,8 +173,36 @@ function (integer)pop_size_at(integer G, integer$ pop, integer$ g) {
 }
 
 // Return the number of generations that separate t0 and t1.
+// If the epochs have different scaling factors, t0 must be T_start, and
+// the generations of each epoch are counted with its own scaling factor,
+// starting from the epoch boundaries in G_offsets.
 function (integer)gdiff(numeric$ t0, numeric t1) {
-    return asInteger(round((t0-t1)/generation_time/Q));
+    if (all(Q_epochs == Q)) {
+        return asInteger(round((t0-t1)/generation_time/Q));
+    }
+    g = rep(0, length(t1));
+    for (j in seqAlong(t1)) {
+        boundary = which(_T == t1[j]);
+        if (size(boundary) > 0) {
+            g[j] = G_offsets[boundary[0]];
+        } else {
+            // t1[j] is in epoch i, which starts at time _T[i-1].
+            i = sum(_T > t1[j]);
+            g[j] = G_offsets[i-1] +
+                asInteger(round((_T[i-1]-t1[j])/generation_time/Q_epochs[i]));
+        }
+    }
+    return g;
+}
+
+// Rescale the recombination and mutation rates for epoch i.
+function (void)set_scaled_rates(integer$ i) {
+    q = Q_epochs[i];
+    sim.chromosome.setRecombinationRate(
+        (1-(1-2*unscaled_recombination_rates)^q)/2, recombination_ends);
+    if (unscaled_mutation_rate > 0) {
+        sim.chromosome.setMutationRate(q * unscaled_mutation_rate);
+    }
 }
 
 // Output tree sequence file and end the simulation.
@@ -155,6 +211,48 @@ function (void)end(void) {
     sim.simulationFinished();
 }
 
+// Print a machine readable progress record, every progress_interval
+// generations. The epoch is the index of the current epoch, counting
+// from the oldest, or -1 during the burn-in.
+function (void)report_progress(void) {
+    g = sim.generation;
+    if (integerMod(g, progress_interval) != 0 & g != G_progress_end) {
+        return;
+    }
+    e = sum(G_progress_epochs <= g) - 1;
+    sizes = rep(0, num_populations);
+    for (p in sim.subpopulations) {
+        sizes[p.id] = p.individualCount;
+    }
+    catn("PROGRESS: generation=" + g + " end=" + G_progress_end +
+         " epoch=" + e + " sizes=" + paste(sizes, sep=","));
+}
+
+// Set the migration rates of the first epoch.
+function (void)set_initial_migration_rates(void) {
+    i = 0;
+    for (j in 0:(num_populations-1)) {
+        for (k in 0:(num_populations-1)) {
+            if (j==k | N[i,j] == 0 | N[i,k] == 0) {
+                next;
+            }
+
+            m = Q_epochs[i] * migration_matrices[k,j,i];
+            p = sim.subpopulations[j];
+            dbg("p"+j+".setMigrationRates("+k+", "+m+");");
+            p.setMigrationRates(k, m);
+        }
+    }
+}
+
+// Replace the population with the state saved at the end of the burn-in
+// in generation g, and continue from there with the current seed.
+function (void)load_checkpoint(integer$ g) {
+    sim.readFromPopulationFile(burn_in_checkpoint);
+    sim.generation = g;
+    set_initial_migration_rates();
+}
+
 1 {
     /*
      * Create initial populations and migration rates.
@@ -174,19 +272,7 @@ function (void)end(void) {
     }
 
     // Initial migration rates.
-    i = 0;
-    for (j in 0:(num_populations-1)) {
-        for (k in 0:(num_populations-1)) {
-            if (j==k | N[i,j] == 0 | N[i,k] == 0) {
-                next;
-            }
-
-            m = Q * migration_matrices[k,j,i];
-            p = sim.subpopulations[j];
-            dbg("p"+j+".setMigrationRates("+k+", "+m+");");
-            p.setMigrationRates(k, m);
-        }
-    }
+    set_initial_migration_rates();
 
 
     // The end of the burn-in is the starting generation, and corresponds to
@@ -194,7 +280,7 @@ function (void)end(void) {
     N_max = max(N[0,0:(num_populations-1)]);
     G_start = sim.generation + asInteger(round(burn_in * N_max));
     T_start = max(_T);
-    G = G_start + gdiff(T_start, _T);
+    G = G_start + G_offsets;
     G_end = max(G);
 
     /*
@@ -206,7 +292,8 @@ function (void)end(void) {
         for (i in 0:(ncol(subpopulation_splits)-1)) {
             g = G_start + gdiff(T_start, subpopulation_splits[0,i]);
             newpop = drop(subpopulation_splits[1,i]);
-            size = asInteger(subpopulation_splits[2,i] / Q);
+            size = asInteger(
+                subpopulation_splits[2,i] / Q_epochs[subpopulation_splits[4,i]]);
             oldpop = subpopulation_splits[3,i];
             check_size(newpop, size, g);
             sim.registerLateEvent(NULL,
@@ -230,36 +317,39 @@ function (void)end(void) {
                         "p"+j+".setSubpopulationSize("+N[i,j]+");}",
                         g, g);
                 }
+            }
+        }
 
-                if (growth_rates[i,j] != 0) {
-                    growth_phase_start = g+1;
-                    if (i == num_epochs-1) {
-                        growth_phase_end = G[i];
-                    } else {
-                        // We already registered a size change at generation G[i].
-                        growth_phase_end = G[i] - 1;
-                    }
-
-                    if (growth_phase_start >= growth_phase_end) {
-                        // Some demographic models have duplicate epoch times,
-                        // which should be ignored.
-                        next;
-                    }
-
-                    N_growth_phase_end = pop_size_at(G, j, growth_phase_end);
-                    check_size(j, N_growth_phase_end, growth_phase_end);
-
-                    N0 = N[i,j];
-                    r = Q * growth_rates[i,j];
-                    sim.registerLateEvent(NULL,
-                        "{" +
-                            "dbg(self.source); " +
-                            "gx=sim.generation-"+g+"; " +
-                            "size=asInteger(round("+N0+"*exp("+r+"*gx))); " +
-                            "p"+j+".setSubpopulationSize(size);" +
-                        "}",
-                        growth_phase_start, growth_phase_end);
+        // Exponential growth. The sizes of the growing populations in each
+        // generation of an epoch are looked up together by one callback.
+        if (length(growth_phases) > 0) {
+            for (i in unique(drop(growth_phases[0,]))) {
+                phases = which(drop(growth_phases[0,]) == i);
+                g = G[i-1];
+                n = drop(growth_phases[3,phases[0]]);
+                pops = drop(growth_phases[1,phases]);
+                // The index of each population's size, less the generation.
+                offsets = drop(growth_phases[2,phases]) - g - 1;
+                cmd = "{dbg(self.source); " +
+                    "sizes=growth_sizes[c(" + paste(offsets, sep=", ") +
+                    ")+sim.generation]; ";
+                for (k in seqAlong(pops)) {
+                    check_size(pops[k], growth_sizes[offsets[k]+g+n], g+n);
+                    cmd = cmd + "p" + pops[k] + ".setSubpopulationSize(sizes[" +
+                        k + "]); ";
                 }
+                sim.registerLateEvent(NULL, cmd + "}", g+1, g+n);
+            }
+        }
+
+        // Recombination and mutation rates, which are rescaled when the
+        // scaling factor changes.
+        for (i in 1:(num_epochs-1)) {
+            if (Q_epochs[i] != Q_epochs[i-1]) {
+                g = G[i-1];
+                sim.registerLateEvent(NULL,
+                    "{dbg(self.source); set_scaled_rates("+i+");}",
+                    g, g);
             }
         }
 
@@ -271,8 +361,8 @@ function (void)end(void) {
                         next;
                     }
 
-                    m_last = Q * migration_matrices[k,j,i-1];
-                    m = Q * migration_matrices[k,j,i];
+                    m_last = Q_epochs[i-1] * migration_matrices[k,j,i-1];
+                    m = Q_epochs[i] * migration_matrices[k,j,i];
                     if (m == m_last) {
                         // Do nothing if the migration rate hasn't changed.
                         next;
@@ -328,6 +418,30 @@ function (void)end(void) {
 
     sim.registerLateEvent(NULL, "{dbg(self.source); end();}", G_end, G_end);
 
+    // Progress records, at most 1000 per simulation.
+    if (progress) {
+        defineConstant("G_progress_epochs", G);
+        defineConstant("G_progress_end", G_end);
+        defineConstant("progress_interval",
+            max(1, asInteger((G_end - sim.generation) / 1000)));
+        sim.registerLateEvent(NULL, "{report_progress();}", sim.generation, G_end);
+    }
+
+    // The population at the end of the burn-in depends only on the oldest
+    // epoch, so it can be saved once and then loaded by later simulations,
+    // which skip the burn-in.
+    if (burn_in_checkpoint != "" & G_start > sim.generation + 1) {
+        if (load_burn_in_checkpoint) {
+            sim.registerLateEvent(NULL,
+                "{dbg(self.source); load_checkpoint("+(G_start-1)+");}",
+                sim.generation, sim.generation);
+        } else {
+            sim.registerLateEvent(NULL,
+                "{dbg(self.source); sim.treeSeqOutput(burn_in_checkpoint);}",
+                G_start-1, G_start-1);
+        }
+    }
+
     if (G_start > sim.generation) {
         dbg("Starting burn-in...");
     }
@@ -339,6 +453,345 @@ function (void)end(void) {
 """
 
 
+# The output file defined in generated scripts. This is overridden when
+# stdpopsim runs SLiM, so that the scripts don't depend on the output file.
+_DEFAULT_TREES_FILE = "stdpopsim.trees"
+
+# Reads the recombination map from the file written by
+# _write_recombination_map(). Eidos has no binary file I/O, so the file has
+# one value per line: the number of intervals n, then the n rates, then the
+# n end positions. This lets the values be converted by vectorised calls,
+# rather than splitting each line in an Eidos loop.
+_slim_recombination_map_file = """\
+    if (!exists("recombination_map_file"))
+        defineConstant("recombination_map_file", $recombination_map_file);
+    _recombination_map = readFile(recombination_map_file);
+    if (isNULL(_recombination_map))
+        stop("ERROR: couldn't read recombination map " + recombination_map_file);
+    _n = asInteger(_recombination_map[0]);
+    _recombination_rates = asFloat(_recombination_map[1:_n]);
+    _recombination_ends = asInteger(_recombination_map[(_n+1):(2*_n)]);"""
+
+_slim_recombination_map_inline = """\
+    _recombination_rates = $recombination_rates;
+    _recombination_ends = $recombination_ends;"""
+
+# The oldest epoch of a model, which is used for recapitation, and the
+# number of SLiM generations and scaling factor of each epoch (oldest first),
+# which are used to rescale the times in SLiM's output. The first epoch's
+# number of generations is that of the burn-in, so it isn't known (None).
+_RecapEpoch = collections.namedtuple(
+    "_RecapEpoch", [
+        "populations", "migration_matrix", "epoch_generations",
+        "scaling_factors"])
+_RecapPopulation = collections.namedtuple(
+    "_RecapPopulation", ["start_size", "growth_rate"])
+
+
+def _recap_epoch_asdict(epoch):
+    """
+    Returns a JSON encodable dictionary describing the parts of the specified
+    epoch used for recapitation.
+    """
+    return {
+        "populations": [
+            {"start_size": pop.start_size, "growth_rate": pop.growth_rate}
+            for pop in epoch.populations],
+        "migration_matrix": np.asarray(epoch.migration_matrix).tolist(),
+        "epoch_generations": list(epoch.epoch_generations),
+        "scaling_factors": list(epoch.scaling_factors),
+    }
+
+
+def _recap_epoch_from_dict(d):
+    return _RecapEpoch(
+        populations=[_RecapPopulation(**pop) for pop in d["populations"]],
+        migration_matrix=d["migration_matrix"],
+        epoch_generations=d["epoch_generations"],
+        scaling_factors=d["scaling_factors"])
+
+
+def _rescale_times(times, recap_epoch):
+    """
+    Converts times in SLiM generations before the end of a simulation into
+    generations of the unscaled model, where each SLiM generation of an
+    epoch is as long as its scaling factor.
+    """
+    scaling_factors = recap_epoch.scaling_factors
+    if all(Q == scaling_factors[0] for Q in scaling_factors):
+        return np.multiply(times, scaling_factors[0])
+    # The epoch boundaries going backwards in time from the end of the
+    # simulation, in SLiM generations (x) and unscaled generations (y).
+    # Epochs without any generations are skipped.
+    x, y = [0], [0]
+    for g, Q in zip(
+            reversed(recap_epoch.epoch_generations[1:]),
+            reversed(scaling_factors[1:])):
+        if g > 0:
+            x.append(x[-1] + g)
+            y.append(y[-1] + g * Q)
+    times = np.asarray(times, dtype=np.float64)
+    return np.where(
+        times <= x[-1], np.interp(times, x, y),
+        y[-1] + (times - x[-1]) * scaling_factors[0])
+
+
+def _remembered_nodes(tables):
+    """
+    Returns the IDs of the nodes of the individuals that were explicitly
+    sampled in SLiM with sim.treeSeqRememberIndividuals(), grouped by
+    individual in the order of the individuals table.
+    """
+    remembered = (tables.individuals.flags & pyslim.INDIVIDUAL_REMEMBERED) != 0
+    individual = tables.nodes.individual
+    nodes = np.flatnonzero(individual >= 0)
+    nodes = nodes[remembered[individual[nodes]]]
+    return nodes[np.argsort(individual[nodes], kind="stable")].astype(np.int32)
+
+
+def _round_half_away(x):
+    # Eidos' round(), which rounds halfway cases away from zero.
+    a = abs(x)
+    return int(math.copysign(math.floor(a) + (a % 1 >= 0.5), x))
+
+
+def _growth_schedules(N, growth_rates, scaling_factors, G_offsets):
+    """
+    Returns the population sizes in each SLiM generation of the epochs with
+    exponential growth, as a tuple (phases, sizes). Each phase is a tuple
+    (epoch, pop, first, num_generations), where ``sizes[first]`` is the size
+    of the population in the generation after the start of the epoch.
+
+    The sizes are computed as the SLiM script would compute them from the
+    rescaled sizes ``N`` and ``growth_rates``, indexed by population and
+    epoch, so they are the same as those given by its pop_size_at().
+    """
+    phases = []
+    sizes = []
+    num_epochs = len(G_offsets)
+    for i in range(1, num_epochs):
+        num_generations = G_offsets[i] - G_offsets[i-1]
+        if i < num_epochs - 1:
+            # The size at the end of the epoch is set by the next epoch.
+            num_generations -= 1
+        if num_generations <= 1:
+            # Some demographic models have duplicate epoch times,
+            # which should be ignored.
+            continue
+        Q = scaling_factors[i]
+        for j in range(N.shape[0]):
+            if growth_rates[j, i] == 0:
+                continue
+            N0 = int(N[j, i] / Q)
+            r = Q * float(growth_rates[j, i])
+            phases.append((i, j, len(sizes), num_generations))
+            sizes.extend(
+                _round_half_away(N0 * math.exp(r * gx))
+                for gx in range(1, num_generations + 1))
+    return phases, sizes
+
+
+def _epoch_scaling_factors(scaling_factor, num_epochs):
+    """
+    Returns the list of scaling factors for each of the epochs of a model,
+    oldest first, given a single scaling factor or a list with one per epoch.
+    """
+    if isinstance(scaling_factor, numbers.Number):
+        return [scaling_factor] * num_epochs
+    scaling_factors = list(scaling_factor)
+    if len(scaling_factors) != num_epochs:
+        raise ValueError(
+            f"The model has {num_epochs} epochs, but {len(scaling_factors)} "
+            "scaling factors were given")
+    return scaling_factors
+
+
+# Held while logging the buffered output of a SLiM process, so that the
+# output of concurrent processes isn't interleaved.
+_slim_output_lock = threading.Lock()
+
+
+@attr.s
+class SLiMProgress(object):
+    """
+    A progress report from a running SLiM simulation, as passed to the
+    ``slim_progress`` callback of :meth:`._SLiMEngine.simulate`.
+
+    :ivar generation: The current SLiM generation.
+    :vartype generation: int
+    :ivar end_generation: The SLiM generation in which the simulation ends.
+    :vartype end_generation: int
+    :ivar epoch: The index of the current epoch of the demographic model,
+        counting from the oldest epoch, or -1 during the burn-in.
+    :vartype epoch: int
+    :ivar population_sizes: The number of individuals in each population of
+        the (rescaled) model, which is zero for populations that don't
+        currently exist.
+    :vartype population_sizes: list of int
+    :ivar elapsed: The wall clock time since SLiM was started, in seconds.
+    :vartype elapsed: float
+    :ivar eta: The estimated wall clock time until SLiM finishes, in seconds,
+        extrapolated from the rate of progress so far, or None if this
+        can't yet be estimated.
+    :vartype eta: float
+    :ivar seed: The seed of the simulation.
+    :vartype seed: int
+    """
+    generation = attr.ib(type=int)
+    end_generation = attr.ib(type=int)
+    epoch = attr.ib(type=int)
+    population_sizes = attr.ib(type=list)
+    elapsed = attr.ib(type=float)
+    eta = attr.ib(default=None)
+    seed = attr.ib(default=None)
+
+    @property
+    def fraction(self):
+        """
+        The fraction of the generations that have been simulated.
+        """
+        return min(1, self.generation / max(1, self.end_generation))
+
+
+class _ProgressParser(object):
+    """
+    Parses the progress records written by a SLiM script into
+    :class:`.SLiMProgress` instances, adding the elapsed time and ETA.
+    """
+    prefix = "PROGRESS: "
+
+    def __init__(self, seed=None):
+        self.seed = seed
+        self.start_time = time.perf_counter()
+        self.first = None
+
+    def parse(self, line):
+        fields = dict(
+            field.split("=", 1) for field in line[len(self.prefix):].split())
+        generation = int(fields["generation"])
+        end_generation = int(fields["end"])
+        elapsed = time.perf_counter() - self.start_time
+        eta = None
+        if self.first is None:
+            self.first = (generation, elapsed)
+        else:
+            first_generation, first_elapsed = self.first
+            if generation > first_generation:
+                rate = (elapsed - first_elapsed) / (generation - first_generation)
+                eta = rate * (end_generation - generation)
+        return SLiMProgress(
+            generation=generation, end_generation=end_generation,
+            epoch=int(fields["epoch"]),
+            population_sizes=[int(x) for x in fields["sizes"].split(",")],
+            elapsed=elapsed, eta=eta, seed=self.seed)
+
+
+# Warn if the scaling factor rescales a population to fewer individuals.
+_MIN_RESCALED_SIZE = 100
+
+# The target ratio of the size of the tree sequence tables just before
+# simplification to their size just after, as in SLiM's own automatic
+# simplification.
+_SIMPLIFICATION_RATIO = 10
+
+
+def _simplification_interval(demographic_model, contig, samples, scaling_factor):
+    """
+    Returns the default number of SLiM generations between simplifications
+    of the tree sequence, for the epoch with the largest rescaled size.
+
+    After simplification, the tables hold the genealogies of the k extant
+    and sampled genomes, with about k * (1 + 2 * b * ln(k)) edges for b
+    recombination breakpoints per genome per generation, and every
+    generation adds about 2 * N * (1 + b) edges for N individuals. The
+    interval is chosen so that the tables grow by a factor of
+    ``_SIMPLIFICATION_RATIO`` between simplifications. Simplifying more often
+    reduces the peak memory usage but takes longer, and with a fixed interval
+    this no longer depends on SLiM adapting its schedule during the run.
+    """
+    recomb_map = contig.recombination_map
+    rate = recomb_map.mean_recombination_rate * recomb_map.get_length()
+    epochs = stdpopsim.cost.epoch_sizes(demographic_model)
+    scaling_factors = _epoch_scaling_factors(scaling_factor, len(epochs))[::-1]
+    size, Q = max(
+        ((size / Q, Q) for (_, _, size), Q in zip(epochs, scaling_factors)),
+        key=lambda x: x[0])
+    breakpoints = Q * rate
+    k = 2 * size + len(samples)
+    simplified = k * (1 + 2 * breakpoints * math.log(k))
+    added = 2 * size * (1 + breakpoints)
+    return max(1, round((_SIMPLIFICATION_RATIO - 1) * simplified / added))
+
+
+def _min_population_sizes(demographic_model):
+    """
+    Returns the smallest nonzero size of any population in each epoch of the
+    specified model, oldest first.
+    """
+    dd = msprime.DemographyDebugger(
+        population_configurations=demographic_model.population_configurations,
+        migration_matrix=demographic_model.migration_matrix,
+        demographic_events=demographic_model.demographic_events)
+    return [
+        min([
+            size for pop in epoch.populations
+            for size in (pop.start_size, pop.end_size) if size > 0],
+            default=math.inf)
+        for epoch in reversed(dd.epochs)]
+
+
+def _wait_slim(proc, start_time):
+    """
+    Waits for the SLiM process to exit, and records its resource usage, which
+    isn't included in the resource usage of this process, as a child process
+    of the current phase.
+    """
+    if not hasattr(os, "wait4"):
+        # Not available on Windows.
+        proc.wait()
+        return
+    try:
+        _, status, rusage = os.wait4(proc.pid, 0)
+    except ChildProcessError:
+        # The process has already been reaped.
+        proc.wait()
+        return
+    wall_time = time.perf_counter() - start_time
+    # Set the return code, as proc can no longer wait for the process itself.
+    if os.WIFSIGNALED(status):
+        proc.returncode = -os.WTERMSIG(status)
+    else:
+        proc.returncode = os.WEXITSTATUS(status)
+    stdpopsim.record_child_process(
+        wall_time=wall_time, cpu_time=rusage.ru_utime + rusage.ru_stime,
+        max_rss=stdpopsim.metrics._rusage_max_rss(rusage))
+
+
+def _log_slim_output(lines):
+    """
+    Redirects the specified lines of SLiM output to Python's logging module.
+    See :meth:`._SLiMEngine._run_slim`.
+    """
+    for line in lines:
+        line = line.rstrip()
+        if line.startswith("ERROR: "):
+            logger.error(line[len("ERROR: "):])
+        elif line.startswith("WARNING: "):
+            warnings.warn(stdpopsim.UnspecifiedSLiMWarning(
+                line[len("WARNING: "):]))
+        else:
+            # filter `dbg` function calls that generate output
+            line = line.replace("dbg(self.source); ", "")
+            logger.debug(line)
+
+
+def _eidos_string(s):
+    """
+    Returns the specified string as an Eidos string literal.
+    """
+    return "'" + s.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
 def msprime_rm_to_slim_rm(recombination_map):
     """
     Convert recombination map from start position coords to end position coords.
@@ -348,27 +801,129 @@ def msprime_rm_to_slim_rm(recombination_map):
     return rates[:-1], ends[1:]
 
 
+def _truncate_recombination_map(recombination_map):
+    """
+    Returns the specified recombination map, truncated to a whole number of
+    bases.
+    """
+    length = int(recombination_map.get_length())
+    positions = list(recombination_map.get_positions())
+    rates = list(recombination_map.get_rates())
+    if length == positions[-1]:
+        return recombination_map
+    num_intervals = sum(1 for x in positions[:-1] if x < length)
+    return msprime.RecombinationMap(
+        positions[:num_intervals] + [length], rates[:num_intervals] + [0])
+
+
+# Upper bounds on the size of a generated script, excluding the recombination
+# map, and on the size of each interval in a recombination map file (the
+# string representations of a float rate and an integer end position).
+_SCRIPT_SIZE = 2**16
+_RECOMBINATION_MAP_INTERVAL_SIZE = 48
+
+
+def _write_recombination_map(filename, rates, ends):
+    """
+    Writes the specified SLiM recombination map to the specified file,
+    in the format read by the generated script.
+    """
+    with open(filename, "w") as f:
+        f.write(f"{len(rates)}\n")
+        f.write("\n".join(map(str, rates)))
+        f.write("\n")
+        f.write("\n".join(map(str, ends)))
+        f.write("\n")
+
+
 def slim_makescript(
         script_file, trees_file,
         demographic_model, contig, samples,
-        scaling_factor, burn_in):
+        scaling_factor, burn_in, recombination_map_file=None,
+        simplification_interval=None):
+    """
+    Writes a SLiM script simulating the specified model to the specified
+    file object, and returns the oldest epoch of the model, which is used
+    for recapitation, with the number of SLiM generations and scaling factor
+    of each epoch.
+
+    The ``scaling_factor`` is either a single scaling factor for the whole
+    model, or a list with one for each epoch of the model, oldest first
+    (see :meth:`._SLiMEngine.simulate`). Population sizes, growth rates,
+    migration rates, recombination rates and the durations of epochs are
+    rescaled by the scaling factor of the epoch they apply to.
+
+    If ``recombination_map_file`` is None, the recombination map is written
+    into the script. Otherwise, the map is written to the specified file,
+    which the script reads when it is run. This keeps the script small for
+    empirical maps with many intervals, which are slow to format as Eidos
+    code and for SLiM to parse. Like the output ``trees_file``, the path to
+    the recombination map can be overridden with a ``-d`` define when
+    running SLiM.
+
+    The tree sequence is simplified every ``simplification_interval``
+    generations. If None, the interval is chosen from the sizes of the
+    epochs and the number of samples. This can also be overridden with a
+    ``-d`` define.
+    """
 
     pop_names = [pc.metadata["id"] for pc in demographic_model.population_configurations]
 
+    # The start times of the model's epochs, going backwards in time.
+    dd = msprime.DemographyDebugger(
+            population_configurations=demographic_model.population_configurations,
+            migration_matrix=demographic_model.migration_matrix,
+            demographic_events=demographic_model.demographic_events)
+    start_times = [epoch.start_time for epoch in dd.epochs]
+    scaling_factors = _epoch_scaling_factors(scaling_factor, len(start_times))
+    uniform_scaling = all(Q == scaling_factors[0] for Q in scaling_factors)
+
     # Reassign event times according to integral SLiM generations.
     # This collapses the time deltas used in HomSap/AmericanAdmixture_4B11.
-    for event in demographic_model.demographic_events:
-        event.time = round(event.time / scaling_factor) * scaling_factor
+    # The events are copied, so that the model itself is left unchanged.
+    # With different scaling factors, the duration of each epoch is rounded
+    # to a whole number of generations of its own scaling factor.
+    rounded_times = {0: 0}
+    for k in range(1, len(start_times)):
+        if uniform_scaling:
+            Q = scaling_factors[0]
+            rounded_times[start_times[k]] = round(start_times[k] / Q) * Q
+        else:
+            # The epoch between start_times[k-1] and start_times[k].
+            Q = scaling_factors[-k]
+            t = rounded_times[start_times[k-1]]
+            rounded_times[start_times[k]] = (
+                t + round((start_times[k] - t) / Q) * Q)
+    demographic_events = copy.deepcopy(demographic_model.demographic_events)
+    for event in demographic_events:
+        event.time = rounded_times[event.time]
+    # The scaling factor of each rounded epoch, going backwards in time.
+    # If rounding collapses several epochs, the oldest one's factor is used.
+    epoch_scaling = {}
+    for k, t in enumerate(start_times):
+        epoch_scaling[rounded_times[t]] = scaling_factors[-k-1]
 
     # The demography debugger constructs event epochs, which we use
     # to define the forwards-time events.
     dd = msprime.DemographyDebugger(
             population_configurations=demographic_model.population_configurations,
             migration_matrix=demographic_model.migration_matrix,
-            demographic_events=demographic_model.demographic_events)
+            demographic_events=demographic_events)
 
     epochs = sorted(dd.epochs, key=lambda e: e.start_time, reverse=True)
     T = [round(e.start_time*demographic_model.generation_time) for e in epochs]
+    scaling_factors = [epoch_scaling[e.start_time] for e in epochs]
+
+    # The number of generations from the end of the burn-in to the end of each
+    # epoch, which are rounded like Eidos' gdiff() function.
+    G_offsets = [0]
+    for i in range(1, len(epochs)):
+        if uniform_scaling:
+            g = (T[0] - T[i]) / demographic_model.generation_time / scaling_factors[0]
+            G_offsets.append(_round_half_away(g))
+        else:
+            g = (T[i-1] - T[i]) / demographic_model.generation_time / scaling_factors[i]
+            G_offsets.append(G_offsets[-1] + _round_half_away(g))
     migration_matrices = [e.migration_matrix for e in epochs]
 
     N = np.empty(shape=(dd.num_populations, len(epochs)), dtype=int)
@@ -411,7 +966,8 @@ def slim_makescript(
                     f"_T[{i}]",
                     de.source,
                     f"_N[{i+1},{de.source}]",
-                    de.dest))
+                    de.dest,
+                    i+1))
 
                 # Zero out the population size for generations before this
                 # epoch, to avoid simulating invididuals that contribute no
@@ -440,35 +996,49 @@ def slim_makescript(
     printsc(' */')
 
     recomb_rates, recomb_ends = msprime_rm_to_slim_rm(contig.recombination_map)
-    indent = 8*" "
-    recomb_rates_str = (
-            "c(\n" +
-            textwrap.fill(
-                    ", ".join(map(str, recomb_rates)),
-                    width=80,
-                    initial_indent=indent,
-                    subsequent_indent=indent) +
-            ")")
-    recomb_ends_str = (
-            "c(\n" +
-            textwrap.fill(
-                    ", ".join(map(str, recomb_ends)),
-                    width=80,
-                    initial_indent=indent,
-                    subsequent_indent=indent) +
-            ")")
+    if recombination_map_file is None:
+        indent = 8*" "
+        recomb_rates_str = (
+                "c(\n" +
+                textwrap.fill(
+                        ", ".join(map(str, recomb_rates)),
+                        width=80,
+                        initial_indent=indent,
+                        subsequent_indent=indent) +
+                ")")
+        recomb_ends_str = (
+                "c(\n" +
+                textwrap.fill(
+                        ", ".join(map(str, recomb_ends)),
+                        width=80,
+                        initial_indent=indent,
+                        subsequent_indent=indent) +
+                ")")
+        recombination_map = string.Template(
+                _slim_recombination_map_inline).substitute(
+                        recombination_rates=recomb_rates_str,
+                        recombination_ends=recomb_ends_str)
+    else:
+        _write_recombination_map(recombination_map_file, recomb_rates, recomb_ends)
+        recombination_map = string.Template(
+                _slim_recombination_map_file).substitute(
+                        recombination_map_file=_eidos_string(
+                            str(recombination_map_file)))
 
     pop_names_str = ', '.join(map(lambda x: f'"{x}"', pop_names))
+    if simplification_interval is None:
+        simplification_interval = _simplification_interval(
+            demographic_model, contig, samples, scaling_factor)
 
     printsc(string.Template(_slim_upper).substitute(
-                scaling_factor=scaling_factor,
+                scaling_factors="c({})".format(", ".join(map(str, scaling_factors))),
                 burn_in=float(burn_in),
                 chromosome_length=int(contig.recombination_map.get_length()),
-                recombination_rates=recomb_rates_str,
-                recombination_ends=recomb_ends_str,
+                recombination_map=recombination_map,
                 mutation_rate=contig.mutation_rate,
                 generation_time=demographic_model.generation_time,
                 trees_file=trees_file,
+                simplification_interval=int(simplification_interval),
                 pop_names=f"c({pop_names_str})"
                 ))
 
@@ -512,6 +1082,12 @@ def slim_makescript(
     printsc('    defineConstant("_T", c({}));'.format(", ".join(map(str, T))))
     printsc()
 
+    printsc('    // Number of generations from the end of the burn-in to the end')
+    printsc('    // of each epoch, in the rescaled model.')
+    printsc('    defineConstant("G_offsets", c({}));'.format(
+        ", ".join(map(str, G_offsets))))
+    printsc()
+
     # Population sizes.
     printsc('    // Population sizes in each epoch.')
     printsc('    _N = ' +
@@ -537,6 +1113,27 @@ def slim_makescript(
             ');')
     printsc()
 
+    # Growth schedules.
+    growth_phases, growth_sizes = _growth_schedules(
+        N, growth_rates, scaling_factors, G_offsets)
+    printsc('    // Population sizes in each generation of the epochs with growth,')
+    printsc('    // from the generation after the start of the epoch. One row for')
+    printsc('    // each population growing in an epoch, with the index of its')
+    printsc('    // first size in growth_sizes.')
+    printsc('    defineConstant("growth_phases", ' +
+            matrix2str(
+                growth_phases,
+                col_comment="epoch, pop, first, generations") +
+            ');')
+    printsc('    defineConstant("growth_sizes", c(\n' +
+            textwrap.fill(
+                ", ".join(map(str, growth_sizes)),
+                width=80,
+                initial_indent=8*" ",
+                subsequent_indent=8*" ") +
+            '));')
+    printsc()
+
     printsc('    no_migration = rep(0, num_populations*num_populations);')
     printsc()
 
@@ -570,7 +1167,7 @@ def slim_makescript(
     printsc('    defineConstant("subpopulation_splits", ' +
             matrix2str(
                 subpopulation_splits,
-                col_comment="time, newpop, size, oldpop") +
+                col_comment="time, newpop, size, oldpop, epoch") +
             ');')
     printsc()
 
@@ -590,18 +1187,18 @@ def slim_makescript(
         (sample.population, round(sample.time * demographic_model.generation_time))
         for sample in samples])
     sampling_episodes = []
-    for (pop, time), count in sample_counts.items():
+    for (pop, sample_time), count in sample_counts.items():
         # SLiM can only sample individuals, which we assume are diploid.
         n_inds = (count+1) // 2
         if count % 2 != 0:
             pop_id = pop_names[pop]
-            gen = time / demographic_model.generation_time
+            gen = sample_time / demographic_model.generation_time
             warnings.warn(stdpopsim.SLiMOddSampleWarning(
                     f"SLiM simulates diploid individuals, so {n_inds} "
                     f"individuals will be sampled for the {count} haploids "
                     f"requested from population {pop_id} at time {gen}. "
                     "See #464."))
-        sampling_episodes.append((pop, n_inds, time))
+        sampling_episodes.append((pop, n_inds, sample_time))
 
     printsc('    // One row for each sampling episode.')
     printsc('    defineConstant("sampling_episodes", ' +
@@ -612,11 +1209,22 @@ def slim_makescript(
 
     printsc(_slim_lower)
 
-    return epochs[0]
+    return _RecapEpoch(
+        populations=[
+            _RecapPopulation(start_size=pop.start_size, growth_rate=pop.growth_rate)
+            for pop in epochs[0].populations],
+        migration_matrix=epochs[0].migration_matrix,
+        epoch_generations=[None] + [
+            G_offsets[i] - G_offsets[i-1] for i in range(1, len(epochs))],
+        scaling_factors=scaling_factors)
 
 
-class SLiMException(Exception):
-    pass
+@functools.lru_cache(maxsize=None)
+def _slim_version(slim_path, mtime):
+    # The modification time is part of the cache key, so that a SLiM binary
+    # that is replaced in place is run again.
+    s = subprocess.check_output([slim_path, "-v"])
+    return s.split()[2].decode("ascii").rstrip(",")
 
 
 class _SLiMEngine(stdpopsim.Engine):
@@ -629,18 +1237,147 @@ class _SLiMEngine(stdpopsim.Engine):
                 author="Haller et al.",
                 reasons={stdpopsim.CiteReason.ENGINE}),
             ]
+    cost_model = {
+        "wall_time": (1e-6, 1),
+        "memory": (2000, 1),
+        "output_size": (1, 1),
+    }
+    cache_ignored_params = ("slim_path", "slim_progress")
 
     def slim_path(self):
         return os.environ.get("SLIM", "slim")
 
-    def get_version(self):
-        s = subprocess.check_output([self.slim_path(), "-v"])
-        return s.split()[2].decode("ascii").rstrip(",")
-
+    def get_version(self, slim_path=None):
+        """
+        Returns the version of SLiM at ``slim_path``, which defaults to
+        :meth:`.slim_path`. The version of each SLiM binary is only looked
+        up once, unless the binary changes.
+        """
+        if slim_path is None:
+            slim_path = self.slim_path()
+        path = shutil.which(slim_path)
+        if path is None:
+            # Let subprocess raise the appropriate error.
+            path = slim_path
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        return _slim_version(path, mtime)
+
+    def _result_cache_version(self, params):
+        return self.get_version(params.get("slim_path"))
+
+    def _from_result_cache(self, ts):
+        return pyslim.SlimTreeSequence(ts)
+
+    def get_cost_features(
+            self, demographic_model, contig, samples, slim_scaling_factor=1.0,
+            slim_burn_in=10.0, slim_recapitation_first=False, slim_time_budget=None,
+            **kwargs):
+        """
+        Returns the features used to estimate the cost of a SLiM simulation.
+        See :meth:`.Engine.get_cost_features`.
+
+        The wall time scales with the number of individual-generations that
+        are simulated forwards in time, including the burn-in, and the memory
+        scales with the size of the largest epoch. Both are weighted by the
+        expected number of recombination breakpoints per genome in the
+        rescaled model. The recapitated output is equivalent to a coalescent
+        simulation, so the output size feature is the coalescent one.
+        """
+        if slim_recapitation_first:
+            slim_burn_in = 0
+        if slim_scaling_factor == "auto":
+            slim_scaling_factor = self.choose_scaling_factor(
+                    demographic_model, contig, samples, slim_time_budget,
+                    slim_burn_in=slim_burn_in)
+        features = stdpopsim.coalescent_cost_features(
+            demographic_model, contig, samples)
+        recomb_map = contig.recombination_map
+        rate = recomb_map.mean_recombination_rate * recomb_map.get_length()
+        epochs = stdpopsim.cost.epoch_sizes(demographic_model)
+        # Scaling factors are given oldest epoch first, but the epoch
+        # sizes are ordered from the most recent epoch.
+        scaling_factors = _epoch_scaling_factors(
+                slim_scaling_factor, len(epochs))[::-1]
+        wall_time = 0
+        memory = 0
+        for j, (start_time, end_time, size) in enumerate(epochs):
+            Q = scaling_factors[j]
+            breakpoints = 1 + Q * rate
+            if j == len(epochs) - 1:
+                # The oldest epoch is simulated for burn_in * N generations.
+                individual_generations = slim_burn_in * size ** 2
+            else:
+                individual_generations = (end_time - start_time) * size
+            wall_time += individual_generations / Q ** 2 * breakpoints
+            memory = max(memory, size / Q * breakpoints)
+        features["wall_time"] = wall_time
+        features["memory"] = memory
+        return features
+
+    def choose_scaling_factor(
+            self, demographic_model, contig, samples, time_budget,
+            slim_burn_in=10.0, slim_recapitation_first=False, cost_estimator=None):
+        """
+        Returns the smallest integer scaling factor for which the estimated
+        wall time of simulating the specified model with SLiM is within the
+        specified budget. This is the scaling factor used when
+        ``slim_scaling_factor`` is "auto" (see :meth:`.simulate`).
+
+        The wall time is estimated from the number of individual-generations
+        in each epoch of the rescaled model (see :meth:`.get_cost_features`),
+        so the same inputs always give the same scaling factor. Rescaling
+        cannot reduce any population to less than one individual, so if the
+        budget can't be met by a scaling factor up to the smallest population
+        size in the model, a ValueError is raised.
+
+        :param time_budget: The wall time budget, in seconds.
+        :type time_budget: float
+        :param cost_estimator: The cost estimator used to estimate the wall
+            time. If None, the uncalibrated defaults are used.
+        :type cost_estimator: :class:`.CostEstimator`
+        :rtype: int
+        """
+        if time_budget is None or time_budget <= 0:
+            raise ValueError(
+                "A positive time budget is required to choose the scaling factor")
+        if cost_estimator is None:
+            cost_estimator = stdpopsim.CostEstimator()
+
+        def fits(Q):
+            estimate = cost_estimator.estimate(
+                self, demographic_model, contig, samples, slim_scaling_factor=Q,
+                slim_burn_in=slim_burn_in,
+                slim_recapitation_first=slim_recapitation_first)
+            return estimate.wall_time <= time_budget
+
+        # The estimated wall time decreases with Q, so we bisect for the
+        # smallest Q that fits.
+        min_size = min(_min_population_sizes(demographic_model))
+        lo, hi = 0, max(1, int(min_size))
+        if not fits(hi):
+            raise ValueError(
+                f"The estimated wall time exceeds the budget of {time_budget}s "
+                f"for all scaling factors up to {hi}")
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if fits(mid):
+                hi = mid
+            else:
+                lo = mid
+        logger.info(
+            f"Chose scaling factor {hi} for a wall time budget of {time_budget}s")
+        return hi
+
+    @stdpopsim.engines._cached_simulate
     def simulate(
             self, demographic_model=None, contig=None, samples=None, seed=None,
             slim_path=None, slim_script=False, slim_scaling_factor=1.0,
-            slim_burn_in=10.0, dry_run=False):
+            slim_burn_in=10.0, slim_burn_in_checkpoint=False,
+            slim_recapitation_first=False, slim_progress=None, slim_time_budget=None,
+            slim_simplification_interval=None, dry_run=False):
         """
         Simulate the demographic model using SLiM.
         See :meth:`.Engine.simulate()` for definitions of the
@@ -660,29 +1397,85 @@ class _SLiMEngine(stdpopsim.Engine):
             rate, and growth rates are multiplied by the factor.
             See SLiM manual: `5.5 Rescaling population sizes to improve
             simulation performance.`
-        :type slim_scaling_factor: float
+            A list with one factor for each epoch of the model, oldest first,
+            may be given instead, e.g. to rescale only the deep past.
+            The rates are changed at the start of each epoch, and times
+            in the output are converted back using each epoch's factor.
+            If "auto", the smallest integer factor for which the estimated
+            wall time fits in ``slim_time_budget`` is used
+            (see :meth:`.choose_scaling_factor`).
+        :type slim_scaling_factor: float, list or str
         :param slim_burn_in: Length of the burn-in phase, in units of N
             generations.
         :type slim_burn_in: float
+        :param slim_burn_in_checkpoint: If True, the state of the population
+            at the end of the burn-in phase is saved in the checkpoint cache
+            (see :func:`.set_checkpoint_cache`) the first time that the model
+            is simulated for a given contig, scaling factor, burn-in length
+            and SLiM version.
+            Later simulations load the saved state and only simulate the
+            generations after the burn-in, with their own seed.
+            All of these simulations then share the same ancestral
+            population, so they are not independent: see the warning below.
+        :type slim_burn_in_checkpoint: bool
+        :param slim_recapitation_first: If True, the burn-in phase is skipped
+            (i.e., ``slim_burn_in`` is set to zero), and SLiM starts
+            simulating from the beginning of the oldest epoch of the model.
+            The genealogy before this time is then entirely simulated by
+            recapitation with msprime, using the population sizes, growth
+            rates and migration rates of the oldest epoch. As the models
+            are neutral, this is statistically equivalent to a burn-in, and
+            avoids the (usually) most expensive phase of the forwards
+            simulation. This would not be appropriate for models with
+            selection in the oldest epoch.
+        :type slim_recapitation_first: bool
+        :param slim_progress: A function that is called with a
+            :class:`.SLiMProgress` instance whenever SLiM reports its progress
+            (up to 1000 times per simulation). To stop a simulation, e.g.,
+            if its estimated time remaining is too long, the function can
+            raise an exception, which kills SLiM and is propagated to the
+            caller.
+        :type slim_progress: callable
+        :param slim_time_budget: The wall time budget for the simulation, in
+            seconds, used to choose the scaling factor if
+            ``slim_scaling_factor`` is "auto".
+        :type slim_time_budget: float
+        :param slim_simplification_interval: The number of SLiM generations
+            between simplifications of the tree sequence. Simplifying more
+            often takes more CPU time, but reduces SLiM's peak memory usage.
+            If None, the interval is chosen from the rescaled population
+            sizes and the number of samples, so that the tree sequence tables
+            grow by about a factor of 10 between simplifications.
+        :type slim_simplification_interval: int
         :param dry_run: If True, run the first generation setup and then end the
             simulation.
         :type dry_run: bool
-        """
 
-        if slim_scaling_factor <= 0:
-            raise ValueError("slim_scaling_factor must be positive")
-        if slim_burn_in < 0:
-            raise ValueError("slim_burn_in must be non-negative")
-
-        if slim_scaling_factor != 1:
-            warnings.warn(stdpopsim.SLiMScalingFactorWarning(
-                f"You're using a scaling factor ({slim_scaling_factor}). "
-                "This should give similar results for many situations, "
-                "but is not equivalent, especially in the presence of selection. "
-                "When using rescaling, you should be careful---do checks and "
-                "compare results across different values of the scaling factor."))
+        .. warning::
+            Simulations using a burn-in checkpoint share the genealogies of
+            the ancestral population at the end of the burn-in. Lineages
+            that have not coalesced by then (which, for a burn-in of
+            ``10 * N`` generations, are mostly those of long-lasting
+            ancestral polymorphisms and deep gene trees) are therefore
+            correlated between replicates. This is acceptable for analyses
+            that only use recent parts of the genealogy, or that treat the
+            replicates of a single parameter set as one sample (e.g.,
+            checking that an inference method runs, or comparing methods on
+            the same data). It is not acceptable for analyses that rely on
+            replicates being independent, such as estimating the variance of
+            a statistic between replicates, or computing coverage or p-values
+            from replicates. The checkpoint is not used with a burn-in of zero.
+        """
 
-        run_slim = not slim_script
+        if slim_recapitation_first:
+            slim_burn_in = 0
+        if slim_scaling_factor == "auto":
+            slim_scaling_factor = self.choose_scaling_factor(
+                    demographic_model, contig, samples, slim_time_budget,
+                    slim_burn_in=slim_burn_in)
+        self._check_params(
+                slim_scaling_factor, slim_burn_in, demographic_model,
+                slim_simplification_interval)
 
         mutation_rate = contig.mutation_rate
         # Ensure no mutations are introduced by SLiM.
@@ -691,44 +1484,474 @@ class _SLiMEngine(stdpopsim.Engine):
                 mutation_rate=0,
                 genetic_map=contig.genetic_map)
 
-        mktemp = functools.partial(tempfile.NamedTemporaryFile, mode="w")
+        result = self._simulate_tables(
+                demographic_model, contig, samples, seed, slim_path, slim_script,
+                slim_scaling_factor, slim_burn_in, slim_burn_in_checkpoint,
+                slim_progress, slim_simplification_interval, dry_run)
+        if result is None:
+            return None
+        tables, recap_epoch = result
 
-        @contextlib.contextmanager
-        def script_file_f():
-            f = mktemp(suffix=".slim") if not slim_script else sys.stdout
-            yield f
-            # Don't close sys.stdout.
-            if not slim_script:
-                f.close()
+        ts = self._recap_and_rescale(
+                tables, seed, recap_epoch, contig, mutation_rate)
+        return ts
 
-        with script_file_f() as script_file, mktemp(suffix=".ts") as ts_file:
+    def _simulate_tables(
+            self, demographic_model, contig, samples, seed, slim_path, slim_script,
+            scaling_factor, burn_in, burn_in_checkpoint, progress,
+            simplification_interval, dry_run):
+        """
+        Runs SLiM for the specified contig, which must have a mutation rate of
+        zero, and returns the tuple (tables, recap_epoch) of the tables output
+        by SLiM and the epoch used for recapitation. Returns None if
+        ``slim_script`` or ``dry_run`` is True. See :meth:`.simulate` for the
+        definitions of the parameters.
+        """
+        if slim_script:
+            mktemp = functools.partial(tempfile.NamedTemporaryFile, mode="w")
+            with mktemp(suffix=".ts") as ts_file:
+                slim_makescript(
+                        sys.stdout, ts_file.name,
+                        demographic_model, contig, samples,
+                        scaling_factor, burn_in,
+                        simplification_interval=simplification_interval)
+            return None
+
+        checkpoint_key = None
+        if burn_in_checkpoint:
+            checkpoint_key = self._checkpoint_key(
+                    demographic_model, contig, scaling_factor, burn_in,
+                    slim_path=slim_path)
+
+        scratch_space = self._scratch_space(
+                demographic_model, contig, samples, scaling_factor, burn_in)
+        with self._script(
+                demographic_model, contig, samples, scaling_factor,
+                burn_in) as (script_file, recomb_file, recap_epoch):
+            tables = self._run_ancestry(
+                    script_file, recomb_file, slim_path=slim_path, seed=seed,
+                    dry_run=dry_run, checkpoint_key=checkpoint_key,
+                    progress=progress, scratch_space=scratch_space,
+                    simplification_interval=simplification_interval)
+            if dry_run:
+                return None
+        return tables, recap_epoch
 
-            recap_epoch = slim_makescript(
-                    script_file, ts_file.name,
-                    demographic_model, contig, samples,
-                    slim_scaling_factor, slim_burn_in)
+    def simulate_chromosomes(
+            self, demographic_model=None, contigs=None, samples=None, seed=None,
+            slim_path=None, slim_script=False, slim_scaling_factor=1.0,
+            slim_burn_in=10.0, slim_burn_in_checkpoint=False,
+            slim_recapitation_first=False, slim_progress=None, slim_time_budget=None,
+            slim_simplification_interval=None, dry_run=False):
+        """
+        Simulate the demographic model for several unlinked contigs in a
+        single SLiM run. See :meth:`.Engine.simulate_chromosomes()` for
+        definitions of parameters defined for all engines, and
+        :meth:`.simulate()` for the SLiM specific parameters.
+
+        The cost of a forward simulation depends mostly on the population
+        sizes and the number of generations, rather than on the length of
+        the genome, so simulating all of the contigs together is much faster
+        than simulating each of them separately. The contigs are joined into
+        a single chromosome, separated by one base with a recombination rate
+        of 1/2, which is unchanged by rescaling. The ancestry before the
+        start of the SLiM simulation is recapitated with the same unlinked
+        boundaries, and the mean recombination rate of each contig.
+        Mutations are added to each contig separately, using the contig's
+        own mutation rate. As SLiM simulates whole bases, the length of each
+        contig is rounded down to an integer.
+        """
+        if slim_recapitation_first:
+            slim_burn_in = 0
 
-            script_file.flush()
+        contigs = [
+            stdpopsim.Contig(
+                recombination_map=_truncate_recombination_map(c.recombination_map),
+                mutation_rate=c.mutation_rate, genetic_map=c.genetic_map)
+            for c in contigs]
 
-            if not run_slim:
-                return None
+        joined_map, starts = stdpopsim.engines._join_recombination_maps(
+                contigs, 0.5)
+        # Ensure no mutations are introduced by SLiM.
+        contig = stdpopsim.Contig(recombination_map=joined_map, mutation_rate=0)
+
+        if slim_scaling_factor == "auto":
+            slim_scaling_factor = self.choose_scaling_factor(
+                    demographic_model, contig, samples, slim_time_budget,
+                    slim_burn_in=slim_burn_in)
+        self._check_params(
+                slim_scaling_factor, slim_burn_in, demographic_model,
+                slim_simplification_interval)
+
+        result = self._simulate_tables(
+                demographic_model, contig, samples, seed, slim_path, slim_script,
+                slim_scaling_factor, slim_burn_in, slim_burn_in_checkpoint,
+                slim_progress, slim_simplification_interval, dry_run)
+        if result is None:
+            return None
+        tables, recap_epoch = result
 
-            self._run_slim(
-                    script_file.name, slim_path=slim_path, seed=seed,
-                    dry_run=dry_run)
+        rng = random.Random(seed)
+        recap_seed = rng.randrange(1, 2**32)
+        mutation_seeds = [rng.randrange(1, 2**32) for _ in contigs]
+        # Recapitation uses the mean rate of each contig, as for a single
+        # contig, and msprime's equivalent of the unlinked boundaries.
+        recap_map, _ = stdpopsim.engines._join_recombination_maps(
+                [
+                    stdpopsim.Contig(recombination_map=msprime.RecombinationMap(
+                        [0, c.recombination_map.get_length()],
+                        [c.recombination_map.mean_recombination_rate, 0]))
+                    for c in contigs],
+                stdpopsim.engines._UNLINKED_RECOMBINATION_RATE)
+        ts = self._recap_and_rescale(
+                tables, recap_seed, recap_epoch, contig, 0,
+                recombination_map=recap_map)
+
+        with stdpopsim.record_phase("simplification"):
+            lengths = [c.recombination_map.get_length() for c in contigs]
+            ts_list = stdpopsim.engines._split_tree_sequence(ts, starts, lengths)
+        return [
+            pyslim.SlimTreeSequence(
+                self._mutate(chrom_ts, c.mutation_rate, seed=mutation_seed)
+                if c.mutation_rate > 0 else chrom_ts)
+            for chrom_ts, c, mutation_seed in zip(ts_list, contigs, mutation_seeds)]
+
+    def _scratch_space(self, demographic_model, contig, samples, scaling_factor,
+                       burn_in):
+        """
+        Returns the approximate size of the files output by SLiM, in bytes,
+        which is used to choose the scratch directory (see
+        :func:`.get_scratch_dir`). SLiM writes the tree sequence from memory,
+        so its size is bounded by SLiM's estimated peak memory usage.
+        """
+        features = self.get_cost_features(
+                demographic_model, contig, samples,
+                slim_scaling_factor=scaling_factor, slim_burn_in=burn_in)
+        a, b = self.cost_model["memory"]
+        return a * features["memory"] ** b
 
-            if dry_run:
-                return None
+    def _script_space(self, contig):
+        """
+        Returns the approximate size of the script and recombination map
+        files generated for the specified contig, in bytes, which is used to
+        choose the scratch directory (see :func:`.get_scratch_dir`). The
+        recombination map dominates for contigs with a genetic map, with one
+        rate and one end position written per interval.
+        """
+        num_intervals = len(contig.recombination_map.get_positions())
+        return _SCRIPT_SIZE + num_intervals * _RECOMBINATION_MAP_INTERVAL_SIZE
 
-            ts = pyslim.load(ts_file.name)
+    def _checkpoint_key(
+            self, demographic_model, contig, scaling_factor, burn_in,
+            slim_path=None):
+        """
+        Returns the checkpoint cache key for the burn-in checkpoint of the
+        specified inputs, or None if the burn-in is empty. The population at
+        the end of the burn-in doesn't depend on the samples, so these are
+        not part of the key. The SLiM version is, as SLiM may not be able to
+        read populations saved by other versions.
+        """
+        cache = stdpopsim.get_checkpoint_cache()
+        if cache is None:
+            raise ValueError(
+                "slim_burn_in_checkpoint requires the checkpoint cache to be enabled")
+        if burn_in == 0:
+            return None
+        params = {
+            "scaling_factor": scaling_factor, "burn_in": burn_in,
+            "slim_version": self.get_version(slim_path)}
+        return cache.key(self, demographic_model, contig, [], params)
+
+    def _run_ancestry(
+            self, script_file, recombination_map_file, slim_path=None, seed=None,
+            dry_run=False, checkpoint_key=None, buffer_output=False, progress=None,
+            scratch_space=0, simplification_interval=None):
+        """
+        Runs the specified SLiM script, and returns the tables of the tree
+        sequence output by SLiM, or None if ``dry_run`` is True. SLiM's output
+        is written to the scratch directory (see :func:`.get_scratch_dir`),
+        assuming that it takes ``scratch_space`` bytes, and is loaded directly
+        into tables, which can be modified without copying them.
+
+        If ``checkpoint_key`` is not None, the population at the end of the
+        burn-in is loaded from the checkpoint cache entry with this key, if
+        it exists. Otherwise, it is saved to the cache once SLiM has run
+        successfully.
+
+        If ``simplification_interval`` is not None, it overrides the
+        simplification interval defined in the script.
+        """
+        cache = stdpopsim.get_checkpoint_cache()
+        defines = {}
+        if simplification_interval is not None:
+            defines["simplification_interval"] = simplification_interval
+        save_checkpoint = None
+        scratch_dir = stdpopsim.get_scratch_dir(scratch_space)
+        if scratch_dir is not None:
+            scratch_dir = str(scratch_dir)
+        with tempfile.TemporaryDirectory(
+                prefix="stdpopsim_", dir=scratch_dir) as tmpdir:
+            if checkpoint_key is not None and not dry_run:
+                cached = cache.get(self, checkpoint_key, [".trees"])
+                if cached is not None:
+                    paths, _ = cached
+                    defines["burn_in_checkpoint"] = str(paths[".trees"])
+                    defines["load_burn_in_checkpoint"] = True
+                else:
+                    save_checkpoint = os.path.join(tmpdir, "burn_in.trees")
+                    defines["burn_in_checkpoint"] = save_checkpoint
+            trees_file = os.path.join(tmpdir, "out.trees")
+
+            with stdpopsim.record_phase("ancestry"):
+                self._run_slim(
+                        script_file, slim_path=slim_path, seed=seed,
+                        dry_run=dry_run, trees_file=trees_file,
+                        recombination_map_file=recombination_map_file,
+                        buffer_output=buffer_output, progress=progress, **defines)
+                if dry_run:
+                    return None
+                tables = tskit.TableCollection.load(trees_file)
+
+            if save_checkpoint is not None and os.path.exists(save_checkpoint):
+                cache.put(self, checkpoint_key, {".trees": save_checkpoint}, {})
+        return tables
+
+    def _check_params(self, slim_scaling_factor, slim_burn_in, demographic_model,
+                      slim_simplification_interval=None):
+        min_sizes = _min_population_sizes(demographic_model)
+        scaling_factors = _epoch_scaling_factors(slim_scaling_factor, len(min_sizes))
+        if any(Q <= 0 for Q in scaling_factors):
+            raise ValueError("slim_scaling_factor must be positive")
+        if slim_burn_in < 0:
+            raise ValueError("slim_burn_in must be non-negative")
+        if slim_simplification_interval is not None and slim_simplification_interval < 1:
+            raise ValueError("slim_simplification_interval must be at least 1")
+
+        for min_size, Q in zip(min_sizes, scaling_factors):
+            if min_size / Q < _MIN_RESCALED_SIZE:
+                warnings.warn(stdpopsim.SLiMScalingFactorWarning(
+                    f"The scaling factor ({Q}) is large relative to the "
+                    f"smallest population size in its epoch ({min_size}), "
+                    f"which is rescaled to fewer than {_MIN_RESCALED_SIZE} "
+                    "individuals. Drift in the rescaled population may be "
+                    "unrealistically strong."))
+                break
+
+        if any(Q != 1 for Q in scaling_factors):
+            warnings.warn(stdpopsim.SLiMScalingFactorWarning(
+                f"You're using a scaling factor ({slim_scaling_factor}). "
+                "This should give similar results for many situations, "
+                "but is not equivalent, especially in the presence of selection. "
+                "When using rescaling, you should be careful---do checks and "
+                "compare results across different values of the scaling factor."))
 
-        ts = self._recap_and_rescale(
-                ts, seed, recap_epoch, contig, mutation_rate, slim_scaling_factor)
-        return ts
+    def simulate_replicates(
+            self, demographic_model=None, contig=None, samples=None, seed=None,
+            num_replicates=1, dry_run=False, slim_path=None, slim_script=False,
+            slim_scaling_factor=1.0, slim_burn_in=10.0, slim_burn_in_checkpoint=False,
+            slim_recapitation_first=False, slim_progress=None, slim_time_budget=None,
+            slim_simplification_interval=None, num_processes=None, max_retries=1):
+        """
+        Returns an iterator over replicate simulations of the demographic
+        model using SLiM. See :meth:`.Engine.simulate_replicates()` and
+        :meth:`.simulate()` for definitions of the parameters.
+
+        The SLiM script is generated once, and up to ``num_processes`` SLiM
+        processes are run concurrently. Each replicate is recapitated and
+        simplified as soon as its SLiM run finishes, while other replicates
+        are still running. The output of each SLiM process is logged in one
+        block when it finishes, so the output of concurrent runs isn't
+        interleaved. The replicates are returned in seed order, and are
+        identical to those of the default implementation, which runs
+        :meth:`.simulate()` for each replicate in turn.
+
+        The ``slim_progress`` function is called from the threads running
+        each replicate, so may be called concurrently. The ``seed`` of the
+        progress reports identifies the replicate.
+
+        If ``slim_burn_in_checkpoint`` is True and the burn-in checkpoint
+        isn't already saved, the first replicate is run on its own to save
+        the checkpoint, and the other replicates then load it.
+
+        :param num_processes: The maximum number of SLiM processes to run
+            at the same time. Defaults to the number of CPUs available.
+        :type num_processes: int
+        :param max_retries: The number of times to rerun a replicate (with
+            the same seed) if SLiM fails, e.g., because the process was killed.
+        :type max_retries: int
+        """
+        if num_replicates < 1:
+            raise ValueError("num_replicates must be at least 1")
+        if max_retries < 0:
+            raise ValueError("max_retries must be non-negative")
+        if dry_run or slim_script:
+            self.simulate(
+                    demographic_model=demographic_model, contig=contig,
+                    samples=samples, seed=seed, slim_path=slim_path,
+                    slim_script=slim_script, slim_scaling_factor=slim_scaling_factor,
+                    slim_burn_in=slim_burn_in,
+                    slim_recapitation_first=slim_recapitation_first,
+                    slim_progress=slim_progress, slim_time_budget=slim_time_budget,
+                    slim_simplification_interval=slim_simplification_interval,
+                    dry_run=dry_run)
+            return iter([])
+        if slim_recapitation_first:
+            slim_burn_in = 0
+        if slim_scaling_factor == "auto":
+            slim_scaling_factor = self.choose_scaling_factor(
+                    demographic_model, contig, samples, slim_time_budget,
+                    slim_burn_in=slim_burn_in)
+        self._check_params(
+                slim_scaling_factor, slim_burn_in, demographic_model,
+                slim_simplification_interval)
+        if num_processes is None:
+            num_processes = os.cpu_count()
+        checkpoint_key = None
+        if slim_burn_in_checkpoint:
+            checkpoint_key = self._checkpoint_key(
+                    demographic_model, contig, slim_scaling_factor, slim_burn_in,
+                    slim_path=slim_path)
+
+        mutation_rate = contig.mutation_rate
+        # Ensure no mutations are introduced by SLiM.
+        contig = stdpopsim.Contig(
+                recombination_map=contig.recombination_map,
+                mutation_rate=0,
+                genetic_map=contig.genetic_map)
 
-    def _run_slim(self, script_file, slim_path=None, seed=None, dry_run=False):
+        rng = random.Random(seed)
+        seeds = [rng.randrange(1, 2**32) for _ in range(num_replicates)]
+        # Up to num_processes SLiM processes write their output at once.
+        scratch_space = num_processes * self._scratch_space(
+                demographic_model, contig, samples, slim_scaling_factor,
+                slim_burn_in)
+
+        def replicates():
+            with self._script(
+                    demographic_model, contig, samples, slim_scaling_factor,
+                    slim_burn_in) as (script_file, recomb_file, recap_epoch):
+
+                def replicate(rep_seed):
+                    with stdpopsim.record_metrics() as metrics:
+                        for attempt in range(max_retries + 1):
+                            try:
+                                tables = self._run_ancestry(
+                                        script_file, recomb_file, slim_path=slim_path,
+                                        seed=rep_seed, checkpoint_key=checkpoint_key,
+                                        buffer_output=True, progress=slim_progress,
+                                        scratch_space=scratch_space,
+                                        simplification_interval=(
+                                            slim_simplification_interval))
+                                break
+                            except stdpopsim.SLiMException as e:
+                                if attempt == max_retries:
+                                    raise
+                                logger.warning(
+                                    f"SLiM failed for seed {rep_seed}, retrying: {e}")
+                        ts = self._recap_and_rescale(
+                                tables, rep_seed, recap_epoch, contig, mutation_rate)
+                    return ts, metrics
+
+                # SLiM runs in a subprocess, so threads are enough to run several
+                # at once. Only a bounded number of replicates are submitted ahead
+                # of the one being returned, to limit the number of finished tree
+                # sequences held in memory.
+                recorders = stdpopsim.metrics._recorders()
+                pending = collections.deque()
+                with concurrent.futures.ThreadPoolExecutor(num_processes) as executor:
+                    try:
+                        save_checkpoint = (
+                            checkpoint_key is not None and
+                            stdpopsim.get_checkpoint_cache().get(
+                                self, checkpoint_key, [".trees"]) is None)
+                        for rep_seed in seeds:
+                            pending.append(executor.submit(replicate, rep_seed))
+                            if save_checkpoint:
+                                # The first replicate saves the checkpoint.
+                                concurrent.futures.wait(pending)
+                                save_checkpoint = False
+                            if len(pending) < 2 * num_processes:
+                                continue
+                            ts, metrics = pending.popleft().result()
+                            if len(recorders) > 0:
+                                recorders[-1].phases.extend(metrics.phases)
+                            yield ts
+                        while len(pending) > 0:
+                            ts, metrics = pending.popleft().result()
+                            if len(recorders) > 0:
+                                recorders[-1].phases.extend(metrics.phases)
+                            yield ts
+                    finally:
+                        for future in pending:
+                            future.cancel()
+
+        return replicates()
+
+    @contextlib.contextmanager
+    def _script(self, demographic_model, contig, samples, scaling_factor, burn_in):
+        """
+        Context manager that yields the tuple (script_file,
+        recombination_map_file, recap_epoch) for the SLiM script simulating
+        the specified inputs. The script takes the output file, recombination
+        map file and dry run flag as ``-d`` defines (see :meth:`._run_slim`),
+        so it doesn't depend on these or on the seed.
+
+        If the script cache is enabled (see :func:`.set_script_cache`) and
+        contains the script, the cached script is used. Otherwise, the script
+        is generated, and is added to the cache if the body of the with
+        statement completes without an exception, i.e., once SLiM has run
+        the script successfully.
         """
-        Run SLiM.
+        suffixes = (".slim", ".recomb")
+        cache = stdpopsim.get_script_cache()
+        if cache is not None:
+            params = {"scaling_factor": scaling_factor, "burn_in": burn_in}
+            key = cache.key(self, demographic_model, contig, samples, params)
+            cached = cache.get(self, key, suffixes)
+            if cached is not None:
+                paths, metadata = cached
+                yield (
+                    str(paths[".slim"]), str(paths[".recomb"]),
+                    _recap_epoch_from_dict(metadata["recap_epoch"]))
+                return
+
+        scratch_dir = stdpopsim.get_scratch_dir(self._script_space(contig))
+        if scratch_dir is not None:
+            scratch_dir = str(scratch_dir)
+        with tempfile.TemporaryDirectory(
+                prefix="stdpopsim_", dir=scratch_dir) as tmpdir:
+            files = {
+                suffix: os.path.join(tmpdir, "script" + suffix)
+                for suffix in suffixes}
+            with stdpopsim.record_phase("script_generation"):
+                with open(files[".slim"], "w") as script_file:
+                    recap_epoch = slim_makescript(
+                            script_file, _DEFAULT_TREES_FILE,
+                            demographic_model, contig, samples,
+                            scaling_factor, burn_in,
+                            recombination_map_file=files[".recomb"])
+
+            yield files[".slim"], files[".recomb"], recap_epoch
+
+            if cache is not None:
+                metadata = {"recap_epoch": _recap_epoch_asdict(recap_epoch)}
+                cache.put(self, key, files, metadata)
+
+    def _run_slim(
+            self, script_file, slim_path=None, seed=None, dry_run=False,
+            trees_file=None, recombination_map_file=None, buffer_output=False,
+            burn_in_checkpoint=None, load_burn_in_checkpoint=False,
+            progress=None, simplification_interval=None):
+        """
+        Run SLiM. If specified, the ``trees_file`` and
+        ``recombination_map_file`` override the output file and the
+        recombination map file defined in the script.
+
+        If ``burn_in_checkpoint`` is specified, the population at the end of
+        the burn-in is saved to this file, or if ``load_burn_in_checkpoint``
+        is True, loaded from this file in place of simulating the burn-in.
+        If specified, ``simplification_interval`` overrides the number of
+        generations between simplifications defined in the script.
 
         We capture the output using Popen's line-oriented text buffering
         (bufsize=1, universal_newlines=True) and redirect all messages to
@@ -738,6 +1961,15 @@ class _SLiMEngine(stdpopsim.Engine):
         All other output on stdout is given the DEBUG loglevel.
         ERROR messages, and any output from SLiM on stderr, will raise a
         SLiMException here.
+
+        If ``buffer_output`` is True, the output is instead collected until
+        SLiM exits, and then logged in one block, so that the output of
+        SLiM processes running concurrently isn't interleaved.
+
+        If ``progress`` is not None, the script reports its progress, and
+        ``progress`` is called with a :class:`.SLiMProgress` for each report
+        as soon as it is output. If ``progress`` raises an exception, SLiM
+        is killed and the exception is propagated.
         """
         if slim_path is None:
             slim_path = self.slim_path()
@@ -746,74 +1978,130 @@ class _SLiMEngine(stdpopsim.Engine):
             slim_cmd.extend(["-s", f"{seed}"])
         if dry_run:
             slim_cmd.extend(["-d", "dry_run=T"])
+        if trees_file is not None:
+            slim_cmd.extend(["-d", f"trees_file={_eidos_string(trees_file)}"])
+        if recombination_map_file is not None:
+            slim_cmd.extend([
+                "-d",
+                f"recombination_map_file={_eidos_string(recombination_map_file)}"])
+        if burn_in_checkpoint is not None:
+            slim_cmd.extend([
+                "-d", f"burn_in_checkpoint={_eidos_string(burn_in_checkpoint)}"])
+            if load_burn_in_checkpoint:
+                slim_cmd.extend(["-d", "load_burn_in_checkpoint=T"])
+        if simplification_interval is not None:
+            slim_cmd.extend([
+                "-d", f"simplification_interval={int(simplification_interval)}"])
+        if progress is not None:
+            slim_cmd.extend(["-d", "progress=T"])
+            parser = _ProgressParser(seed=seed)
         slim_cmd.append(script_file)
 
+        start_time = time.perf_counter()
         with subprocess.Popen(
                 slim_cmd, bufsize=1, universal_newlines=True,
                 stdout=subprocess.PIPE, stderr=subprocess.PIPE) as proc:
-            for line in proc.stdout:
-                line = line.rstrip()
-                if line.startswith("ERROR: "):
-                    logger.error(line[len("ERROR: "):])
-                elif line.startswith("WARNING: "):
-                    warnings.warn(stdpopsim.UnspecifiedSLiMWarning(
-                        line[len("WARNING: "):]))
-                else:
-                    # filter `dbg` function calls that generate output
-                    line = line.replace("dbg(self.source); ", "")
-                    logger.debug(line)
+            output = []
+            try:
+                for line in proc.stdout:
+                    if progress is not None and line.startswith(parser.prefix):
+                        progress(parser.parse(line))
+                    elif buffer_output:
+                        output.append(line)
+                    else:
+                        _log_slim_output([line])
+            except BaseException:
+                proc.kill()
+                raise
             stderr = proc.stderr.read()
+            _wait_slim(proc, start_time)
+            if buffer_output:
+                with _slim_output_lock:
+                    logger.debug(f"Output of {' '.join(slim_cmd)}:")
+                    _log_slim_output(output)
 
         if proc.returncode != 0 or stderr:
-            raise SLiMException(
+            raise stdpopsim.SLiMException(
                     f"{slim_path} exited with code {proc.returncode}.\n"
                     f"{stderr}")
 
-    def _simplify_remembered(self, ts):
+    def _recap_and_rescale(self, tables, seed, recap_epoch, contig, mutation_rate,
+                           recombination_map=None):
         """
-        Remove all samples except those individuals that were explicity
-        sampled in SLiM with sim.treeSeqRememberIndividuals().
+        Apply post-SLiM transformations to the ``tables`` output by SLiM,
+        which are modified in place. This rescales node times, does
+        recapitation, simplification, and adds neutral mutations.
+        Recapitation uses the mean recombination rate of the contig, unless
+        a ``recombination_map`` is specified.
+
+        The tables are only wrapped in a :class:`pyslim.SlimTreeSequence`,
+        which decodes the metadata of every individual, where pyslim needs
+        it: for recapitation, and for the returned tree sequence.
         """
-        nodes = itertools.chain.from_iterable(
-                    i.nodes for i in ts.individuals()
-                    if i.flags & pyslim.INDIVIDUAL_REMEMBERED)
-        return ts.simplify(samples=list(nodes), filter_populations=False)
-
-    def _recap_and_rescale(
-            self, ts, seed, recap_epoch, contig, mutation_rate, slim_scaling_factor):
-        """
-        Apply post-SLiM transformations to ``ts``. This rescales node times,
-        does recapitation, simplification, and adds neutral mutations.
-        """
-        # Node times come from SLiM generation numbers, which may have been
-        # divided by a scaling factor for computational tractability.
-        tables = ts.dump_tables()
-        for table in (tables.nodes, tables.migrations):
-            table.time *= slim_scaling_factor
-        ts = pyslim.SlimTreeSequence.load_tables(tables)
-        ts.slim_generation *= slim_scaling_factor
-
         rng = random.Random(seed)
         s1, s2 = rng.randrange(1, 2**32), rng.randrange(1, 2**32)
 
-        population_configurations = [
-                msprime.PopulationConfiguration(
-                    initial_size=pop.start_size,
-                    growth_rate=pop.growth_rate)
-                for pop in recap_epoch.populations]
-        ts = ts.recapitate(
-                recombination_rate=contig.recombination_map.mean_recombination_rate,
-                population_configurations=population_configurations,
-                migration_matrix=recap_epoch.migration_matrix,
-                random_seed=s1)
-
-        ts = self._simplify_remembered(ts)
+        with stdpopsim.record_phase("recapitation"):
+            # Recapitation only adds nodes, so the IDs of the remembered
+            # nodes are unchanged.
+            samples = _remembered_nodes(tables)
+            # Node times come from SLiM generation numbers, which may have been
+            # divided by a scaling factor for computational tractability.
+            for table in (tables.nodes, tables.migrations):
+                table.time = _rescale_times(table.time, recap_epoch)
+            ts = pyslim.SlimTreeSequence.load_tables(tables)
+            ts.slim_generation = float(
+                    _rescale_times(ts.slim_generation, recap_epoch))
+
+            population_configurations = [
+                    msprime.PopulationConfiguration(
+                        initial_size=pop.start_size,
+                        growth_rate=pop.growth_rate)
+                    for pop in recap_epoch.populations]
+            if recombination_map is None:
+                recombination = {
+                    "recombination_rate":
+                        contig.recombination_map.mean_recombination_rate}
+            else:
+                recombination = {"recombination_map": recombination_map}
+            ts = ts.recapitate(
+                    **recombination,
+                    population_configurations=population_configurations,
+                    migration_matrix=recap_epoch.migration_matrix,
+                    random_seed=s1)
+
+        with stdpopsim.record_phase("simplification"):
+            tables = ts.dump_tables()
+            del ts
+            tables.simplify(samples=samples, filter_populations=False)
+            ts = tables.tree_sequence()
+            del tables
+
+        # Add neutral mutations, unless only the ancestry was requested.
+        if mutation_rate > 0:
+            ts = self._mutate(ts, mutation_rate, seed=s2)
+
+        return pyslim.SlimTreeSequence(ts)
+
+    def _mutate(self, ts, mutation_rate, seed=None):
+        """
+        Returns a copy of the specified tree sequence with neutral mutations
+        added, as a :class:`tskit.TreeSequence`.
+        """
+        with stdpopsim.record_phase("mutation"):
+            return msprime.mutate(
+                ts, rate=mutation_rate, keep=True, random_seed=seed)
 
-        # Add neutral mutations.
-        ts = pyslim.SlimTreeSequence(msprime.mutate(
-            ts, rate=mutation_rate, keep=True, random_seed=s2))
+    def add_mutations(self, ts, mutation_rate, seed=None):
+        """
+        Returns a copy of the specified tree sequence with neutral mutations
+        added at the specified rate, keeping any existing mutations.
+        See :meth:`.Engine.add_mutations`.
 
-        return ts
+        :return: A succinct tree sequence.
+        :rtype: :class:`pyslim.SlimTreeSequence`
+        """
+        return pyslim.SlimTreeSequence(self._mutate(ts, mutation_rate, seed=seed))
 
     def recap_and_rescale(
             self, ts, demographic_model, contig, samples,
@@ -848,10 +2136,5 @@ class _SLiMEngine(stdpopsim.Engine):
                     slim_scaling_factor, 1)
 
         ts = self._recap_and_rescale(
-                ts, seed, recap_epoch, contig, contig.mutation_rate, slim_scaling_factor)
+                ts.dump_tables(), seed, recap_epoch, contig, contig.mutation_rate)
         return ts
-
-
-# SLiM does not currently work on Windows.
-if sys.platform != "win32":
-    stdpopsim.register_engine(_SLiMEngine())
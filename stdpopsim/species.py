@@ -14,6 +14,9 @@ logger = logging.getLogger(__name__)
 
 registered_species = {}
 
+# Chromosome IDs that are not simulated as autosomes.
+_non_autosomal_ids = ("x", "y", "m", "mt", "chrx", "chry", "chrm")
+
 
 def register_species(species):
     """
@@ -144,7 +147,7 @@ class Species(object):
         """
         # TODO: add non-autosomal support
         if (chromosome is not None and
-                chromosome.lower() in ("x", "y", "m", "mt", "chrx", "chry", "chrm")):
+                chromosome.lower() in _non_autosomal_ids):
             warnings.warn(stdpopsim.NonAutosomalWarning(
                     "Non-autosomal simulations are not yet supported. See "
                     "https://github.com/popsim-consortium/stdpopsim/issues/383 and "
@@ -167,6 +170,15 @@ class Species(object):
             genetic_map=gm)
         return ret
 
+    def get_autosomes(self):
+        """
+        Returns the list of :class:`.Chromosome` objects in this species'
+        genome that are autosomes, in the order they are defined.
+        """
+        return [
+            chrom for chrom in self.genome.chromosomes
+            if chrom.id.lower() not in _non_autosomal_ids]
+
     def get_demographic_model(self, id):
         """
         Returns a model with the specified id.
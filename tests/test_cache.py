@@ -3,8 +3,13 @@ Tests for the cache management code.
 """
 import pathlib
 import os
+import time
+import unittest
+from unittest import mock
 
 import appdirs
+import msprime
+import tskit
 
 import stdpopsim
 import tests
@@ -37,3 +42,351 @@ class TestSetCacheDir(tests.CacheWritingTest):
                 self.assertEqual(stdpopsim.get_cache_dir(), pathlib.Path(test))
         finally:
             os.environ.pop("STDPOPSIM_CACHE")
+
+
+class TestSetScratchDir(unittest.TestCase):
+    """
+    Tests the set_scratch_dir and get_scratch_dir functions.
+    """
+    paths = ["/somefile", "relative/path/"]
+
+    def setUp(self):
+        self.saved_scratch_dir = stdpopsim.cache._scratch_dir
+        self.saved_environ = os.environ.pop("STDPOPSIM_SCRATCH", None)
+
+    def tearDown(self):
+        stdpopsim.set_scratch_dir(self.saved_scratch_dir)
+        if self.saved_environ is not None:
+            os.environ["STDPOPSIM_SCRATCH"] = self.saved_environ
+
+    def test_paths(self):
+        for test in self.paths:
+            stdpopsim.set_scratch_dir(test)
+            self.assertEqual(stdpopsim.get_scratch_dir(), pathlib.Path(test))
+            # A specified directory is used regardless of its free space.
+            self.assertEqual(
+                stdpopsim.get_scratch_dir(2**80), pathlib.Path(test))
+
+    def test_environment_var(self):
+        try:
+            for test in self.paths:
+                os.environ["STDPOPSIM_SCRATCH"] = test
+                stdpopsim.set_scratch_dir()
+                self.assertEqual(stdpopsim.get_scratch_dir(), pathlib.Path(test))
+        finally:
+            os.environ.pop("STDPOPSIM_SCRATCH")
+
+    @unittest.skipIf(not os.path.isdir("/dev/shm"), "/dev/shm not available")
+    def test_dev_shm(self):
+        stdpopsim.set_scratch_dir(None)
+        usage = mock.Mock(total=1000, used=200, free=800)
+        with mock.patch("shutil.disk_usage", return_value=usage):
+            if os.access("/dev/shm", os.W_OK | os.X_OK):
+                self.assertEqual(
+                    stdpopsim.get_scratch_dir(), pathlib.Path("/dev/shm"))
+                self.assertEqual(
+                    stdpopsim.get_scratch_dir(500), pathlib.Path("/dev/shm"))
+                with self.assertLogs("stdpopsim.cache", level="INFO") as logs:
+                    stdpopsim.get_scratch_dir(500)
+                self.assertIn("/dev/shm", logs.output[0])
+            # Not enough space.
+            self.assertIsNone(stdpopsim.get_scratch_dir(600))
+            self.assertIsNone(stdpopsim.get_scratch_dir(2000))
+
+
+class TestResultCache(tests.CacheWritingTest):
+    """
+    Tests for the simulation result cache.
+    """
+    species = stdpopsim.get_species("HomSap")
+    model = stdpopsim.PiecewiseConstantSize(1000)
+
+    def setUp(self):
+        super().setUp()
+        stdpopsim.set_result_cache()
+
+    def tearDown(self):
+        stdpopsim.set_result_cache(enabled=False)
+        super().tearDown()
+
+    def simulate(self, seed=1, length_multiplier=0.001, **kwargs):
+        engine = stdpopsim.get_engine("msprime")
+        contig = self.species.get_contig(
+            "chr22", length_multiplier=length_multiplier)
+        return engine.simulate(
+            demographic_model=self.model, contig=contig,
+            samples=self.model.get_samples(4), seed=seed, **kwargs)
+
+    def num_cached(self):
+        results_dir = stdpopsim.get_result_cache().results_dir
+        return len(list(results_dir.glob("*/*/*.trees")))
+
+    def test_disabled_by_default(self):
+        stdpopsim.set_result_cache(enabled=False)
+        self.assertIsNone(stdpopsim.get_result_cache())
+        self.simulate()
+        self.assertFalse((pathlib.Path(self.tmp_cache_dir.name) / "results").exists())
+
+    def test_hit(self):
+        ts1 = self.simulate()
+        self.assertEqual(self.num_cached(), 1)
+        with mock.patch("msprime.simulate", autospec=True) as mocked_simulate:
+            ts2 = self.simulate()
+        mocked_simulate.assert_not_called()
+        self.assertEqual(ts1.tables, ts2.tables)
+        self.assertEqual(self.num_cached(), 1)
+
+    def test_different_inputs_miss(self):
+        self.simulate(seed=1)
+        self.simulate(seed=2)
+        self.simulate(seed=1, length_multiplier=0.002)
+        self.simulate(seed=1, msprime_model="dtwf")
+        self.assertEqual(self.num_cached(), 4)
+
+    def test_version_looked_up_once(self):
+        engine = stdpopsim.get_engine("msprime")
+        for _ in range(2):
+            with mock.patch.object(
+                    engine, "get_version",
+                    wraps=engine.get_version) as mocked_get_version:
+                self.simulate()
+            self.assertEqual(mocked_get_version.call_count, 1)
+
+    def test_ignored_params(self):
+        engine = stdpopsim.get_engine("msprime")
+        with mock.patch.object(
+                engine, "cache_ignored_params", ("msprime_model",)):
+            self.simulate(seed=1)
+            with mock.patch("msprime.simulate", autospec=True) as mocked_simulate:
+                self.simulate(seed=1, msprime_model="dtwf")
+        mocked_simulate.assert_not_called()
+        self.assertEqual(self.num_cached(), 1)
+
+    def test_uncacheable(self):
+        self.simulate(seed=None)
+        self.simulate(dry_run=True)
+        self.assertEqual(self.num_cached(), 0)
+
+    def test_key_canonical(self):
+        cache = stdpopsim.get_result_cache()
+        engine = stdpopsim.get_engine("msprime")
+        contig = self.species.get_contig("chr22")
+        samples = self.model.get_samples(2)
+        key1 = cache.key(engine, self.model, contig, samples, 1, {"a": 1, "b": 2})
+        key2 = cache.key(engine, self.model, contig, samples, 1, {"b": 2, "a": 1})
+        self.assertEqual(key1, key2)
+        model = stdpopsim.PiecewiseConstantSize(1001)
+        key3 = cache.key(engine, model, contig, samples, 1, {"a": 1, "b": 2})
+        self.assertNotEqual(key1, key3)
+
+    def test_lru_eviction(self):
+        self.simulate(seed=1)
+        self.simulate(seed=2)
+        cache = stdpopsim.get_result_cache()
+        size = max(p.stat().st_size for p in cache.results_dir.glob("*/*/*.trees"))
+        # Make sure the first result is the most recently used.
+        time.sleep(0.1)
+        self.simulate(seed=1)
+        cache.max_size = size
+        cache.evict()
+        self.assertEqual(self.num_cached(), 1)
+        with mock.patch("msprime.simulate", autospec=True) as mocked_simulate:
+            self.simulate(seed=1)
+        mocked_simulate.assert_not_called()
+
+    def test_version_invalidation(self):
+        self.simulate()
+        engine = stdpopsim.get_engine("msprime")
+        results_dir = stdpopsim.get_result_cache().results_dir / "msprime"
+        old_version = engine.get_version()
+        with mock.patch.object(engine, "get_version", return_value="new"):
+            with mock.patch(
+                    "msprime.simulate", wraps=msprime.simulate) as mocked_simulate:
+                self.simulate()
+            mocked_simulate.assert_called_once()
+        # Results from other versions are kept for processes using them.
+        versions = sorted(v.name for v in results_dir.iterdir())
+        self.assertEqual(versions, sorted([old_version, "new"]))
+        self.assertEqual(self.num_cached(), 2)
+        with mock.patch("msprime.simulate", autospec=True) as mocked_simulate:
+            self.simulate()
+        mocked_simulate.assert_not_called()
+
+    def test_old_version_evicted(self):
+        engine = stdpopsim.get_engine("msprime")
+        with mock.patch.object(engine, "get_version", return_value="old"):
+            self.simulate()
+        # Make sure the result for the current version is the most recent.
+        time.sleep(0.1)
+        self.simulate()
+        cache = stdpopsim.get_result_cache()
+        cache.max_size = max(
+            p.stat().st_size for p in cache.results_dir.glob("*/*/*.trees"))
+        cache.evict()
+        self.assertEqual(self.num_cached(), 1)
+        self.assertEqual(
+            list(cache.results_dir.glob("msprime/old/*.trees")), [])
+
+    def test_cached_result_type(self):
+        engine = stdpopsim.get_engine("msprime")
+        self.simulate()
+        with mock.patch.object(
+                engine, "_from_result_cache",
+                wraps=engine._from_result_cache) as mocked_from_result_cache:
+            ts = self.simulate()
+        mocked_from_result_cache.assert_called_once()
+        self.assertIsInstance(ts, tskit.TreeSequence)
+
+
+class TestScriptCache(tests.CacheWritingTest):
+    """
+    Tests for the generated script cache.
+    """
+    species = stdpopsim.get_species("HomSap")
+    model = stdpopsim.PiecewiseConstantSize(1000)
+    engine = stdpopsim.get_engine("msprime")
+
+    def setUp(self):
+        super().setUp()
+        self.cache = stdpopsim.ScriptCache()
+        self.contig = self.species.get_contig("chr22")
+        self.samples = self.model.get_samples(2)
+
+    def put(self, key, contents):
+        script_file = pathlib.Path(self.tmp_cache_dir.name) / "script.txt"
+        with open(script_file, "w") as f:
+            f.write(contents)
+        self.cache.put(self.engine, key, {".txt": script_file}, {"key": key})
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(stdpopsim.get_script_cache())
+        try:
+            stdpopsim.set_script_cache()
+            self.assertIsInstance(
+                stdpopsim.get_script_cache(), stdpopsim.ScriptCache)
+        finally:
+            stdpopsim.set_script_cache(enabled=False)
+
+    def test_key(self):
+        key1 = self.cache.key(
+            self.engine, self.model, self.contig, self.samples, {"a": 1})
+        key2 = self.cache.key(
+            self.engine, self.model, self.contig, self.samples, {"a": 1})
+        self.assertEqual(key1, key2)
+        key3 = self.cache.key(
+            self.engine, self.model, self.contig, self.samples, {"a": 2})
+        self.assertNotEqual(key1, key3)
+        key4 = self.cache.key(
+            self.engine, self.model, self.contig, self.model.get_samples(3),
+            {"a": 1})
+        self.assertNotEqual(key1, key4)
+        with mock.patch("stdpopsim.__version__", "new"):
+            key5 = self.cache.key(
+                self.engine, self.model, self.contig, self.samples, {"a": 1})
+        self.assertNotEqual(key1, key5)
+
+    def test_get_put(self):
+        self.assertIsNone(self.cache.get(self.engine, "a", [".txt"]))
+        self.put("a", "script a")
+        paths, metadata = self.cache.get(self.engine, "a", [".txt"])
+        self.assertEqual(metadata, {"key": "a"})
+        with open(paths[".txt"]) as f:
+            self.assertEqual(f.read(), "script a")
+        self.assertIsNone(self.cache.get(self.engine, "a", [".slim"]))
+        self.assertIsNone(self.cache.get(self.engine, "a", [".txt", ".dat"]))
+        self.cache.clear()
+        self.assertIsNone(self.cache.get(self.engine, "a", [".txt"]))
+
+    def test_metadata_written_last(self):
+        written = []
+        atomic_write = stdpopsim.cache._atomic_write
+
+        def record_write(path, data):
+            written.append(path.suffix)
+            atomic_write(path, data)
+
+        with mock.patch("stdpopsim.cache._atomic_write", side_effect=record_write):
+            self.put("a", "script a")
+        self.assertEqual(written, [".txt", ".json"])
+        self.cache.clear()
+        self.assertIsNone(self.cache.get(self.engine, "a", [".txt"]))
+
+    def test_multiple_files(self):
+        tmp_dir = pathlib.Path(self.tmp_cache_dir.name)
+        files = {}
+        for suffix in (".txt", ".dat"):
+            files[suffix] = tmp_dir / f"script{suffix}"
+            with open(files[suffix], "w") as f:
+                f.write(suffix)
+        self.cache.put(self.engine, "a", files, {})
+        paths, _ = self.cache.get(self.engine, "a", [".txt", ".dat"])
+        for suffix, path in paths.items():
+            with open(path) as f:
+                self.assertEqual(f.read(), suffix)
+        self.cache.max_size = 0
+        self.cache.evict()
+        self.assertEqual(len(list(self.cache.engine_dir(self.engine).iterdir())), 0)
+
+    def test_lru_eviction(self):
+        self.put("a", "x" * 100)
+        self.put("b", "x" * 100)
+        time.sleep(0.1)
+        self.assertIsNotNone(self.cache.get(self.engine, "a", [".txt"]))
+        size = sum(
+            p.stat().st_size for p in self.cache.engine_dir(self.engine).iterdir())
+        self.cache.max_size = size - 1
+        self.cache.evict()
+        self.assertIsNotNone(self.cache.get(self.engine, "a", [".txt"]))
+        self.assertIsNone(self.cache.get(self.engine, "b", [".txt"]))
+        self.assertEqual(len(list(self.cache.engine_dir(self.engine).iterdir())), 2)
+
+    def test_new_entry_not_evicted(self):
+        self.put("a", "x" * 100)
+        # Make "a" look more recently used than the entry stored next.
+        future = time.time() + 1000
+        for path in self.cache.engine_dir(self.engine).iterdir():
+            os.utime(path, (future, future))
+        size = sum(
+            p.stat().st_size for p in self.cache.engine_dir(self.engine).iterdir())
+        self.cache.max_size = size
+        self.put("b", "x" * 100)
+        self.assertIsNone(self.cache.get(self.engine, "a", [".txt"]))
+        self.assertIsNotNone(self.cache.get(self.engine, "b", [".txt"]))
+
+    def test_too_large(self):
+        self.put("a", "x")
+        self.cache.max_size = 100
+        with self.assertLogs("stdpopsim.cache", level="WARNING"):
+            self.put("b", "x" * 101)
+        self.assertIsNone(self.cache.get(self.engine, "b", [".txt"]))
+        self.assertIsNotNone(self.cache.get(self.engine, "a", [".txt"]))
+
+
+class TestCheckpointCache(tests.CacheWritingTest):
+    """
+    Tests for the simulation checkpoint cache.
+    """
+    engine = stdpopsim.get_engine("msprime")
+
+    def tearDown(self):
+        stdpopsim.set_checkpoint_cache()
+        super().tearDown()
+
+    def test_enabled_by_default(self):
+        cache = stdpopsim.get_checkpoint_cache()
+        self.assertIsInstance(cache, stdpopsim.CheckpointCache)
+        self.assertGreater(cache.max_size, stdpopsim.ScriptCache().max_size)
+        stdpopsim.set_checkpoint_cache(enabled=False)
+        self.assertIsNone(stdpopsim.get_checkpoint_cache())
+
+    def test_separate_from_scripts(self):
+        cache = stdpopsim.CheckpointCache(max_size=1000)
+        checkpoint = pathlib.Path(self.tmp_cache_dir.name) / "checkpoint.trees"
+        with open(checkpoint, "w") as f:
+            f.write("x" * 100)
+        self.assertTrue(cache.put(self.engine, "a", {".trees": checkpoint}, {}))
+        self.assertIsNotNone(cache.get(self.engine, "a", [".trees"]))
+        self.assertIsNone(
+            stdpopsim.ScriptCache().get(self.engine, "a", [".trees"]))
+        stdpopsim.ScriptCache(max_size=0).evict()
+        self.assertIsNotNone(cache.get(self.engine, "a", [".trees"]))
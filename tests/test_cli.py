@@ -288,6 +288,95 @@ class TestEndToEndSubprocess(TestEndToEnd):
         self.assertEqual(prov_seed, seed)
 
 
+class TestGenomeSimulation(unittest.TestCase):
+    """
+    Tests for simulating multiple chromosomes from the CLI.
+    """
+    def test_parser(self):
+        parser = cli.stdpopsim_cli_parser()
+        args = parser.parse_args(["HomSap", "2"])
+        self.assertIsNone(args.chromosomes)
+        self.assertIsNone(args.processes)
+        args = parser.parse_args(["HomSap", "--chromosomes", "all", "-p", "4", "2"])
+        self.assertEqual(args.chromosomes, "all")
+        self.assertEqual(args.processes, 4)
+
+    def test_simulate(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cmd = (
+                f"-q HomSap --chromosomes chr21,22 -p 2 -s 2 -o {tmpdir} "
+                "-d Zigzag_1S14 4")
+            capture_output(cli.stdpopsim_main, cmd.split())
+            path = pathlib.Path(tmpdir)
+            with open(path / "manifest.json") as f:
+                manifest = json.load(f)
+            for chrom in manifest["chromosomes"]:
+                ts = tskit.load(str(path / chrom["file"]))
+                self.assertEqual(ts.num_samples, 4)
+                provenance = json.loads(ts.provenance(ts.num_provenances - 1).record)
+                self.assertEqual(provenance["software"]["name"], "stdpopsim")
+        self.assertEqual([c["id"] for c in manifest["chromosomes"]], ["21", "22"])
+
+    def test_errors(self):
+        for cmd in [
+                "HomSap --chromosomes all 2",
+                "HomSap --chromosomes chr1,notachrom -o /dev/null 2",
+                "HomSap --chromosomes all -l 0.1 -o /dev/null 2",
+                "HomSap -c chr22 --chromosomes chr21 -o /dev/null 2"]:
+            with mock.patch("stdpopsim.cli.exit", side_effect=TestException):
+                with self.assertRaises(TestException):
+                    capture_output(cli.stdpopsim_main, cmd.split())
+
+    def test_unsupported_options(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for prefix, options, option in [
+                    ("", f"--metrics-file {tmpdir}/m.json", "--metrics-file"),
+                    ("", "--metrics-provenance", "--metrics-provenance"),
+                    ("", f"--cost-calibration {tmpdir}/c.json",
+                     "--cost-calibration"),
+                    ("", "--max-memory 1000", "--max-memory"),
+                    ("-e slim --slim-progress ", "", "--slim-progress")]:
+                cmd = (
+                    f"{prefix}HomSap --chromosomes chr21,22 {options} "
+                    f"-o {tmpdir} 2")
+                with mock.patch(
+                        "stdpopsim.cli.exit", side_effect=TestException) as mocked_exit:
+                    with self.assertRaises(TestException):
+                        capture_output(cli.stdpopsim_main, cmd.split())
+                mocked_exit.assert_called_once_with(
+                    f"Cannot use {option} with --chromosomes")
+                self.assertEqual(os.listdir(tmpdir), [])
+
+
+class TestResultCache(unittest.TestCase):
+    """
+    Tests for the --result-cache option.
+    """
+    def setUp(self):
+        self.saved_cache_dir = stdpopsim.get_cache_dir()
+
+    def tearDown(self):
+        stdpopsim.set_cache_dir(self.saved_cache_dir)
+        stdpopsim.set_result_cache(enabled=False)
+
+    def test_cached_run_provenance(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = pathlib.Path(tmpdir)
+            for j in range(2):
+                output = path / f"{j}.trees"
+                cmd = (
+                    f"-q -c {path / 'cache'} --result-cache HomSap -c chr22 "
+                    f"-l 0.001 -s 3 -o {output} 4")
+                capture_output(cli.stdpopsim_main, cmd.split())
+            self.assertTrue((path / "cache" / "results").exists())
+            ts0 = tskit.load(str(path / "0.trees"))
+            ts1 = tskit.load(str(path / "1.trees"))
+        self.assertEqual(ts0.tables.edges, ts1.tables.edges)
+        self.assertEqual(ts0.num_provenances, ts1.num_provenances)
+        provenance = json.loads(ts1.provenance(ts1.num_provenances - 1).record)
+        self.assertIn("1.trees", provenance["parameters"]["args"][-2])
+
+
 class TestWriteOutput(unittest.TestCase):
     """
     Tests the paths through the write_output function.
@@ -312,6 +401,86 @@ class TestWriteOutput(unittest.TestCase):
             mocked_dump.assert_called_once_with(mock.ANY, output_file)
 
 
+class TestMetrics(unittest.TestCase):
+    """
+    Tests for writing per-phase simulation metrics from the CLI.
+    """
+    def test_parser(self):
+        parser = cli.stdpopsim_cli_parser()
+        args = parser.parse_args(["HomSap", "2"])
+        self.assertIsNone(args.metrics_file)
+        self.assertFalse(args.metrics_provenance)
+        args = parser.parse_args(
+            ["HomSap", "2", "--metrics-file", "m.json", "--metrics-provenance"])
+        self.assertEqual(args.metrics_file, "m.json")
+        self.assertTrue(args.metrics_provenance)
+
+    def test_metrics_file_and_provenance(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = pathlib.Path(tmpdir)
+            output = tmpdir / "output.trees"
+            metrics_file = tmpdir / "metrics.json"
+            cmd = (
+                f"-q HomSap -c chr22 -l0.01 -o {output} -s 1 "
+                f"--metrics-file {metrics_file} --metrics-provenance 10")
+            with mock.patch("stdpopsim.cli.setup_logging", autospec=True):
+                capture_output(cli.stdpopsim_main, cmd.split())
+            with open(metrics_file) as f:
+                metrics = json.load(f)
+            ts = tskit.load(str(output))
+        names = [phase["name"] for phase in metrics["phases"]]
+        self.assertIn("ancestry", names)
+        self.assertEqual(names[-1], "output_writing")
+        provenance = json.loads(ts.provenance(ts.num_provenances - 1).record)
+        prov_names = [phase["name"] for phase in provenance["metrics"]["phases"]]
+        self.assertIn("ancestry", prov_names)
+        self.assertNotIn("output_writing", prov_names)
+
+
+class TestCostEstimate(unittest.TestCase):
+    """
+    Tests for the cost estimate reported by the CLI.
+    """
+    def test_summary(self):
+        engine = stdpopsim.get_engine("msprime")
+        species = stdpopsim.get_species("HomSap")
+        contig = species.get_contig("chr22", length_multiplier=0.01)
+        model = stdpopsim.PiecewiseConstantSize(1000)
+        samples = model.get_samples(10)
+        estimate = stdpopsim.CostEstimator().estimate(
+            engine, model, contig, samples)
+        with mock.patch("stdpopsim.cli.logger.warning", autospec=True) as mocked:
+            cli.write_simulation_summary(
+                engine, model, contig, samples, estimate=estimate)
+        text = mocked.call_args[0][0]
+        self.assertIn("Estimated cost (uncalibrated)", text)
+        self.assertIn("Peak memory", text)
+
+    def test_max_memory(self):
+        cmd = "-q HomSap -c chr22 -l0.01 -D --max-memory 0.001 10"
+        with mock.patch("stdpopsim.cli.exit", side_effect=TestException):
+            with mock.patch("stdpopsim.cli.setup_logging", autospec=True):
+                with self.assertRaises(TestException):
+                    capture_output(cli.stdpopsim_main, cmd.split())
+
+    def test_calibration(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = pathlib.Path(tmpdir)
+            output = tmpdir / "output.trees"
+            calibration = tmpdir / "calibration.json"
+            cmd = (
+                f"-q HomSap -c chr22 -l0.01 -o {output} -s 1 "
+                f"--cost-calibration {calibration} 10")
+            with mock.patch("stdpopsim.cli.setup_logging", autospec=True):
+                capture_output(cli.stdpopsim_main, cmd.split())
+                capture_output(cli.stdpopsim_main, cmd.split())
+            estimator = stdpopsim.CostEstimator.load(calibration)
+        self.assertEqual(len(estimator.runs), 2)
+        for run in estimator.runs:
+            self.assertEqual(run["engine"], "msprime")
+            self.assertGreater(run["output_size"], 0)
+
+
 class TestRedirection(unittest.TestCase):
     """
     Tests that the tree sequence file we get from redirecting is identical to the
@@ -623,6 +792,20 @@ class TestWriteCitations(unittest.TestCase):
         output = "\n".join(logs.output)
         self.check_citations(engine, species, genetic_map, model, output)
 
+    def test_multiple_contigs(self):
+        species = stdpopsim.get_species("HomSap")
+        genetic_map = species.get_genetic_map("HapMapII_GRCh37")
+        contigs = [
+            stdpopsim.Contig(), stdpopsim.Contig(genetic_map=genetic_map)]
+        model = stdpopsim.PiecewiseConstantSize(species.population_size)
+        engine = stdpopsim.get_default_engine()
+        with self.assertLogs() as logs:
+            stdout, stderr = capture_output(
+                    cli.write_citations, engine, model, contigs, species)
+        self.assertEqual(len(stdout), 0)
+        output = "\n".join(logs.output)
+        self.check_citations(engine, species, genetic_map, model, output)
+
     def check_citations(self, engine, species, genetic_map, model, output):
         if genetic_map is None:
             genetic_map = stdpopsim.GeneticMap(species.id, citations=[])
@@ -671,6 +854,19 @@ class TestCacheDir(unittest.TestCase):
         cmd = f"-c {cache_dir} download-genetic-maps"
         self.check_cache_dir_set(cmd, cache_dir)
 
+    def test_script_cache(self):
+        with mock.patch(
+                "stdpopsim.set_script_cache", autospec=True) as mocked_set_cache:
+            self.run_stdpopsim("HomSap 2 -o tmp.trees".split())
+            mocked_set_cache.assert_called_once_with(
+                enabled=False, max_size=128 * 2**20)
+        with mock.patch(
+                "stdpopsim.set_script_cache", autospec=True) as mocked_set_cache:
+            cmd = "--script-cache --script-cache-size 2 HomSap 2 -o tmp.trees"
+            self.run_stdpopsim(cmd.split())
+            mocked_set_cache.assert_called_once_with(
+                enabled=True, max_size=2 * 2**20)
+
 
 class TestDownloadGeneticMaps(unittest.TestCase):
     """
@@ -775,6 +971,7 @@ class TestMsprimeEngine(unittest.TestCase):
                    "--msprime-change-model 20 hudson "
                    "--msprime-change-model 30 dtwf "
                    "--msprime-change-model 40 hudson")
+        self.docmd("--msprime-model auto")
 
     def test_invalid_CLI_parameters(self):
         with self.assertRaises(SystemExit):
@@ -791,6 +988,9 @@ class TestMsprimeEngine(unittest.TestCase):
         with self.assertRaises(SystemExit):
             self.docmd("--msprime-model hudson "
                        "--msprime-change-model 10")
+        with self.assertRaises(SystemExit):
+            self.docmd("--msprime-model hudson "
+                       "--msprime-change-model 10 auto")
 
     def test_invalid_API_parameters(self):
         engine = stdpopsim.get_engine("msprime")
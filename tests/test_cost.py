@@ -0,0 +1,221 @@
+"""
+Tests for the simulation cost estimator.
+"""
+import math
+import os
+import tempfile
+import unittest
+
+import stdpopsim
+from stdpopsim import cost
+
+
+class TestEffectivePopulationSize(unittest.TestCase):
+    """
+    Tests for the rough effective population size of a model.
+    """
+    def test_constant(self):
+        model = stdpopsim.PiecewiseConstantSize(1000)
+        self.assertAlmostEqual(cost.effective_population_size(model), 1000)
+
+    def test_bottleneck(self):
+        model = stdpopsim.PiecewiseConstantSize(1000, (100, 10))
+        N = cost.effective_population_size(model)
+        self.assertGreater(N, 10)
+        self.assertLess(N, 1000)
+
+    def test_merged_populations(self):
+        model = stdpopsim.IsolationWithMigration(
+            NA=1000, N1=200, N2=300, T=100, M12=0, M21=0)
+        # Forwards in time, the ancestral population exists throughout and
+        # the sampled populations are created at the split.
+        sizes = cost.epoch_sizes(model)
+        self.assertEqual(sizes[0][2], 1500)
+        self.assertEqual(sizes[-1][2], 1000)
+        self.assertTrue(math.isinf(sizes[-1][1]))
+        # Lineages sampled from the first population only reach the
+        # ancestral population at the split.
+        sizes = cost.epoch_sizes(model, [0])
+        self.assertEqual(sizes[0][2], 200)
+        self.assertEqual(sizes[-1][2], 1000)
+
+    def test_migration(self):
+        model = stdpopsim.IsolationWithMigration(
+            NA=1000, N1=200, N2=300, T=100, M12=0.01, M21=0)
+        # Lineages in the first population can migrate to the second.
+        sizes = cost.epoch_sizes(model, [0])
+        self.assertEqual(sizes[0][2], 500)
+        sizes = cost.epoch_sizes(model, [1])
+        self.assertEqual(sizes[0][2], 300)
+
+
+class TestCostFeatures(unittest.TestCase):
+    """
+    Tests for the features the engines' costs scale with.
+    """
+    def setUp(self):
+        self.species = stdpopsim.get_species("HomSap")
+        self.model = stdpopsim.PiecewiseConstantSize(1000)
+
+    def test_keys(self):
+        contig = self.species.get_contig("chr22", length_multiplier=0.01)
+        for engine in stdpopsim.all_engines():
+            features = engine.get_cost_features(
+                self.model, contig, self.model.get_samples(10))
+            self.assertEqual(set(features.keys()), set(cost._cost_quantities))
+            for value in features.values():
+                self.assertGreater(value, 0)
+
+    def test_coalescent_scaling(self):
+        contig1 = self.species.get_contig("chr22", length_multiplier=0.01)
+        contig2 = self.species.get_contig("chr22", length_multiplier=0.02)
+        samples = self.model.get_samples(10)
+        f1 = cost.coalescent_cost_features(self.model, contig1, samples)
+        f2 = cost.coalescent_cost_features(self.model, contig2, samples)
+        for key in cost._cost_quantities:
+            self.assertGreater(f2[key], f1[key])
+        f3 = cost.coalescent_cost_features(
+            self.model, contig1, self.model.get_samples(100))
+        self.assertGreater(f3["wall_time"], f1["wall_time"])
+
+    def test_slim_scaling_factor(self):
+        engine = stdpopsim.get_engine("slim")
+        contig = self.species.get_contig("chr22", length_multiplier=0.01)
+        samples = self.model.get_samples(10)
+        f1 = engine.get_cost_features(self.model, contig, samples)
+        f10 = engine.get_cost_features(
+            self.model, contig, samples, slim_scaling_factor=10)
+        self.assertLess(f10["wall_time"], f1["wall_time"])
+        self.assertLess(f10["memory"], f1["memory"])
+        self.assertEqual(f10["output_size"], f1["output_size"])
+        f_short = engine.get_cost_features(
+            self.model, contig, samples, slim_burn_in=1)
+        self.assertLess(f_short["wall_time"], f1["wall_time"])
+        f_recap = engine.get_cost_features(
+            self.model, contig, samples, slim_recapitation_first=True)
+        f_zero = engine.get_cost_features(
+            self.model, contig, samples, slim_burn_in=0)
+        self.assertEqual(f_recap, f_zero)
+        # Rescaling only the oldest epochs is cheaper than not rescaling.
+        model = stdpopsim.PiecewiseConstantSize(1000, (100, 2000))
+        f1 = engine.get_cost_features(model, contig, samples)
+        f10 = engine.get_cost_features(
+            model, contig, samples, slim_scaling_factor=10)
+        f_epochs = engine.get_cost_features(
+            model, contig, samples, slim_scaling_factor=[10, 1])
+        self.assertLess(f_epochs["wall_time"], f1["wall_time"])
+        self.assertGreater(f_epochs["wall_time"], f10["wall_time"])
+        f_uniform = engine.get_cost_features(
+            model, contig, samples, slim_scaling_factor=[10, 10])
+        self.assertEqual(f_uniform, f10)
+
+
+class TestFitPowerLaw(unittest.TestCase):
+    """
+    Tests for fitting the calibration coefficients.
+    """
+    def test_no_points(self):
+        self.assertEqual(cost._fit_power_law([], (1, 2)), (1, 2))
+        self.assertEqual(cost._fit_power_law([(0, 1), (1, 0)], (1, 2)), (1, 2))
+
+    def test_single_point(self):
+        a, b = cost._fit_power_law([(10, 200)], (1, 2))
+        self.assertEqual(b, 2)
+        self.assertAlmostEqual(a, 2)
+
+    def test_exact(self):
+        points = [(x, 3 * x ** 1.5) for x in (1, 10, 100, 1000)]
+        a, b = cost._fit_power_law(points, (1, 1))
+        self.assertAlmostEqual(a, 3)
+        self.assertAlmostEqual(b, 1.5)
+
+    def test_exponent_bounds(self):
+        points = [(1, 1), (2, 2 ** 10)]
+        _, b = cost._fit_power_law(points, (1, 1))
+        self.assertEqual(b, cost._MAX_EXPONENT)
+
+
+class TestCostEstimator(unittest.TestCase):
+    """
+    Tests for estimating and calibrating the cost of simulations.
+    """
+    def setUp(self):
+        self.engine = stdpopsim.get_engine("msprime")
+        species = stdpopsim.get_species("HomSap")
+        self.contig = species.get_contig("chr22", length_multiplier=0.01)
+        self.model = stdpopsim.PiecewiseConstantSize(1000)
+        self.samples = self.model.get_samples(10)
+
+    def metrics(self, wall_time, max_rss_delta):
+        return stdpopsim.SimulationMetrics(phases=[
+            stdpopsim.PhaseMetrics(
+                name="ancestry", wall_time=wall_time, cpu_time=wall_time,
+                max_rss_delta=max_rss_delta)])
+
+    def test_uncalibrated(self):
+        estimator = stdpopsim.CostEstimator()
+        estimate = estimator.estimate(
+            self.engine, self.model, self.contig, self.samples)
+        self.assertIsInstance(estimate, stdpopsim.CostEstimate)
+        self.assertEqual(estimate.num_calibration_runs, 0)
+        self.assertGreater(estimate.wall_time, 0)
+        self.assertGreater(estimate.memory, 0)
+        self.assertGreater(estimate.output_size, 0)
+
+    def test_calibrated(self):
+        estimator = stdpopsim.CostEstimator()
+        features = self.engine.get_cost_features(
+            self.model, self.contig, self.samples)
+        estimator.add_run(
+            self.engine, self.model, self.contig, self.samples,
+            self.metrics(features["wall_time"] * 5, None),
+            output_size=features["output_size"] * 2)
+        estimate = estimator.estimate(
+            self.engine, self.model, self.contig, self.samples)
+        self.assertEqual(estimate.num_calibration_runs, 1)
+        self.assertAlmostEqual(estimate.wall_time, features["wall_time"] * 5)
+        self.assertAlmostEqual(estimate.output_size, features["output_size"] * 2)
+
+    def test_other_engines_ignored(self):
+        estimator = stdpopsim.CostEstimator()
+        slim = stdpopsim.get_engine("slim")
+        estimator.add_run(
+            slim, self.model, self.contig, self.samples, self.metrics(1e6, 1e9))
+        estimate = estimator.estimate(
+            self.engine, self.model, self.contig, self.samples)
+        self.assertEqual(estimate.num_calibration_runs, 0)
+
+    def test_child_process_memory(self):
+        estimator = stdpopsim.CostEstimator()
+        metrics = self.metrics(1, 2**20)
+        metrics.phases[0].child_max_rss = 2**30
+        estimator.add_run(
+            self.engine, self.model, self.contig, self.samples, metrics)
+        self.assertEqual(estimator.runs[0]["memory"], 2**20 + 2**30)
+
+    def test_save_load(self):
+        estimator = stdpopsim.CostEstimator()
+        estimator.add_run(
+            self.engine, self.model, self.contig, self.samples,
+            self.metrics(2, 2**20), output_size=1000)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "calibration.json")
+            empty = stdpopsim.CostEstimator.load(filename)
+            self.assertEqual(empty.runs, [])
+            estimator.save(filename)
+            loaded = stdpopsim.CostEstimator.load(filename)
+        self.assertEqual(loaded.runs, estimator.runs)
+        self.assertEqual(
+            loaded.estimate(self.engine, self.model, self.contig, self.samples),
+            estimator.estimate(self.engine, self.model, self.contig, self.samples))
+
+    def test_estimate_after_run(self):
+        estimator = stdpopsim.CostEstimator()
+        with stdpopsim.record_metrics() as metrics:
+            self.engine.simulate(
+                self.model, self.contig, self.samples, seed=1)
+        estimator.add_run(
+            self.engine, self.model, self.contig, self.samples, metrics)
+        estimate = estimator.estimate(
+            self.engine, self.model, self.contig, self.samples)
+        self.assertAlmostEqual(estimate.wall_time, metrics.wall_time)
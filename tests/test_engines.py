@@ -1,7 +1,19 @@
 """
 Tests for simulation engine infrastructure.
 """
+import concurrent.futures
+import json
+import math
+import pathlib
+import subprocess
+import sys
+import tempfile
 import unittest
+from unittest import mock
+
+import msprime
+import numpy as np
+import tskit
 
 import stdpopsim
 
@@ -51,6 +63,82 @@ class TestEngineAPI(unittest.TestCase):
         self.assertRaises(NotImplementedError, e.get_version)
 
 
+class _LazyEngine(stdpopsim.Engine):
+    id = "test-lazy-engine"
+    description = "Engine loaded through a descriptor"
+    citations = []
+
+
+_lazy_engine_instance = _LazyEngine()
+
+
+class TestEngineDescriptors(unittest.TestCase):
+    """
+    Tests for engines registered lazily with descriptors or plugins.
+    """
+    def tearDown(self):
+        stdpopsim.engines._registered_engines.pop(_LazyEngine.id, None)
+
+    def test_lazy_load(self):
+        descriptor = stdpopsim.EngineDescriptor(
+            id=_LazyEngine.id, module=__name__, attribute="_LazyEngine")
+        stdpopsim.register_engine(descriptor)
+        self.assertIn(_LazyEngine.id, stdpopsim.all_engine_ids())
+        registered = stdpopsim.engines._registered_engines[_LazyEngine.id]
+        self.assertIs(registered, descriptor)
+        engine = stdpopsim.get_engine(_LazyEngine.id)
+        self.assertIsInstance(engine, _LazyEngine)
+        self.assertIs(stdpopsim.get_engine(_LazyEngine.id), engine)
+        with self.assertRaises(ValueError):
+            stdpopsim.register_engine(descriptor)
+
+    def test_instance_attribute(self):
+        stdpopsim.register_engine(stdpopsim.EngineDescriptor(
+            id=_LazyEngine.id, module=__name__,
+            attribute="_lazy_engine_instance"))
+        engine = stdpopsim.get_engine(_LazyEngine.id)
+        self.assertIs(engine, _lazy_engine_instance)
+
+    def test_bad_descriptors(self):
+        for descriptor in [
+                stdpopsim.EngineDescriptor(
+                    id="wrong-id", module=__name__, attribute="_LazyEngine"),
+                stdpopsim.EngineDescriptor(
+                    id=_LazyEngine.id, module=__name__, attribute="unittest")]:
+            with self.assertRaises(ValueError):
+                descriptor.load()
+        descriptor = stdpopsim.EngineDescriptor(
+            id=_LazyEngine.id, module=__name__, attribute="nonexistent")
+        with self.assertRaises(AttributeError):
+            descriptor.load()
+
+    def test_plugin_discovery(self):
+        entry_points = [
+            (_LazyEngine.id, __name__, "_LazyEngine"),
+            # Plugins can't replace built in engines.
+            ("msprime", __name__, "_LazyEngine"),
+        ]
+        with mock.patch(
+                "stdpopsim.engines._entry_points", return_value=entry_points):
+            with mock.patch("stdpopsim.engines._plugins_discovered", False):
+                engine = stdpopsim.get_engine(_LazyEngine.id)
+        self.assertIsInstance(engine, _LazyEngine)
+        self.assertIsInstance(
+            stdpopsim.get_engine("msprime"), stdpopsim.engines._MsprimeEngine)
+
+    @unittest.skipIf(sys.platform == "win32", "SLiM not available on windows")
+    def test_slim_imported_lazily(self):
+        code = (
+            "import sys; import stdpopsim; "
+            "assert 'stdpopsim.slim_engine' not in sys.modules; "
+            "assert 'pyslim' not in sys.modules; "
+            "assert 'slim' in stdpopsim.all_engine_ids(); "
+            "assert 'pyslim' not in sys.modules; "
+            "stdpopsim.get_engine('slim'); "
+            "assert 'pyslim' in sys.modules")
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+
 class TestBehaviour(unittest.TestCase):
     def test_simulate_nonexistent_param(self):
         species = stdpopsim.get_species("HomSap")
@@ -66,3 +154,483 @@ class TestBehaviour(unittest.TestCase):
             engine.simulate(**good_kwargs)
             with self.assertRaises(TypeError):
                 engine.simulate(**bad_kwargs)
+
+
+class TestSimulateGenome(unittest.TestCase):
+    """
+    Tests for simulating multiple chromosomes in parallel.
+    """
+    species = stdpopsim.get_species("HomSap")
+    model = stdpopsim.PiecewiseConstantSize(100)
+
+    def simulate(self, output_dir, chromosomes=("21", "22"), seed=1234):
+        samples = self.model.get_samples(4)
+        return stdpopsim.simulate_genome(
+            "msprime", self.species, self.model, samples, output_dir,
+            chromosomes=chromosomes, seed=seed, num_processes=2)
+
+    def test_output_files(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            files = self.simulate(tmpdir)
+            self.assertEqual(list(files.keys()), ["21", "22"])
+            for chrom_id, path in files.items():
+                ts = tskit.load(str(path))
+                chrom = self.species.genome.get_chromosome(chrom_id)
+                self.assertEqual(ts.num_samples, 4)
+                self.assertEqual(ts.sequence_length, chrom.length)
+            with open(pathlib.Path(tmpdir) / "manifest.json") as f:
+                manifest = json.load(f)
+        self.assertEqual(manifest["species"], "HomSap")
+        self.assertEqual(manifest["seed"], 1234)
+        self.assertEqual(
+            [chrom["id"] for chrom in manifest["chromosomes"]], ["21", "22"])
+        seeds = [chrom["seed"] for chrom in manifest["chromosomes"]]
+        self.assertEqual(len(set(seeds)), 2)
+
+    def test_seeds_independent_of_schedule(self):
+        with tempfile.TemporaryDirectory() as tmpdir1, \
+                tempfile.TemporaryDirectory() as tmpdir2:
+            files1 = self.simulate(tmpdir1, chromosomes=["21", "22"])
+            files2 = self.simulate(tmpdir2, chromosomes=["21"])
+            ts1 = tskit.load(str(files1["21"]))
+            ts2 = tskit.load(str(files2["21"]))
+            self.assertEqual(ts1.tables.edges, ts2.tables.edges)
+
+    def test_single_run(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            samples = self.model.get_samples(4)
+            files = stdpopsim.simulate_genome(
+                "msprime", self.species, self.model, samples, tmpdir,
+                chromosomes=["21", "22"], seed=1234, single_run=True)
+            ts_list = [tskit.load(str(path)) for path in files.values()]
+            with open(pathlib.Path(tmpdir) / "manifest.json") as f:
+                manifest = json.load(f)
+        self.assertTrue(manifest["single_run"])
+        for chrom in manifest["chromosomes"]:
+            self.assertEqual(chrom["seed"], 1234)
+        for ts in ts_list:
+            self.assertEqual(ts.num_samples, 4)
+
+    def test_duplicate_chromosomes(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with self.assertRaises(ValueError):
+                self.simulate(tmpdir, chromosomes=["22", "chr22"])
+
+    def test_all_autosomes(self):
+        autosomes = [chrom.id for chrom in self.species.get_autosomes()]
+        self.assertEqual(len(autosomes), 22)
+        self.assertNotIn("X", autosomes)
+        self.assertNotIn("MT", autosomes)
+
+
+class TestMsprimeSimulateChromosomes(unittest.TestCase):
+    """
+    Tests for simulating several unlinked contigs in a single msprime run.
+    """
+    def verify(self, contigs, **kwargs):
+        engine = stdpopsim.get_engine("msprime")
+        model = stdpopsim.PiecewiseConstantSize(1000)
+        samples = model.get_samples(6)
+        ts_list = engine.simulate_chromosomes(
+            demographic_model=model, contigs=contigs, samples=samples,
+            seed=5, **kwargs)
+        self.assertEqual(len(ts_list), len(contigs))
+        for ts, contig in zip(ts_list, contigs):
+            self.assertEqual(
+                ts.sequence_length, contig.recombination_map.get_length())
+            self.assertEqual(list(ts.samples()), list(range(6)))
+            self.assertGreater(ts.num_sites, 0)
+            for tree in ts.trees():
+                self.assertEqual(tree.num_roots, 1)
+        return ts_list
+
+    def test_uniform_contigs(self):
+        species = stdpopsim.get_species("HomSap")
+        contigs = [
+            species.get_contig(chrom, length_multiplier=0.01)
+            for chrom in ["chr20", "chr21", "chr22"]]
+        self.verify(contigs)
+        self.verify(contigs, msprime_model="dtwf")
+
+    def test_sample_times_shared(self):
+        species = stdpopsim.get_species("AraTha")
+        contigs = [
+            species.get_contig(chrom, length_multiplier=0.01)
+            for chrom in ["1", "2"]]
+        ts1, ts2 = self.verify(contigs)
+        for u in ts1.samples():
+            self.assertEqual(ts1.node(u).population, ts2.node(u).population)
+            self.assertEqual(ts1.node(u).time, ts2.node(u).time)
+
+    def test_dry_run(self):
+        engine = stdpopsim.get_engine("msprime")
+        species = stdpopsim.get_species("HomSap")
+        model = stdpopsim.PiecewiseConstantSize(1000)
+        contigs = [species.get_contig("chr22"), species.get_contig("chr21")]
+        ts_list = engine.simulate_chromosomes(
+            demographic_model=model, contigs=contigs,
+            samples=model.get_samples(2), dry_run=True)
+        self.assertIsNone(ts_list)
+
+    def test_join_recombination_maps(self):
+        species = stdpopsim.get_species("HomSap")
+        contigs = [
+            species.get_contig(chrom, length_multiplier=0.001)
+            for chrom in ["chr21", "chr22"]]
+        lengths = [c.recombination_map.get_length() for c in contigs]
+        rm, starts = stdpopsim.engines._join_recombination_maps(contigs, 0.5)
+        start = math.ceil(lengths[0]) + 1
+        self.assertEqual(starts, [0, start])
+        self.assertEqual(rm.get_length(), math.ceil(start + lengths[1]))
+        j = list(rm.get_positions()).index(start - 1)
+        self.assertEqual(rm.get_rates()[j], 0.5)
+
+    def test_join_recombination_maps_whole_bases(self):
+        contigs = [
+            stdpopsim.Contig(
+                recombination_map=msprime.RecombinationMap.uniform_map(
+                    length, 1e-8))
+            for length in [100.5, 200, 50.25]]
+        rm, starts = stdpopsim.engines._join_recombination_maps(contigs, 0.5)
+        self.assertEqual(starts, [0, 102, 303])
+        self.assertEqual(rm.get_length(), 354)
+        # Only the intervals between the contigs have the boundary rate.
+        positions = rm.get_positions()
+        rates = rm.get_rates()
+        self.assertEqual(
+            [(positions[j], positions[j + 1]) for j in range(len(rates))
+             if rates[j] == 0.5],
+            [(101, 102), (302, 303)])
+
+    def test_unlinked_recombination_fraction(self):
+        # Two chromosomes without recombination within them, each sample's
+        # lineages are followed back for one generation of the DTWF model.
+        # The chromosomes are inherited from different parental genomes in
+        # half of the samples.
+        contigs = [
+            stdpopsim.Contig(
+                recombination_map=msprime.RecombinationMap.uniform_map(100, 0))
+            for _ in range(2)]
+        rm, starts = stdpopsim.engines._join_recombination_maps(
+            contigs, stdpopsim.engines._UNLINKED_RECOMBINATION_RATE)
+        n = 2000
+        ts = msprime.simulate(
+            sample_size=n, Ne=10**6, recombination_map=rm, model="dtwf",
+            end_time=1, random_seed=1)
+        tree1 = ts.at(starts[0])
+        tree2 = ts.at(starts[1])
+        fraction = np.mean([tree1.parent(u) != tree2.parent(u) for u in range(n)])
+        # The standard error is about 0.011, and a continuous genome gives
+        # a fraction of 3/8.
+        self.assertAlmostEqual(fraction, 0.5, delta=0.05)
+
+
+class TestSimulateReplicates(unittest.TestCase):
+    """
+    Tests for the streaming replicates API.
+    """
+    species = stdpopsim.get_species("HomSap")
+    model = stdpopsim.PiecewiseConstantSize(1000)
+
+    def replicates(self, engine, seed, num_replicates=3, **kwargs):
+        contig = self.species.get_contig("chr22", length_multiplier=0.001)
+        samples = self.model.get_samples(4)
+        return engine.simulate_replicates(
+            demographic_model=self.model, contig=contig, samples=samples,
+            seed=seed, num_replicates=num_replicates, **kwargs)
+
+    def test_msprime_deterministic(self):
+        engine = stdpopsim.get_engine("msprime")
+        reps1 = list(self.replicates(engine, seed=10))
+        reps2 = list(self.replicates(engine, seed=10))
+        self.assertEqual(len(reps1), 3)
+        for ts1, ts2 in zip(reps1, reps2):
+            self.assertEqual(ts1.num_samples, 4)
+            self.assertEqual(ts1.tables.edges, ts2.tables.edges)
+            self.assertEqual(ts1.tables.mutations, ts2.tables.mutations)
+        self.assertNotEqual(reps1[0].tables.edges, reps1[1].tables.edges)
+
+    def test_msprime_is_iterator(self):
+        engine = stdpopsim.get_engine("msprime")
+        reps = self.replicates(engine, seed=1, num_replicates=2)
+        self.assertEqual(next(reps).num_samples, 4)
+        self.assertEqual(next(reps).num_samples, 4)
+        with self.assertRaises(StopIteration):
+            next(reps)
+
+    def test_dry_run(self):
+        engine = stdpopsim.get_engine("msprime")
+        self.assertEqual(list(self.replicates(engine, seed=1, dry_run=True)), [])
+
+    def test_dry_run_not_iterated(self):
+        engine = stdpopsim.get_engine("msprime")
+        with mock.patch.object(
+                engine, "simulate", wraps=engine.simulate) as mock_simulate:
+            stdpopsim.Engine.simulate_replicates(
+                engine, demographic_model=self.model,
+                contig=self.species.get_contig("chr22", length_multiplier=0.001),
+                samples=self.model.get_samples(4), seed=1, dry_run=True)
+        self.assertEqual(mock_simulate.call_count, 1)
+
+    def test_bad_num_replicates(self):
+        engine = stdpopsim.get_engine("msprime")
+        with self.assertRaises(ValueError):
+            self.replicates(engine, seed=1, num_replicates=0)
+        with self.assertRaises(ValueError):
+            stdpopsim.Engine.simulate_replicates(
+                engine, demographic_model=self.model,
+                contig=self.species.get_contig("chr22", length_multiplier=0.001),
+                samples=self.model.get_samples(4), seed=1, num_replicates=0)
+
+    def test_bad_model_not_iterated(self):
+        engine = stdpopsim.get_engine("msprime")
+        with self.assertRaises(ValueError):
+            self.replicates(engine, seed=1, msprime_model="notamodel")
+
+    def test_default_implementation(self):
+        engine = stdpopsim.get_engine("msprime")
+        reps1 = list(stdpopsim.Engine.simulate_replicates(
+            engine, demographic_model=self.model,
+            contig=self.species.get_contig("chr22", length_multiplier=0.001),
+            samples=self.model.get_samples(4), seed=3, num_replicates=2))
+        reps2 = list(stdpopsim.Engine.simulate_replicates(
+            engine, demographic_model=self.model,
+            contig=self.species.get_contig("chr22", length_multiplier=0.001),
+            samples=self.model.get_samples(4), seed=3, num_replicates=2))
+        self.assertEqual(len(reps1), 2)
+        for ts1, ts2 in zip(reps1, reps2):
+            self.assertEqual(ts1.tables.edges, ts2.tables.edges)
+
+
+class TestAncestryReuse(unittest.TestCase):
+    """
+    Tests for simulating ancestry once and adding mutations many times.
+    """
+    def test_msprime(self):
+        engine = stdpopsim.get_engine("msprime")
+        species = stdpopsim.get_species("HomSap")
+        contig = species.get_contig("chr22", length_multiplier=0.001)
+        model = stdpopsim.PiecewiseConstantSize(1000)
+        ts = engine.simulate_ancestry(
+            demographic_model=model, contig=contig,
+            samples=model.get_samples(10), seed=2)
+        self.assertEqual(ts.num_mutations, 0)
+        self.assertEqual(contig.mutation_rate, species.genome.mean_mutation_rate)
+
+        mts1 = engine.add_mutations(ts, 1e-7, seed=1)
+        mts2 = engine.add_mutations(ts, 1e-7, seed=1)
+        mts3 = engine.add_mutations(ts, 1e-6, seed=1)
+        self.assertGreater(mts1.num_mutations, 0)
+        self.assertEqual(mts1.tables.mutations, mts2.tables.mutations)
+        self.assertGreater(mts3.num_mutations, mts1.num_mutations)
+        for mts in (mts1, mts3):
+            self.assertEqual(mts.tables.edges, ts.tables.edges)
+            self.assertEqual(mts.tables.nodes, ts.tables.nodes)
+
+
+class TestSimulationMetrics(unittest.TestCase):
+    """
+    Tests for the per-phase simulation metrics.
+    """
+    def test_run_simulation(self):
+        engine = stdpopsim.get_engine("msprime")
+        species = stdpopsim.get_species("HomSap")
+        contig = species.get_contig("chr22", length_multiplier=0.001)
+        model = stdpopsim.PiecewiseConstantSize(1000)
+        result = engine.run_simulation(
+            demographic_model=model, contig=contig,
+            samples=model.get_samples(10), seed=2)
+        self.assertIsInstance(result, stdpopsim.SimulationResult)
+        self.assertIsInstance(result.ts, tskit.TreeSequence)
+        names = [phase.name for phase in result.metrics.phases]
+        self.assertEqual(names, ["model_preparation", "ancestry"])
+        for phase in result.metrics.phases:
+            self.assertGreaterEqual(phase.wall_time, 0)
+            self.assertGreaterEqual(phase.cpu_time, 0)
+        self.assertEqual(len(result.metrics.get_phase("ancestry")), 1)
+        self.assertAlmostEqual(
+            result.metrics.wall_time,
+            sum(phase.wall_time for phase in result.metrics.phases))
+        d = json.loads(json.dumps(result.metrics.asdict()))
+        self.assertEqual(len(d["phases"]), 2)
+
+    def test_nested_recorders(self):
+        with stdpopsim.record_metrics() as outer:
+            with stdpopsim.record_phase("a"):
+                pass
+            with stdpopsim.record_metrics() as inner:
+                with stdpopsim.record_phase("b"):
+                    pass
+            with stdpopsim.record_phase("c"):
+                pass
+        self.assertEqual([p.name for p in outer.phases], ["a", "c"])
+        self.assertEqual([p.name for p in inner.phases], ["b"])
+
+    def test_child_process(self):
+        with stdpopsim.record_metrics() as metrics:
+            with stdpopsim.record_phase("a"):
+                stdpopsim.record_child_process(2, 1.5, max_rss=100)
+                stdpopsim.record_child_process(1, 0.5, max_rss=300)
+            with stdpopsim.record_phase("b"):
+                pass
+            # Child processes outside of a phase are discarded.
+            stdpopsim.record_child_process(1, 1, max_rss=1000)
+        a, b = metrics.phases
+        self.assertEqual(a.child_wall_time, 3)
+        self.assertEqual(a.child_cpu_time, 2)
+        self.assertEqual(a.child_max_rss, 300)
+        self.assertIsNone(b.child_wall_time)
+        self.assertIsNone(b.child_cpu_time)
+        self.assertIsNone(b.child_max_rss)
+        self.assertEqual(metrics.child_wall_time, 3)
+        self.assertEqual(metrics.child_cpu_time, 2)
+        self.assertEqual(metrics.child_max_rss, 300)
+        d = json.loads(json.dumps(metrics.asdict()))
+        self.assertEqual(d["child_cpu_time"], 2)
+        self.assertEqual(d["phases"][0]["child_max_rss"], 300)
+
+    def test_nested_phases(self):
+        with stdpopsim.record_metrics() as metrics:
+            with stdpopsim.record_phase("outer"):
+                with stdpopsim.record_phase("inner"):
+                    stdpopsim.record_child_process(1, 1)
+        inner, outer = metrics.phases
+        self.assertEqual(inner.child_cpu_time, 1)
+        self.assertIsNone(inner.child_max_rss)
+        self.assertIsNone(outer.child_cpu_time)
+        self.assertIsNone(metrics.child_max_rss)
+
+    def test_no_recorder(self):
+        # Phases outside of a recorder are silently discarded.
+        with stdpopsim.record_phase("a"):
+            pass
+        with stdpopsim.record_metrics() as metrics:
+            pass
+        self.assertEqual(metrics.phases, [])
+
+
+class TestCitations(unittest.TestCase):
+    """
+    Tests for the per-call citations of simulation engines.
+    """
+    def test_default_citations(self):
+        for engine in stdpopsim.all_engines():
+            citations = engine.get_citations()
+            self.assertEqual(citations, engine.citations)
+            self.assertIsNot(citations, engine.citations)
+
+    def test_msprime_model_citations(self):
+        engine = stdpopsim.get_engine("msprime")
+        num_citations = len(engine.citations)
+        citations = engine.get_citations(msprime_model="dtwf")
+        self.assertEqual(len(citations), num_citations + 1)
+        citations = engine.get_citations(
+            msprime_model="dtwf", msprime_change_model=[(10, "hudson")])
+        self.assertEqual(len(citations), num_citations + 1)
+        citations = engine.get_citations(
+            msprime_change_model=[(10, "dtwf"), (20, "dtwf")])
+        self.assertEqual(len(citations), num_citations + 1)
+        self.assertEqual(len(engine.citations), num_citations)
+
+    def test_simulate_does_not_modify_engine(self):
+        engine = stdpopsim.get_engine("msprime")
+        citations = list(engine.citations)
+        species = stdpopsim.get_species("HomSap")
+        contig = species.get_contig("chr22", length_multiplier=0.001)
+        model = stdpopsim.PiecewiseConstantSize(1000)
+        for _ in range(2):
+            result = engine.run_simulation(
+                demographic_model=model, contig=contig,
+                samples=model.get_samples(4), seed=1, msprime_model="dtwf")
+        self.assertEqual(engine.citations, citations)
+        self.assertEqual(len(result.citations), len(citations) + 1)
+
+    def test_concurrent_simulations(self):
+        engine = stdpopsim.get_engine("msprime")
+        species = stdpopsim.get_species("HomSap")
+        contig = species.get_contig("chr22", length_multiplier=0.001)
+        model = stdpopsim.PiecewiseConstantSize(1000)
+
+        def run(seed):
+            return engine.run_simulation(
+                demographic_model=model, contig=contig,
+                samples=model.get_samples(4), seed=seed)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(run, range(1, 9)))
+        for seed, result in zip(range(1, 9), results):
+            self.assertEqual(
+                result.ts.tables.edges, run(seed).ts.tables.edges)
+            self.assertEqual(len(result.metrics.get_phase("ancestry")), 1)
+
+
+class TestAutoModel(unittest.TestCase):
+    """
+    Tests for the automatic hybrid DTWF/Hudson model.
+    """
+    def test_small_sample(self):
+        model = stdpopsim.PiecewiseConstantSize(10000)
+        samples = model.get_samples(10)
+        self.assertEqual(stdpopsim.dtwf_switch_time(model, samples), 0)
+
+    def test_large_sample(self):
+        model = stdpopsim.PiecewiseConstantSize(100)
+        samples = model.get_samples(1000)
+        t = stdpopsim.dtwf_switch_time(model, samples)
+        self.assertGreater(t, 0)
+        # A larger population coalesces more slowly.
+        model = stdpopsim.PiecewiseConstantSize(1000)
+        self.assertGreater(stdpopsim.dtwf_switch_time(model, samples), t)
+        # A stricter threshold needs longer to reach.
+        self.assertGreater(
+            stdpopsim.dtwf_switch_time(model, samples, max_coalescences=0.01),
+            stdpopsim.dtwf_switch_time(model, samples))
+
+    def test_ancient_samples(self):
+        species = stdpopsim.get_species("HomSap")
+        model = species.get_demographic_model("AncientEurasia_9K19")
+        samples = model.get_samples(10, 10, 10, 10, 10, 10, 10)
+        t = stdpopsim.dtwf_switch_time(model, samples)
+        max_sample_time = math.floor(max(sample.time for sample in samples))
+        self.assertGreaterEqual(t, max_sample_time)
+
+    def test_simulate(self):
+        engine = stdpopsim.get_engine("msprime")
+        species = stdpopsim.get_species("HomSap")
+        contig = species.get_contig("chr22", length_multiplier=0.001)
+        model = stdpopsim.PiecewiseConstantSize(100)
+        samples = model.get_samples(200)
+        ts1 = engine.simulate(
+            model, contig, samples, seed=1, msprime_model="auto")
+        t = stdpopsim.dtwf_switch_time(model, samples)
+        ts2 = engine.simulate(
+            model, contig, samples, seed=1, msprime_model="dtwf",
+            msprime_change_model=[(t, "hudson")])
+        self.assertEqual(ts1.tables.nodes, ts2.tables.nodes)
+        self.assertEqual(ts1.tables.edges, ts2.tables.edges)
+
+    def test_citations(self):
+        engine = stdpopsim.get_engine("msprime")
+        num_citations = len(engine.citations)
+        model = stdpopsim.PiecewiseConstantSize(10000)
+        self.assertEqual(
+            len(engine.get_citations(msprime_model="auto")), num_citations + 1)
+        self.assertEqual(
+            len(engine.get_citations(
+                demographic_model=model, samples=model.get_samples(10),
+                msprime_model="auto")),
+            num_citations)
+
+    def test_change_model_error(self):
+        engine = stdpopsim.get_engine("msprime")
+        species = stdpopsim.get_species("HomSap")
+        contig = species.get_contig("chr22", length_multiplier=0.001)
+        model = stdpopsim.PiecewiseConstantSize(100)
+        samples = model.get_samples(10)
+        with self.assertRaises(ValueError):
+            engine.simulate(
+                model, contig, samples, msprime_model="auto",
+                msprime_change_model=[(10, "hudson")])
+        with self.assertRaises(ValueError):
+            engine.simulate(
+                model, contig, samples, msprime_change_model=[(10, "auto")])
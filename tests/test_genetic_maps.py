@@ -11,6 +11,7 @@ import urllib.request
 import pathlib
 
 import msprime
+import numpy as np
 
 import stdpopsim
 from stdpopsim import genetic_maps
@@ -186,6 +187,78 @@ class TestGeneticMapDownload(tests.CacheWritingTest):
             gm.is_cached = saved
 
 
+class TestBinaryMaps(tests.CacheWritingTest):
+    """
+    Tests for the binary form of the chromosome maps stored in the cache.
+    """
+
+    def write_hapmap(self, map_dir):
+        map_file = os.path.join(map_dir, "prefix_chr1.txt")
+        with open(map_file, "w") as f:
+            print("Chromosome  Position(bp)    Rate(cM/Mb)     Map(cM)", file=f)
+            print("chr1        55550   2.981822        0.000000", file=f)
+            print("chr1        82571   2.082414        0.080572", file=f)
+            print("chr1        88169   0               0.092229", file=f)
+        return map_file
+
+    def assertMapsEqual(self, rm1, rm2):
+        self.assertEqual(list(rm1.get_positions()), list(rm2.get_positions()))
+        self.assertEqual(list(rm1.get_rates()), list(rm2.get_rates()))
+        self.assertEqual(rm1.get_num_loci(), rm2.get_num_loci())
+        self.assertEqual(rm1.get_sequence_length(), rm2.get_sequence_length())
+
+    def test_round_trip(self):
+        map_file = self.write_hapmap(self.tmp_cache_dir.name)
+        self.assertIsNone(genetic_maps._load_binary_map(map_file))
+        rm = msprime.RecombinationMap.read_hapmap(map_file)
+        genetic_maps._save_binary_map(map_file, rm)
+        array_file, metadata_file = genetic_maps._binary_map_paths(map_file)
+        self.assertTrue(array_file.exists())
+        self.assertTrue(metadata_file.exists())
+        array = np.load(array_file)
+        self.assertEqual(array.shape, (2, len(rm.get_positions())))
+        self.assertEqual(array.dtype, np.float64)
+        self.assertMapsEqual(rm, genetic_maps._load_binary_map(map_file))
+
+    def test_stale_binary_map(self):
+        map_file = self.write_hapmap(self.tmp_cache_dir.name)
+        rm = msprime.RecombinationMap.read_hapmap(map_file)
+        genetic_maps._save_binary_map(map_file, rm)
+        array_file, _ = genetic_maps._binary_map_paths(map_file)
+        mtime = os.path.getmtime(array_file)
+        os.utime(map_file, (mtime + 10, mtime + 10))
+        self.assertIsNone(genetic_maps._load_binary_map(map_file))
+
+    def test_get_chromosome_map_converts(self):
+        species = stdpopsim.get_species("HomSap")
+        gm = species.get_genetic_map("HapMapII_GRCh37")
+        gm.download()
+        map_file = os.path.join(gm.map_cache_dir, gm.file_pattern.format(id="chr22"))
+        array_file, _ = genetic_maps._binary_map_paths(map_file)
+        self.assertFalse(array_file.exists())
+        cm1 = gm.get_chromosome_map("chr22")
+        self.assertTrue(array_file.exists())
+        with mock.patch(
+                "msprime.RecombinationMap.read_hapmap", autospec=True) as mocked:
+            cm2 = gm.get_chromosome_map("chr22")
+        mocked.assert_not_called()
+        self.assertMapsEqual(cm1, cm2)
+        self.assertMapsEqual(cm1, msprime.RecombinationMap.read_hapmap(map_file))
+
+    def test_get_chromosome_map_read_only_cache(self):
+        species = stdpopsim.get_species("HomSap")
+        gm = species.get_genetic_map("HapMapII_GRCh37")
+        gm.download()
+        map_file = os.path.join(gm.map_cache_dir, gm.file_pattern.format(id="chr22"))
+        with mock.patch(
+                "stdpopsim.cache._atomic_write", autospec=True,
+                side_effect=PermissionError("read-only")):
+            cm = gm.get_chromosome_map("chr22")
+        array_file, _ = genetic_maps._binary_map_paths(map_file)
+        self.assertFalse(array_file.exists())
+        self.assertMapsEqual(cm, msprime.RecombinationMap.read_hapmap(map_file))
+
+
 class TestGeneticMapDownloadSecurity(tests.CacheWritingTest):
     """
     Security related tests for the genetic map downloading code.
@@ -8,14 +8,18 @@ import sys
 import unittest
 import tempfile
 import math
+import warnings
 from unittest import mock
 
+import numpy as np
 import tskit
 import pyslim
 import msprime
 
 import stdpopsim
 import stdpopsim.cli
+import stdpopsim.slim_engine
+import tests
 from . test_cli import capture_output
 
 IS_WINDOWS = sys.platform.startswith("win")
@@ -45,6 +49,14 @@ class TestAPI(unittest.TestCase):
                     slim_burn_in=burn_in,
                     dry_run=True)
 
+    def test_version_memoized(self):
+        engine = stdpopsim.get_engine("slim")
+        version = engine.get_version()
+        with mock.patch("subprocess.check_output") as mocked_check_output:
+            self.assertEqual(engine.get_version(), version)
+            self.assertEqual(engine.get_version(engine.slim_path()), version)
+        mocked_check_output.assert_not_called()
+
     def test_script_generation(self):
         engine = stdpopsim.get_engine("slim")
         species = stdpopsim.get_species("HomSap")
@@ -74,6 +86,19 @@ class TestAPI(unittest.TestCase):
                 slim_script=True)
         self.assertTrue("sim.registerLateEvent" in out)
 
+    def test_model_not_modified(self):
+        engine = stdpopsim.get_engine("slim")
+        species = stdpopsim.get_species("HomSap")
+        contig = species.get_contig("chr22")
+        model = species.get_demographic_model("AmericanAdmixture_4B11")
+        samples = model.get_samples(10, 10, 10)
+        times = [event.time for event in model.demographic_events]
+        capture_output(
+                engine.simulate,
+                demographic_model=model, contig=contig, samples=samples,
+                slim_script=True, slim_scaling_factor=10)
+        self.assertEqual(times, [event.time for event in model.demographic_events])
+
     def test_recombination_map(self):
         engine = stdpopsim.get_engine("slim")
         species = stdpopsim.get_species("HomSap")
@@ -85,6 +110,35 @@ class TestAPI(unittest.TestCase):
                 demographic_model=model, contig=contig, samples=samples,
                 dry_run=True)
 
+    def test_recombination_map_file(self):
+        species = stdpopsim.get_species("HomSap")
+        contig = species.get_contig("chr22", genetic_map="HapMapII_GRCh37")
+        model = stdpopsim.PiecewiseConstantSize(species.population_size)
+        samples = model.get_samples(10)
+        rates, ends = stdpopsim.slim_engine.msprime_rm_to_slim_rm(
+                contig.recombination_map)
+
+        inline_script = io.StringIO()
+        stdpopsim.slim_engine.slim_makescript(
+                inline_script, "out.trees", model, contig, samples, 1, 10)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            recomb_file = os.path.join(tmpdir, "script.recomb")
+            script = io.StringIO()
+            stdpopsim.slim_engine.slim_makescript(
+                    script, "out.trees", model, contig, samples, 1, 10,
+                    recombination_map_file=recomb_file)
+            with open(recomb_file) as f:
+                lines = f.read().splitlines()
+
+        self.assertIn("readFile(recombination_map_file)", script.getvalue())
+        self.assertIn(recomb_file, script.getvalue())
+        self.assertLess(10 * len(script.getvalue()), len(inline_script.getvalue()))
+        n = len(rates)
+        self.assertEqual(len(lines), 2 * n + 1)
+        self.assertEqual(int(lines[0]), n)
+        self.assertEqual([float(x) for x in lines[1:n + 1]], list(rates))
+        self.assertEqual([int(x) for x in lines[n + 1:]], list(ends))
+
     def test_simulate(self):
         engine = stdpopsim.get_engine("slim")
         species = stdpopsim.get_species("AraTha")
@@ -97,6 +151,325 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(ts.num_samples, 10)
         self.assertTrue(all(tree.num_roots == 1 for tree in ts.trees()))
 
+    def test_epoch_scaling_factors(self):
+        engine = stdpopsim.get_engine("slim")
+        species = stdpopsim.get_species("HomSap")
+        contig = species.get_contig("chr22", length_multiplier=0.001)
+        model = species.get_demographic_model("OutOfAfrica_3G09")
+        samples = model.get_samples(10, 10, 10)
+        out1, _ = capture_output(
+                engine.simulate,
+                demographic_model=model, contig=contig, samples=samples,
+                slim_script=True, slim_scaling_factor=10)
+        out2, _ = capture_output(
+                engine.simulate,
+                demographic_model=model, contig=contig, samples=samples,
+                slim_script=True, slim_scaling_factor=[10, 10, 10, 10])
+        self.assertEqual(out1, out2)
+        out3, _ = capture_output(
+                engine.simulate,
+                demographic_model=model, contig=contig, samples=samples,
+                slim_script=True, slim_scaling_factor=[10, 10, 2, 1])
+        self.assertIn("defineConstant(\"Q_epochs\", c(10, 10, 2, 1))", out3)
+        self.assertIn("G_offsets", out3)
+        for scaling_factor in ([10, 1], [10, 10, 0, 1]):
+            with self.assertRaises(ValueError):
+                engine.simulate(
+                    demographic_model=model, contig=contig, samples=samples,
+                    slim_scaling_factor=scaling_factor, dry_run=True)
+
+        ts = engine.simulate(
+                demographic_model=model, contig=contig, samples=samples,
+                slim_scaling_factor=[10, 10, 2, 1], slim_burn_in=0.1, seed=5)
+        self.assertEqual(ts.num_samples, 30)
+        self.assertTrue(all(tree.num_roots == 1 for tree in ts.trees()))
+        for node in ts.nodes():
+            if node.is_sample():
+                self.assertEqual(node.time, 0)
+
+    def test_simplification_interval(self):
+        engine = stdpopsim.get_engine("slim")
+        species = stdpopsim.get_species("HomSap")
+        contig = species.get_contig("chr22", length_multiplier=0.001)
+        model = species.get_demographic_model("OutOfAfrica_3G09")
+        samples = model.get_samples(10, 10, 10)
+        default = stdpopsim.slim_engine._simplification_interval(
+            model, contig, samples, 10)
+        self.assertGreaterEqual(default, 1)
+        out, _ = capture_output(
+                engine.simulate,
+                demographic_model=model, contig=contig, samples=samples,
+                slim_script=True, slim_scaling_factor=10)
+        self.assertIn(
+            f"defineConstant(\"simplification_interval\", {default})", out)
+        self.assertIn(
+            "initializeTreeSeq(simplificationInterval=simplification_interval)",
+            out)
+        self.assertNotIn("treeSeqSimplify", out)
+        out, _ = capture_output(
+                engine.simulate,
+                demographic_model=model, contig=contig, samples=samples,
+                slim_script=True, slim_scaling_factor=10,
+                slim_simplification_interval=7)
+        self.assertIn("defineConstant(\"simplification_interval\", 7)", out)
+        for interval in (0, -1):
+            with self.assertRaises(ValueError):
+                engine.simulate(
+                    demographic_model=model, contig=contig, samples=samples,
+                    slim_simplification_interval=interval, dry_run=True)
+
+        # More recombination gives larger simplified tables, so they are
+        # simplified less often.
+        long_contig = species.get_contig("chr22", length_multiplier=0.1)
+        self.assertGreater(
+            stdpopsim.slim_engine._simplification_interval(
+                model, long_contig, samples, 10),
+            default)
+
+        for interval in (1, 1000):
+            ts = engine.simulate(
+                    demographic_model=model, contig=contig, samples=samples,
+                    slim_scaling_factor=10, slim_burn_in=0.1,
+                    slim_simplification_interval=interval, seed=3)
+            self.assertEqual(ts.num_samples, 30)
+            self.assertTrue(all(tree.num_roots == 1 for tree in ts.trees()))
+
+    def test_growth_schedules(self):
+        N = np.array([[1000, 1000, 100], [0, 500, 2000]])
+        growth_rates = np.array([[0, 0, 0.01], [0, 0, -0.001]])
+        G_offsets = [0, 10, 20]
+        phases, sizes = stdpopsim.slim_engine._growth_schedules(
+            N, growth_rates, [1, 1, 1], G_offsets)
+        self.assertEqual(phases, [(2, 0, 0, 10), (2, 1, 10, 10)])
+        self.assertEqual(len(sizes), 20)
+        for gx in range(1, 11):
+            self.assertEqual(sizes[gx - 1], round(100 * math.exp(0.01 * gx)))
+            self.assertEqual(
+                sizes[10 + gx - 1], round(2000 * math.exp(-0.001 * gx)))
+        # Sizes and growth rates are rescaled by the epoch's scaling factor.
+        phases, sizes = stdpopsim.slim_engine._growth_schedules(
+            N, growth_rates, [10, 10, 2], G_offsets)
+        self.assertEqual(sizes[0], round(50 * math.exp(0.02)))
+        # Growth in an epoch that is too short is ignored.
+        phases, sizes = stdpopsim.slim_engine._growth_schedules(
+            N, growth_rates, [1, 1, 1], [0, 10, 11])
+        self.assertEqual(phases, [])
+        self.assertEqual(sizes, [])
+
+    def test_growth_script(self):
+        engine = stdpopsim.get_engine("slim")
+        species = stdpopsim.get_species("HomSap")
+        contig = species.get_contig("chr22", length_multiplier=0.001)
+        model = species.get_demographic_model("AmericanAdmixture_4B11")
+        samples = model.get_samples(10, 10, 10, 10)
+        out, _ = capture_output(
+                engine.simulate,
+                demographic_model=model, contig=contig, samples=samples,
+                slim_script=True, slim_scaling_factor=10)
+        self.assertIn("defineConstant(\"growth_phases\", array(", out)
+        self.assertIn("defineConstant(\"growth_sizes\", c(", out)
+        ts = engine.simulate(
+                demographic_model=model, contig=contig, samples=samples,
+                slim_scaling_factor=10, slim_burn_in=0.1, seed=2)
+        self.assertEqual(ts.num_samples, 40)
+        self.assertTrue(all(tree.num_roots == 1 for tree in ts.trees()))
+
+    def test_rescale_times(self):
+        recap_epoch = stdpopsim.slim_engine._RecapEpoch(
+            populations=[], migration_matrix=[[0]],
+            epoch_generations=[None, 10, 5], scaling_factors=[10, 5, 1])
+        times = stdpopsim.slim_engine._rescale_times(
+            [0, 2, 5, 10, 15, 20], recap_epoch)
+        self.assertEqual(list(times), [0, 2, 5, 30, 55, 105])
+        recap_epoch = recap_epoch._replace(scaling_factors=[3, 3, 3])
+        times = stdpopsim.slim_engine._rescale_times([0, 2, 20], recap_epoch)
+        self.assertEqual(list(times), [0, 6, 60])
+
+    def test_choose_scaling_factor(self):
+        engine = stdpopsim.get_engine("slim")
+        species = stdpopsim.get_species("HomSap")
+        contig = species.get_contig("chr22", length_multiplier=0.01)
+        model = species.get_demographic_model("OutOfAfrica_3G09")
+        samples = model.get_samples(10, 10, 10)
+        estimator = stdpopsim.CostEstimator()
+
+        def wall_time(Q):
+            return estimator.estimate(
+                    engine, model, contig, samples,
+                    slim_scaling_factor=Q).wall_time
+
+        Qs = []
+        for budget in (wall_time(50), wall_time(10), wall_time(1) + 1):
+            Q = engine.choose_scaling_factor(model, contig, samples, budget)
+            self.assertIsInstance(Q, int)
+            self.assertLessEqual(wall_time(Q), budget)
+            if Q > 1:
+                self.assertGreater(wall_time(Q - 1), budget)
+            Qs.append(Q)
+        self.assertEqual(Qs, [50, 10, 1])
+        self.assertEqual(
+            engine.choose_scaling_factor(model, contig, samples, wall_time(10)),
+            10)
+        # Recapitation first needs a smaller Q for the same budget.
+        Q = engine.choose_scaling_factor(
+                model, contig, samples, wall_time(10),
+                slim_recapitation_first=True)
+        self.assertLess(Q, 10)
+
+        for budget in (None, 0, -1, 1e-12):
+            with self.assertRaises(ValueError):
+                engine.choose_scaling_factor(model, contig, samples, budget)
+
+    def test_auto_scaling_factor(self):
+        engine = stdpopsim.get_engine("slim")
+        species = stdpopsim.get_species("AraTha")
+        contig = species.get_contig("5", length_multiplier=0.001)
+        model = stdpopsim.PiecewiseConstantSize(species.population_size)
+        samples = model.get_samples(10)
+        budget = stdpopsim.CostEstimator().estimate(
+                engine, model, contig, samples, slim_scaling_factor=10,
+                slim_burn_in=0).wall_time
+        ts1 = engine.simulate(
+                demographic_model=model, contig=contig, samples=samples,
+                slim_scaling_factor="auto", slim_time_budget=budget,
+                slim_burn_in=0, seed=3)
+        ts2 = engine.simulate(
+                demographic_model=model, contig=contig, samples=samples,
+                slim_scaling_factor=10, slim_burn_in=0, seed=3)
+        self.assertEqual(ts1.tables.edges, ts2.tables.edges)
+        self.assertEqual(
+            engine.get_cost_features(
+                model, contig, samples, slim_scaling_factor="auto",
+                slim_time_budget=budget, slim_burn_in=0),
+            engine.get_cost_features(
+                model, contig, samples, slim_scaling_factor=10, slim_burn_in=0))
+        with self.assertRaises(ValueError):
+            engine.simulate(
+                demographic_model=model, contig=contig, samples=samples,
+                slim_scaling_factor="auto", dry_run=True)
+
+    def test_scratch_dir(self):
+        engine = stdpopsim.get_engine("slim")
+        species = stdpopsim.get_species("AraTha")
+        contig = species.get_contig("5", length_multiplier=0.001)
+        model = stdpopsim.PiecewiseConstantSize(species.population_size)
+        samples = model.get_samples(10)
+        saved_scratch_dir = stdpopsim.cache._scratch_dir
+        temporary_directory = tempfile.TemporaryDirectory
+        with tempfile.TemporaryDirectory() as scratch_dir:
+            stdpopsim.set_scratch_dir(scratch_dir)
+            try:
+                with mock.patch(
+                        "tempfile.TemporaryDirectory",
+                        wraps=temporary_directory) as mock_tmpdir:
+                    ts = engine.simulate(
+                            demographic_model=model, contig=contig,
+                            samples=samples, slim_scaling_factor=10,
+                            slim_burn_in=0, seed=1)
+            finally:
+                stdpopsim.set_scratch_dir(saved_scratch_dir)
+            self.assertGreater(mock_tmpdir.call_count, 0)
+            for call in mock_tmpdir.call_args_list:
+                self.assertEqual(call[1]["dir"], scratch_dir)
+            # The temporary files are removed.
+            self.assertEqual(os.listdir(scratch_dir), [])
+        self.assertEqual(ts.num_samples, 10)
+
+    def test_script_space(self):
+        engine = stdpopsim.get_engine("slim")
+        model = stdpopsim.PiecewiseConstantSize(1000)
+        positions = list(range(0, 100001, 10))
+        rates = [1e-8 + 1e-12 * j for j in range(len(positions) - 1)] + [0]
+        contigs = [
+            stdpopsim.Contig(recombination_map=msprime.RecombinationMap(
+                [0, 100000], [1e-8, 0])),
+            stdpopsim.Contig(recombination_map=msprime.RecombinationMap(
+                positions, rates))]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for contig in contigs:
+                script_file = os.path.join(tmpdir, "script.slim")
+                recomb_file = os.path.join(tmpdir, "script.recomb")
+                with open(script_file, "w") as f:
+                    stdpopsim.slim_engine.slim_makescript(
+                        f, "out.trees", model, contig, model.get_samples(10),
+                        1, 10, recombination_map_file=recomb_file)
+                size = os.path.getsize(script_file) + os.path.getsize(recomb_file)
+                self.assertLessEqual(size, engine._script_space(contig))
+        self.assertGreater(
+            engine._script_space(contigs[1]), engine._script_space(contigs[0]))
+
+    def test_scratch_dir_script_space(self):
+        engine = stdpopsim.get_engine("slim")
+        species = stdpopsim.get_species("AraTha")
+        contig = species.get_contig("5", length_multiplier=0.001)
+        model = stdpopsim.PiecewiseConstantSize(species.population_size)
+        with mock.patch(
+                "stdpopsim.get_scratch_dir",
+                wraps=stdpopsim.get_scratch_dir) as mock_get_scratch_dir:
+            engine.simulate(
+                    demographic_model=model, contig=contig,
+                    samples=model.get_samples(10), slim_scaling_factor=10,
+                    slim_burn_in=0, seed=1, dry_run=True)
+        self.assertGreater(mock_get_scratch_dir.call_count, 0)
+        for call in mock_get_scratch_dir.call_args_list:
+            self.assertGreater(call[0][0], 0)
+
+    def test_recapitation_first(self):
+        engine = stdpopsim.get_engine("slim")
+        species = stdpopsim.get_species("HomSap")
+        contig = species.get_contig("chr22", length_multiplier=0.001)
+        model = species.get_demographic_model("OutOfAfrica_3G09")
+        samples = model.get_samples(10, 10, 10)
+        ts1 = engine.simulate(
+                demographic_model=model, contig=contig, samples=samples,
+                slim_scaling_factor=10, slim_recapitation_first=True, seed=7)
+        self.assertEqual(ts1.num_samples, 30)
+        self.assertTrue(all(tree.num_roots == 1 for tree in ts1.trees()))
+        # The burn-in length is ignored.
+        ts2 = engine.simulate(
+                demographic_model=model, contig=contig, samples=samples,
+                slim_scaling_factor=10, slim_burn_in=0, seed=7)
+        ts3 = engine.simulate(
+                demographic_model=model, contig=contig, samples=samples,
+                slim_scaling_factor=10, slim_burn_in=10,
+                slim_recapitation_first=True, seed=7)
+        for ts in (ts2, ts3):
+            self.assertEqual(ts1.tables.nodes, ts.tables.nodes)
+            self.assertEqual(ts1.tables.edges, ts.tables.edges)
+
+    def test_simulate_ancestry(self):
+        engine = stdpopsim.get_engine("slim")
+        species = stdpopsim.get_species("AraTha")
+        contig = species.get_contig("5", length_multiplier=0.001)
+        model = stdpopsim.PiecewiseConstantSize(species.population_size)
+        samples = model.get_samples(10)
+        ts = engine.simulate_ancestry(
+                demographic_model=model, contig=contig, samples=samples,
+                slim_scaling_factor=10, slim_burn_in=0, seed=3)
+        self.assertEqual(ts.num_samples, 10)
+        self.assertEqual(ts.num_mutations, 0)
+        mts = engine.add_mutations(ts, 1e-7, seed=4)
+        self.assertIsInstance(mts, pyslim.SlimTreeSequence)
+        self.assertGreater(mts.num_mutations, 0)
+        self.assertEqual(mts.tables.edges, ts.tables.edges)
+
+    def test_remembered_nodes(self):
+        engine = stdpopsim.get_engine("slim")
+        species = stdpopsim.get_species("HomSap")
+        contig = species.get_contig("chr22", length_multiplier=0.001)
+        model = species.get_demographic_model("OutOfAfrica_3G09")
+        samples = model.get_samples(10, 10, 10)
+        with engine._script(model, contig, samples, 10, 0) as (
+                script_file, recomb_file, _):
+            tables = engine._run_ancestry(script_file, recomb_file, seed=2)
+        ts = tables.tree_sequence()
+        expected = [
+            node for ind in ts.individuals()
+            if ind.flags & pyslim.INDIVIDUAL_REMEMBERED for node in ind.nodes]
+        nodes = stdpopsim.slim_engine._remembered_nodes(tables)
+        self.assertEqual(list(nodes), expected)
+        self.assertEqual(len(nodes), 30)
+
     def test_recap_and_rescale(self):
         engine = stdpopsim.get_engine("slim")
         species = stdpopsim.get_species("HomSap")
@@ -141,6 +514,426 @@ class TestAPI(unittest.TestCase):
 
 
 @unittest.skipIf(IS_WINDOWS, "SLiM not available on windows")
+class TestResultCache(tests.CacheWritingTest):
+    """
+    Tests for caching SLiM simulation results.
+    """
+    def setUp(self):
+        super().setUp()
+        stdpopsim.set_result_cache()
+
+    def tearDown(self):
+        stdpopsim.set_result_cache(enabled=False)
+        super().tearDown()
+
+    def test_cached_result_type(self):
+        engine = stdpopsim.get_engine("slim")
+        species = stdpopsim.get_species("AraTha")
+        contig = species.get_contig("5", length_multiplier=0.001)
+        model = stdpopsim.PiecewiseConstantSize(species.population_size)
+        samples = model.get_samples(10)
+
+        def simulate():
+            return engine.simulate(
+                demographic_model=model, contig=contig, samples=samples,
+                slim_scaling_factor=10, slim_burn_in=0, seed=1)
+
+        ts1 = simulate()
+        with mock.patch.object(engine, "_run_slim") as run_slim:
+            ts2 = simulate()
+        run_slim.assert_not_called()
+        self.assertIsInstance(ts1, pyslim.SlimTreeSequence)
+        self.assertIs(type(ts2), type(ts1))
+        self.assertEqual(ts1.slim_generation, ts2.slim_generation)
+        self.assertEqual(ts1.tables.nodes, ts2.tables.nodes)
+
+
+@unittest.skipIf(IS_WINDOWS, "SLiM not available on windows")
+class TestScriptCache(tests.CacheWritingTest):
+    """
+    Tests for reusing generated SLiM scripts.
+    """
+    def setUp(self):
+        super().setUp()
+        stdpopsim.set_script_cache()
+        self.engine = stdpopsim.get_engine("slim")
+        species = stdpopsim.get_species("AraTha")
+        self.contig = species.get_contig("5", length_multiplier=0.001)
+        self.model = stdpopsim.PiecewiseConstantSize(species.population_size)
+        self.samples = self.model.get_samples(10)
+
+    def tearDown(self):
+        stdpopsim.set_script_cache(enabled=False)
+        super().tearDown()
+
+    def simulate(self, seed):
+        with stdpopsim.record_metrics() as metrics:
+            ts = self.engine.simulate(
+                    demographic_model=self.model, contig=self.contig,
+                    samples=self.samples, slim_scaling_factor=10,
+                    slim_burn_in=0, seed=seed)
+        return ts, metrics
+
+    def cached_scripts(self):
+        cache = stdpopsim.get_script_cache()
+        return list(cache.engine_dir(self.engine).glob("*.slim"))
+
+    def cached_recombination_maps(self):
+        cache = stdpopsim.get_script_cache()
+        return list(cache.engine_dir(self.engine).glob("*.recomb"))
+
+    def test_reuse(self):
+        ts1, metrics1 = self.simulate(seed=1)
+        self.assertEqual(len(metrics1.get_phase("script_generation")), 1)
+        self.assertEqual(len(self.cached_scripts()), 1)
+        self.assertEqual(len(self.cached_recombination_maps()), 1)
+        ts2, metrics2 = self.simulate(seed=1)
+        self.assertEqual(len(metrics2.get_phase("script_generation")), 0)
+        self.assertEqual(ts1.tables.nodes, ts2.tables.nodes)
+        self.assertEqual(ts1.tables.edges, ts2.tables.edges)
+        ts3, _ = self.simulate(seed=2)
+        self.assertNotEqual(ts1.tables.edges, ts3.tables.edges)
+        self.assertEqual(len(self.cached_scripts()), 1)
+
+        # The same simulation without the cache.
+        try:
+            stdpopsim.set_script_cache(enabled=False)
+            ts4, _ = self.simulate(seed=1)
+        finally:
+            stdpopsim.set_script_cache()
+        self.assertEqual(ts1.tables.nodes, ts4.tables.nodes)
+        self.assertEqual(ts1.tables.edges, ts4.tables.edges)
+
+    def test_failed_run_not_cached(self):
+        with mock.patch.object(
+                self.engine, "_run_slim", side_effect=stdpopsim.SLiMException):
+            with self.assertRaises(stdpopsim.SLiMException):
+                self.simulate(seed=1)
+        self.assertEqual(len(self.cached_scripts()), 0)
+
+    def test_eidos_string(self):
+        self.assertEqual(
+            stdpopsim.slim_engine._eidos_string("/tmp/a.trees"), "'/tmp/a.trees'")
+        self.assertEqual(
+            stdpopsim.slim_engine._eidos_string("it's\\"), "'it\\'s\\\\'")
+
+
+@unittest.skipIf(IS_WINDOWS, "SLiM not available on windows")
+class TestBurnInCheckpoint(tests.CacheWritingTest):
+    """
+    Tests for reusing the population at the end of the burn-in.
+    """
+    def setUp(self):
+        super().setUp()
+        self.engine = stdpopsim.get_engine("slim")
+        species = stdpopsim.get_species("AraTha")
+        self.contig = species.get_contig("5", length_multiplier=0.001)
+        self.model = stdpopsim.PiecewiseConstantSize(species.population_size)
+        self.samples = self.model.get_samples(10)
+
+    def tearDown(self):
+        stdpopsim.set_checkpoint_cache()
+        super().tearDown()
+
+    def simulate(self, seed, samples=None, slim_burn_in=0.1):
+        if samples is None:
+            samples = self.samples
+        return self.engine.simulate(
+                demographic_model=self.model, contig=self.contig,
+                samples=samples, slim_scaling_factor=10,
+                slim_burn_in=slim_burn_in, slim_burn_in_checkpoint=True,
+                seed=seed)
+
+    def checkpoints(self):
+        cache = stdpopsim.get_checkpoint_cache()
+        return list(cache.engine_dir(self.engine).glob("*.trees"))
+
+    def test_save_and_load(self):
+        with mock.patch.object(
+                self.engine, "_run_slim", wraps=self.engine._run_slim) as run_slim:
+            ts1 = self.simulate(seed=1)
+            self.assertEqual(len(self.checkpoints()), 1)
+            self.assertEqual(run_slim.call_count, 1)
+            self.assertFalse(
+                run_slim.call_args[1].get("load_burn_in_checkpoint", False))
+            # The checkpoint doesn't depend on the samples.
+            ts2 = self.simulate(seed=2, samples=self.model.get_samples(6))
+            self.assertEqual(run_slim.call_count, 2)
+            self.assertTrue(run_slim.call_args[1]["load_burn_in_checkpoint"])
+        self.assertEqual(len(self.checkpoints()), 1)
+        self.assertEqual(ts1.num_samples, 10)
+        self.assertEqual(ts2.num_samples, 6)
+        for ts in (ts1, ts2):
+            self.assertTrue(all(tree.num_roots == 1 for tree in ts.trees()))
+        ts3 = self.simulate(seed=3)
+        self.assertNotEqual(ts1.tables.edges, ts3.tables.edges)
+
+    def test_checkpoint_is_read(self):
+        self.simulate(seed=1)
+        checkpoint, = self.checkpoints()
+        with open(checkpoint, "wb") as f:
+            f.write(b"not a tree sequence")
+        # SLiM fails if it reads the checkpoint, rather than re-running the
+        # burn-in.
+        with mock.patch.object(
+                self.engine, "_run_slim", wraps=self.engine._run_slim) as run_slim:
+            with self.assertRaises(stdpopsim.SLiMException):
+                self.simulate(seed=2)
+        self.assertEqual(run_slim.call_count, 1)
+        self.assertEqual(
+            run_slim.call_args[1]["burn_in_checkpoint"], str(checkpoint))
+
+    def test_slim_version(self):
+        self.simulate(seed=1)
+        with mock.patch.object(self.engine, "get_version", return_value="new"):
+            self.simulate(seed=1)
+        self.assertEqual(len(self.checkpoints()), 2)
+
+    def test_too_large(self):
+        stdpopsim.set_checkpoint_cache(max_size=1)
+        with self.assertLogs("stdpopsim.cache", level="WARNING"):
+            ts = self.simulate(seed=1)
+        self.assertEqual(ts.num_samples, 10)
+        self.assertEqual(len(self.checkpoints()), 0)
+
+    def test_no_burn_in(self):
+        self.simulate(seed=1, slim_burn_in=0)
+        self.assertEqual(len(self.checkpoints()), 0)
+
+    def test_replicates(self):
+        reps = list(self.engine.simulate_replicates(
+                demographic_model=self.model, contig=self.contig,
+                samples=self.samples, slim_scaling_factor=10, slim_burn_in=0.1,
+                slim_burn_in_checkpoint=True, seed=1, num_replicates=3))
+        self.assertEqual(len(reps), 3)
+        self.assertEqual(len(self.checkpoints()), 1)
+
+    def test_cache_disabled(self):
+        stdpopsim.set_checkpoint_cache(enabled=False)
+        with self.assertRaises(ValueError):
+            self.simulate(seed=1)
+
+
+@unittest.skipIf(IS_WINDOWS, "SLiM not available on windows")
+class TestSimulateChromosomes(unittest.TestCase):
+    """
+    Tests for simulating several unlinked contigs in a single SLiM run.
+    """
+    species = stdpopsim.get_species("HomSap")
+    model = stdpopsim.PiecewiseConstantSize(1000)
+
+    def contigs(self):
+        return [
+            self.species.get_contig(chrom, length_multiplier=0.001)
+            for chrom in ["chr20", "chr21", "chr22"]]
+
+    def test_simulate(self):
+        engine = stdpopsim.get_engine("slim")
+        contigs = self.contigs()
+        samples = self.model.get_samples(6)
+        ts_list = engine.simulate_chromosomes(
+            demographic_model=self.model, contigs=contigs, samples=samples,
+            slim_scaling_factor=10, slim_burn_in=0.1, seed=5)
+        self.assertEqual(len(ts_list), len(contigs))
+        for ts, contig in zip(ts_list, contigs):
+            self.assertIsInstance(ts, pyslim.SlimTreeSequence)
+            self.assertEqual(
+                ts.sequence_length, int(contig.recombination_map.get_length()))
+            self.assertEqual(list(ts.samples()), list(range(6)))
+            self.assertGreater(ts.num_sites, 0)
+            for tree in ts.trees():
+                self.assertEqual(tree.num_roots, 1)
+        for ts in ts_list[1:]:
+            for u in ts.samples():
+                self.assertEqual(ts.node(u).time, ts_list[0].node(u).time)
+                self.assertEqual(
+                    ts.node(u).population, ts_list[0].node(u).population)
+
+    def test_dry_run_and_script(self):
+        engine = stdpopsim.get_engine("slim")
+        samples = self.model.get_samples(2)
+        ts_list = engine.simulate_chromosomes(
+            demographic_model=self.model, contigs=self.contigs(),
+            samples=samples, dry_run=True)
+        self.assertIsNone(ts_list)
+        out, _ = capture_output(
+            engine.simulate_chromosomes,
+            demographic_model=self.model, contigs=self.contigs(),
+            samples=samples, slim_script=True)
+        self.assertIn("sim.registerLateEvent", out)
+
+    def test_truncate_recombination_map(self):
+        rm = msprime.RecombinationMap([0, 10, 20.5], [1e-8, 2e-8, 0])
+        truncated = stdpopsim.slim_engine._truncate_recombination_map(rm)
+        self.assertEqual(list(truncated.get_positions()), [0, 10, 20])
+        self.assertEqual(list(truncated.get_rates()), [1e-8, 2e-8, 0])
+        rm = msprime.RecombinationMap([0, 10, 20], [1e-8, 2e-8, 0])
+        self.assertIs(stdpopsim.slim_engine._truncate_recombination_map(rm), rm)
+        rm = msprime.RecombinationMap([0, 10, 10.5], [1e-8, 2e-8, 0])
+        truncated = stdpopsim.slim_engine._truncate_recombination_map(rm)
+        self.assertEqual(list(truncated.get_positions()), [0, 10])
+
+
+@unittest.skipIf(IS_WINDOWS, "SLiM not available on windows")
+class TestSimulateReplicates(unittest.TestCase):
+    """
+    Tests for running SLiM replicates concurrently.
+    """
+    def setUp(self):
+        self.engine = stdpopsim.get_engine("slim")
+        species = stdpopsim.get_species("AraTha")
+        self.contig = species.get_contig("5", length_multiplier=0.001)
+        self.model = stdpopsim.PiecewiseConstantSize(species.population_size)
+        self.samples = self.model.get_samples(10)
+
+    def replicates(self, num_replicates=4, **kwargs):
+        return self.engine.simulate_replicates(
+                demographic_model=self.model, contig=self.contig,
+                samples=self.samples, seed=5, num_replicates=num_replicates,
+                slim_scaling_factor=10, slim_burn_in=0, **kwargs)
+
+    def test_matches_default_implementation(self):
+        reps1 = list(self.replicates(num_processes=3))
+        reps2 = list(stdpopsim.Engine.simulate_replicates(
+                self.engine, demographic_model=self.model, contig=self.contig,
+                samples=self.samples, seed=5, num_replicates=4,
+                slim_scaling_factor=10, slim_burn_in=0))
+        self.assertEqual(len(reps1), 4)
+        for ts1, ts2 in zip(reps1, reps2):
+            self.assertEqual(ts1.num_samples, 10)
+            self.assertEqual(ts1.tables.nodes, ts2.tables.nodes)
+            self.assertEqual(ts1.tables.edges, ts2.tables.edges)
+            self.assertEqual(ts1.tables.mutations, ts2.tables.mutations)
+        self.assertNotEqual(reps1[0].tables.edges, reps1[1].tables.edges)
+
+    def test_single_process(self):
+        reps1 = list(self.replicates(num_replicates=3, num_processes=1))
+        reps2 = list(self.replicates(num_replicates=3, num_processes=2))
+        for ts1, ts2 in zip(reps1, reps2):
+            self.assertEqual(ts1.tables.edges, ts2.tables.edges)
+
+    def test_retry(self):
+        run_slim = self.engine._run_slim
+        failures = []
+
+        def fail_once(*args, seed=None, **kwargs):
+            if seed not in failures:
+                failures.append(seed)
+                raise stdpopsim.SLiMException("killed")
+            return run_slim(*args, seed=seed, **kwargs)
+
+        with mock.patch.object(self.engine, "_run_slim", side_effect=fail_once):
+            reps = list(self.replicates(num_replicates=2, max_retries=1))
+        self.assertEqual(len(reps), 2)
+        self.assertEqual(len(failures), 2)
+
+        with mock.patch.object(
+                self.engine, "_run_slim", side_effect=stdpopsim.SLiMException):
+            with self.assertRaises(stdpopsim.SLiMException):
+                list(self.replicates(num_replicates=2, max_retries=2))
+
+    def test_metrics(self):
+        with stdpopsim.record_metrics() as metrics:
+            list(self.replicates(num_replicates=3))
+        self.assertEqual(len(metrics.get_phase("ancestry")), 3)
+        self.assertEqual(len(metrics.get_phase("recapitation")), 3)
+        for phase in metrics.get_phase("ancestry"):
+            self.assertGreater(phase.child_wall_time, 0)
+            self.assertGreater(phase.child_cpu_time, 0)
+            self.assertGreater(phase.child_max_rss, 0)
+        for phase in metrics.get_phase("recapitation"):
+            self.assertIsNone(phase.child_cpu_time)
+
+    def test_dry_run(self):
+        self.assertEqual(list(self.replicates(dry_run=True)), [])
+
+    def test_bad_params(self):
+        with self.assertRaises(ValueError):
+            self.replicates(num_replicates=0)
+        with self.assertRaises(ValueError):
+            self.replicates(max_retries=-1)
+        with self.assertRaises(ValueError):
+            self.replicates(slim_simplification_interval=0)
+
+
+@unittest.skipIf(IS_WINDOWS, "SLiM not available on windows")
+class TestProgress(unittest.TestCase):
+    """
+    Tests for the progress reports of SLiM simulations.
+    """
+    def setUp(self):
+        self.engine = stdpopsim.get_engine("slim")
+        species = stdpopsim.get_species("HomSap")
+        self.contig = species.get_contig("chr22", length_multiplier=0.001)
+        self.model = species.get_demographic_model("OutOfAfrica_3G09")
+        self.samples = self.model.get_samples(10, 10, 10)
+
+    def simulate(self, progress, **kwargs):
+        return self.engine.simulate(
+                demographic_model=self.model, contig=self.contig,
+                samples=self.samples, seed=3, slim_scaling_factor=10,
+                slim_burn_in=0.1, slim_progress=progress, **kwargs)
+
+    def test_parser(self):
+        parser = stdpopsim.slim_engine._ProgressParser(seed=12)
+        line = "PROGRESS: generation=10 end=110 epoch=-1 sizes=100,0\n"
+        p = parser.parse(line)
+        self.assertEqual(p.generation, 10)
+        self.assertEqual(p.end_generation, 110)
+        self.assertEqual(p.epoch, -1)
+        self.assertEqual(p.population_sizes, [100, 0])
+        self.assertEqual(p.seed, 12)
+        self.assertIsNone(p.eta)
+        p = parser.parse("PROGRESS: generation=60 end=110 epoch=0 sizes=50,50")
+        self.assertEqual(p.fraction, 60 / 110)
+        self.assertGreaterEqual(p.eta, 0)
+        self.assertGreaterEqual(p.elapsed, 0)
+
+    def test_simulate(self):
+        reports = []
+        ts = self.simulate(reports.append)
+        self.assertEqual(ts.num_samples, 30)
+        self.assertGreater(len(reports), 1)
+        self.assertLessEqual(len(reports), 1002)
+        generations = [p.generation for p in reports]
+        self.assertEqual(generations, sorted(generations))
+        self.assertEqual(reports[-1].generation, reports[-1].end_generation)
+        self.assertEqual(reports[-1].fraction, 1)
+        self.assertEqual(reports[0].epoch, -1)
+        epochs = [p.epoch for p in reports]
+        self.assertEqual(epochs, sorted(epochs))
+        self.assertGreater(epochs[-1], 0)
+        for p in reports:
+            self.assertEqual(len(p.population_sizes), 3)
+        self.assertTrue(all(p.eta is not None for p in reports[1:]))
+
+    def test_result_unchanged(self):
+        ts1 = self.simulate(lambda p: None)
+        ts2 = self.simulate(None)
+        self.assertEqual(ts1.tables.edges, ts2.tables.edges)
+
+    def test_abort(self):
+        class Abort(Exception):
+            pass
+
+        def abort(progress):
+            if progress.generation > 1:
+                raise Abort()
+
+        with self.assertRaises(Abort):
+            self.simulate(abort)
+
+    def test_replicates(self):
+        reports = []
+        reps = list(self.engine.simulate_replicates(
+                demographic_model=self.model, contig=self.contig,
+                samples=self.samples, seed=3, num_replicates=2,
+                slim_scaling_factor=10, slim_burn_in=0.1,
+                slim_progress=reports.append))
+        self.assertEqual(len(reps), 2)
+        self.assertEqual(len({p.seed for p in reports}), 2)
+
+
 class TestCLI(unittest.TestCase):
 
     def docmd(self, _cmd):
@@ -160,6 +953,63 @@ class TestCLI(unittest.TestCase):
         out, _ = self.docmd("--slim-script HomSap -d AmericanAdmixture_4B11")
         self.assertTrue("sim.registerLateEvent" in out)
 
+    def test_recapitation_first(self):
+        with tempfile.NamedTemporaryFile(mode="w") as f:
+            self.docmd(f"--slim-recapitation-first HomSap -o {f.name}")
+            ts = tskit.load(f.name)
+        self.assertEqual(ts.num_samples, 10)
+        self.assertTrue(all(tree.num_roots == 1 for tree in ts.trees()))
+
+    def test_auto_scaling_factor(self):
+        engine = stdpopsim.get_engine("slim")
+        with mock.patch.object(
+                engine.__class__, "choose_scaling_factor",
+                return_value=7, autospec=True) as mock_choose:
+            self.docmd("--slim-scaling-factor auto --slim-time-budget 60 HomSap -D")
+        mock_choose.assert_called_once()
+        args, kwargs = mock_choose.call_args
+        self.assertEqual(args[4], 60)
+        self.assertIsInstance(kwargs["cost_estimator"], stdpopsim.CostEstimator)
+        with mock.patch("stdpopsim.cli.exit", side_effect=SystemExit) as mock_exit:
+            with self.assertRaises(SystemExit):
+                self.docmd("--slim-scaling-factor auto HomSap -D")
+        mock_exit.assert_called_once()
+        with mock.patch("sys.exit", side_effect=SystemExit):
+            with self.assertRaises(SystemExit):
+                self.docmd("--slim-scaling-factor foo HomSap -D")
+
+    def test_epoch_scaling_factors(self):
+        parser = stdpopsim.cli.stdpopsim_cli_parser()
+        args = parser.parse_args(
+            "-e slim --slim-scaling-factor 10,2,1 HomSap -D 10".split())
+        self.assertEqual(args.slim_scaling_factor, [10, 2, 1])
+        with mock.patch("sys.exit", side_effect=SystemExit):
+            with self.assertRaises(SystemExit):
+                self.docmd("--slim-scaling-factor 10,foo HomSap -D")
+
+    def test_simplification_interval(self):
+        parser = stdpopsim.cli.stdpopsim_cli_parser()
+        args = parser.parse_args("-e slim HomSap -D 10".split())
+        self.assertIsNone(args.slim_simplification_interval)
+        args = parser.parse_args(
+            "-e slim --slim-simplification-interval 50 HomSap -D 10".split())
+        self.assertEqual(args.slim_simplification_interval, 50)
+        with mock.patch.object(
+                stdpopsim.slim_engine._SLiMEngine, "_run_slim",
+                autospec=True) as mock_run_slim:
+            self.docmd("--slim-simplification-interval 50 HomSap -D")
+        mock_run_slim.assert_called_once()
+        _, kwargs = mock_run_slim.call_args
+        self.assertEqual(kwargs["simplification_interval"], 50)
+
+    def test_progress(self):
+        with tempfile.NamedTemporaryFile(mode="w") as f:
+            _, stderr = self.docmd(f"--slim-progress HomSap -o {f.name}")
+            ts = tskit.load(f.name)
+        self.assertEqual(ts.num_samples, 10)
+        self.assertIn("SLiM generation", stderr)
+        self.assertIn("(100%)", stderr)
+
     def test_simulate(self):
         saved_slim_env = os.environ.get("SLIM")
         with tempfile.NamedTemporaryFile(mode="w") as f:
@@ -384,6 +1234,26 @@ class TestWarningsAndErrors(unittest.TestCase):
                     ]:
                 capture_output(stdpopsim.cli.stdpopsim_main, cmd.split())
 
+    def test_warning_small_rescaled_population(self):
+        engine, species, contig = self.triplet()
+        model = stdpopsim.PiecewiseConstantSize(1000)
+        samples = model.get_samples(2)
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always")
+            engine.simulate(
+                    demographic_model=model, contig=contig, samples=samples,
+                    slim_scaling_factor=20, dry_run=True)
+        self.assertTrue(any(
+            issubclass(x.category, stdpopsim.SLiMScalingFactorWarning) and
+            "smallest population size" in str(x.message) for x in w))
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always")
+            engine.simulate(
+                    demographic_model=model, contig=contig, samples=samples,
+                    slim_scaling_factor=5, dry_run=True)
+        self.assertFalse(any(
+            "smallest population size" in str(x.message) for x in w))
+
     def test_warning_when_scaling(self):
         for cmd in [
                 "-e slim --slim-scaling-factor 2 HomSap 100 -D",
@@ -95,6 +95,17 @@ def onepop_constantN_slim3(out_dir, seed):
     return _onepop_PC("slim", out_dir, seed, slim_scaling_factor=10)
 
 
+def onepop_constantN_slim4(out_dir, seed):
+    """
+    Single population with constant population size.
+    Burn-in is replaced by recapitation (recapitation-first mode).
+    Time and Ne are rescaled by a factor of 10.
+    """
+    return _onepop_PC(
+            "slim", out_dir, seed, slim_recapitation_first=True,
+            slim_scaling_factor=10)
+
+
 def onepop_bottleneck_msprime1(out_dir, seed):
     """
     Single population with bottleneck and recovery.
@@ -129,6 +140,17 @@ def onepop_bottleneck_slim3(out_dir, seed):
             slim_scaling_factor=10)
 
 
+def onepop_bottleneck_slim4(out_dir, seed):
+    """
+    Single population with bottleneck and recovery.
+    Burn-in is replaced by recapitation (recapitation-first mode).
+    Time and Ne are rescaled by a factor of 10.
+    """
+    return _onepop_PC(
+            "slim", out_dir, seed, 5000, (800, 100), (1000, 1000),
+            slim_recapitation_first=True, slim_scaling_factor=10)
+
+
 class _PiecewiseSize(stdpopsim.DemographicModel):
     """
     A copy of stdpopsim.PiecewiseConstantSize that permits growth rates.
@@ -203,6 +225,17 @@ def onepop_expgrowth_slim3(out_dir, seed):
     return _onepop_expgrowth("slim", out_dir, seed, slim_scaling_factor=10)
 
 
+def onepop_expgrowth_slim4(out_dir, seed):
+    """
+    Single population with exponential population size growth.
+    Burn-in is replaced by recapitation (recapitation-first mode).
+    Time and Ne are rescaled by a factor of 10.
+    """
+    return _onepop_expgrowth(
+            "slim", out_dir, seed, slim_recapitation_first=True,
+            slim_scaling_factor=10)
+
+
 def _twopop_IM(
         engine_id, out_dir, seed,
         NA=1000, N1=500, N2=5000, T=1000, M12=0, M21=0, pulse=None, samples=None,
@@ -252,6 +285,26 @@ def twopop_no_migration_slim2(out_dir, seed):
             "slim", out_dir, seed, slim_burn_in=0, slim_scaling_factor=10)
 
 
+def twopop_no_migration_slim3(out_dir, seed):
+    """
+    Two populations with different sizes and no migrations.
+    Time and Ne are rescaled by a factor of 10.
+    """
+    return _twopop_IM(
+            "slim", out_dir, seed, slim_scaling_factor=10)
+
+
+def twopop_no_migration_slim4(out_dir, seed):
+    """
+    Two populations with different sizes and no migrations.
+    Burn-in is replaced by recapitation (recapitation-first mode).
+    Time and Ne are rescaled by a factor of 10.
+    """
+    return _twopop_IM(
+            "slim", out_dir, seed, slim_recapitation_first=True,
+            slim_scaling_factor=10)
+
+
 def twopop_asymmetric_migration_msprime1(out_dir, seed):
     """
     Two populations with different sizes and migrations from pop2 to pop1.
@@ -276,6 +329,26 @@ def twopop_asymmetric_migration_slim2(out_dir, seed):
             slim_burn_in=0, slim_scaling_factor=10)
 
 
+def twopop_asymmetric_migration_slim3(out_dir, seed):
+    """
+    Two populations with different sizes and migrations from pop2 to pop1.
+    Time and Ne are rescaled by a factor of 10.
+    """
+    return _twopop_IM(
+            "slim", out_dir, seed, M12=0, M21=0.001, slim_scaling_factor=10)
+
+
+def twopop_asymmetric_migration_slim4(out_dir, seed):
+    """
+    Two populations with different sizes and migrations from pop2 to pop1.
+    Burn-in is replaced by recapitation (recapitation-first mode).
+    Time and Ne are rescaled by a factor of 10.
+    """
+    return _twopop_IM(
+            "slim", out_dir, seed, M12=0, M21=0.001, slim_recapitation_first=True,
+            slim_scaling_factor=10)
+
+
 _pulse_m21 = msprime.MassMigration(
         time=20, proportion=0.1, source=1, destination=0)
 
@@ -304,6 +377,26 @@ def twopop_pulse_migration_slim2(out_dir, seed):
             slim_burn_in=0, slim_scaling_factor=10)
 
 
+def twopop_pulse_migration_slim3(out_dir, seed):
+    """
+    Two populations with different sizes and introgression from pop2 to pop1.
+    Time and Ne are rescaled by a factor of 10.
+    """
+    return _twopop_IM(
+            "slim", out_dir, seed, pulse=_pulse_m21, slim_scaling_factor=10)
+
+
+def twopop_pulse_migration_slim4(out_dir, seed):
+    """
+    Two populations with different sizes and introgression from pop2 to pop1.
+    Burn-in is replaced by recapitation (recapitation-first mode).
+    Time and Ne are rescaled by a factor of 10.
+    """
+    return _twopop_IM(
+            "slim", out_dir, seed, pulse=_pulse_m21, slim_recapitation_first=True,
+            slim_scaling_factor=10)
+
+
 _ancient_samples = 50 * [msprime.Sample(0, time=0), msprime.Sample(1, time=500)]
 
 
@@ -331,6 +424,26 @@ def twopop_ancient_samples_slim2(out_dir, seed):
             slim_burn_in=0, slim_scaling_factor=10)
 
 
+def twopop_ancient_samples_slim3(out_dir, seed):
+    """
+    Two populations, with ancient sampling of the second population.
+    Time and Ne are rescaled by a factor of 10.
+    """
+    return _twopop_IM(
+            "slim", out_dir, seed, samples=_ancient_samples, slim_scaling_factor=10)
+
+
+def twopop_ancient_samples_slim4(out_dir, seed):
+    """
+    Two populations, with ancient sampling of the second population.
+    Burn-in is replaced by recapitation (recapitation-first mode).
+    Time and Ne are rescaled by a factor of 10.
+    """
+    return _twopop_IM(
+            "slim", out_dir, seed, samples=_ancient_samples, slim_recapitation_first=True,
+            slim_scaling_factor=10)
+
+
 def do_cmd(cmd, out_dir, seed):
     cmd = cmd.split()
     assert "-o" not in cmd and "--output" not in cmd
@@ -345,6 +458,7 @@ def do_cmd(cmd, out_dir, seed):
 
 
 _homsap_250k = " HomSap -c chr1 -l 0.001 "
+_slim_recap_first = " --slim-recapitation-first"
 
 
 def Africa_1T12_msprime1(out_dir, seed):
@@ -357,6 +471,11 @@ def Africa_1T12_slim1(out_dir, seed):
     return do_cmd(cmd, out_dir, seed)
 
 
+def Africa_1T12_slim2(out_dir, seed):
+    cmd = "-e slim" + _slim_recap_first + _homsap_250k + "-d Africa_1T12 100"
+    return do_cmd(cmd, out_dir, seed)
+
+
 def OutOfAfrica_3G09_msprime1(out_dir, seed):
     samples = 3 * " 33"
     cmd = "-e msprime" + _homsap_250k + "-d OutOfAfrica_3G09" + samples
@@ -369,6 +488,13 @@ def OutOfAfrica_3G09_slim1(out_dir, seed):
     return do_cmd(cmd, out_dir, seed)
 
 
+def OutOfAfrica_3G09_slim2(out_dir, seed):
+    samples = 3 * " 33"
+    cmd = ("-e slim" + _slim_recap_first + _homsap_250k +
+           "-d OutOfAfrica_3G09" + samples)
+    return do_cmd(cmd, out_dir, seed)
+
+
 def AmericanAdmixture_4B11_msprime1(out_dir, seed):
     samples = 4 * " 25"
     cmd = "-e msprime" + _homsap_250k + "-d AmericanAdmixture_4B11" + samples
@@ -381,6 +507,13 @@ def AmericanAdmixture_4B11_slim1(out_dir, seed):
     return do_cmd(cmd, out_dir, seed)
 
 
+def AmericanAdmixture_4B11_slim2(out_dir, seed):
+    samples = 4 * " 25"
+    cmd = ("-e slim" + _slim_recap_first + _homsap_250k +
+           "-d AmericanAdmixture_4B11" + samples)
+    return do_cmd(cmd, out_dir, seed)
+
+
 def AncientEurasia_9K19_msprime1(out_dir, seed):
     samples = 8 * " 12"
     cmd = "-e msprime" + _homsap_250k + "-d AncientEurasia_9K19" + samples
@@ -393,6 +526,13 @@ def AncientEurasia_9K19_slim1(out_dir, seed):
     return do_cmd(cmd, out_dir, seed)
 
 
+def AncientEurasia_9K19_slim2(out_dir, seed):
+    samples = 8 * " 12"
+    cmd = ("-e slim" + _slim_recap_first + _homsap_250k +
+           "-d AncientEurasia_9K19" + samples)
+    return do_cmd(cmd, out_dir, seed)
+
+
 #
 # Stats functions.
 #
@@ -541,36 +681,51 @@ _simulation_functions = [
     onepop_constantN_slim1,
     onepop_constantN_slim2,
     onepop_constantN_slim3,
+    onepop_constantN_slim4,
     onepop_bottleneck_msprime1,
     onepop_bottleneck_slim1,
     onepop_bottleneck_slim2,
     onepop_bottleneck_slim3,
+    onepop_bottleneck_slim4,
     onepop_expgrowth_msprime1,
     onepop_expgrowth_slim1,
     onepop_expgrowth_slim2,
     onepop_expgrowth_slim3,
+    onepop_expgrowth_slim4,
 
     twopop_no_migration_msprime1,
     twopop_no_migration_slim1,
     twopop_no_migration_slim2,
+    twopop_no_migration_slim3,
+    twopop_no_migration_slim4,
     twopop_asymmetric_migration_msprime1,
     twopop_asymmetric_migration_slim1,
     twopop_asymmetric_migration_slim2,
+    twopop_asymmetric_migration_slim3,
+    twopop_asymmetric_migration_slim4,
     twopop_pulse_migration_msprime1,
     twopop_pulse_migration_slim1,
     twopop_pulse_migration_slim2,
+    twopop_pulse_migration_slim3,
+    twopop_pulse_migration_slim4,
     twopop_ancient_samples_msprime1,
     twopop_ancient_samples_slim1,
     twopop_ancient_samples_slim2,
+    twopop_ancient_samples_slim3,
+    twopop_ancient_samples_slim4,
 
     Africa_1T12_msprime1,
     Africa_1T12_slim1,
+    Africa_1T12_slim2,
     OutOfAfrica_3G09_msprime1,
     OutOfAfrica_3G09_slim1,
+    OutOfAfrica_3G09_slim2,
     AmericanAdmixture_4B11_msprime1,
     AmericanAdmixture_4B11_slim1,
+    AmericanAdmixture_4B11_slim2,
     AncientEurasia_9K19_msprime1,
     AncientEurasia_9K19_slim1,
+    AncientEurasia_9K19_slim2,
 ]
 
 _stats_functions = [
@@ -585,30 +740,55 @@ _stats_functions = [
     #node_arity,
 ]
 
+# Pairs of SLiM simulations that differ only in whether the burn-in is
+# simulated by SLiM or replaced by recapitation (recapitation-first mode)
+# measure the speed and accuracy of the recapitation-first mode.
 _default_comparisons = [
     (onepop_constantN_msprime1, onepop_constantN_slim1),
     (onepop_constantN_msprime1, onepop_constantN_slim2),
     (onepop_constantN_msprime1, onepop_constantN_slim3),
+    (onepop_constantN_msprime1, onepop_constantN_slim4),
+    (onepop_constantN_slim3, onepop_constantN_slim4),
     (onepop_bottleneck_msprime1, onepop_bottleneck_slim1),
     (onepop_bottleneck_msprime1, onepop_bottleneck_slim2),
     (onepop_bottleneck_msprime1, onepop_bottleneck_slim3),
+    (onepop_bottleneck_msprime1, onepop_bottleneck_slim4),
+    (onepop_bottleneck_slim3, onepop_bottleneck_slim4),
     (onepop_expgrowth_msprime1, onepop_expgrowth_slim1),
     (onepop_expgrowth_msprime1, onepop_expgrowth_slim2),
     (onepop_expgrowth_msprime1, onepop_expgrowth_slim3),
+    (onepop_expgrowth_msprime1, onepop_expgrowth_slim4),
+    (onepop_expgrowth_slim3, onepop_expgrowth_slim4),
 
     (twopop_no_migration_msprime1, twopop_no_migration_slim1),
     (twopop_no_migration_msprime1, twopop_no_migration_slim2),
+    (twopop_no_migration_msprime1, twopop_no_migration_slim3),
+    (twopop_no_migration_msprime1, twopop_no_migration_slim4),
+    (twopop_no_migration_slim3, twopop_no_migration_slim4),
     (twopop_asymmetric_migration_msprime1, twopop_asymmetric_migration_slim1),
     (twopop_asymmetric_migration_msprime1, twopop_asymmetric_migration_slim2),
+    (twopop_asymmetric_migration_msprime1, twopop_asymmetric_migration_slim3),
+    (twopop_asymmetric_migration_msprime1, twopop_asymmetric_migration_slim4),
+    (twopop_asymmetric_migration_slim3, twopop_asymmetric_migration_slim4),
     (twopop_pulse_migration_msprime1, twopop_pulse_migration_slim1),
     (twopop_pulse_migration_msprime1, twopop_pulse_migration_slim2),
+    (twopop_pulse_migration_msprime1, twopop_pulse_migration_slim3),
+    (twopop_pulse_migration_msprime1, twopop_pulse_migration_slim4),
+    (twopop_pulse_migration_slim3, twopop_pulse_migration_slim4),
     (twopop_ancient_samples_msprime1, twopop_ancient_samples_slim1),
     (twopop_ancient_samples_msprime1, twopop_ancient_samples_slim2),
+    (twopop_ancient_samples_msprime1, twopop_ancient_samples_slim3),
+    (twopop_ancient_samples_msprime1, twopop_ancient_samples_slim4),
+    (twopop_ancient_samples_slim3, twopop_ancient_samples_slim4),
 
     (Africa_1T12_msprime1, Africa_1T12_slim1),
+    (Africa_1T12_slim1, Africa_1T12_slim2),
     (OutOfAfrica_3G09_msprime1, OutOfAfrica_3G09_slim1),
+    (OutOfAfrica_3G09_slim1, OutOfAfrica_3G09_slim2),
     (AmericanAdmixture_4B11_msprime1, AmericanAdmixture_4B11_slim1),
+    (AmericanAdmixture_4B11_slim1, AmericanAdmixture_4B11_slim2),
     (AncientEurasia_9K19_msprime1, AncientEurasia_9K19_slim1),
+    (AncientEurasia_9K19_slim1, AncientEurasia_9K19_slim2),
 ]
 
 stats_functions = {f.__name__: f for f in _stats_functions}